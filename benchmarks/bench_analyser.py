@@ -0,0 +1,64 @@
+"""
+Compares single-call and map-reduce document analysis across document sizes.
+
+The pages of the given PDF are repeated until every requested size is reached, then each
+text is analyzed in both modes; the latency and the prompt and completion tokens billed
+for all LLM calls of the analysis are reported. Needs the Azure OpenAI settings of the app.
+
+Usage:
+    python -m benchmarks.bench_analyser notebook/data/attention.pdf --pages 5 20 80
+"""
+import re
+import sys
+import time
+import asyncio
+import argparse
+
+from langchain_community.callbacks import get_openai_callback
+from src.repositories.doc_analyser_repository import DocAnalyserRepository, PAGE_MARKER_PATTERN
+from src.utils.token_counter import count_tokens
+
+MODES = ("single", "map_reduce")
+
+def _build_text(pages: list[str], page_count: int) -> str:
+    # Renumbers the repeated pages so the page markers stay consecutive
+    return "\n".join(
+        f"\n--- Page {page_num} ---\n{pages[(page_num - 1) % len(pages)]}"
+        for page_num in range(1, page_count + 1)
+    )
+
+async def bench(repository: DocAnalyserRepository, pages: list[str], page_counts: list[int]) -> None:
+    print(f"{'pages':>6} {'doc tok':>8} {'mode':<11} {'seconds':>8} {'prompt tok':>11} {'compl tok':>10} {'calls':>6}")
+
+    for page_count in page_counts:
+        text = _build_text(pages, page_count)
+
+        for mode in MODES:
+            with get_openai_callback() as usage:
+                start = time.perf_counter()
+                await repository._analyze_document(text, mode=mode)
+                seconds = time.perf_counter() - start
+
+            print(
+                f"{page_count:>6} {count_tokens(text):>8} {mode:<11} {seconds:>8.2f} "
+                f"{usage.prompt_tokens:>11} {usage.completion_tokens:>10} {usage.successful_requests:>6}"
+            )
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", help="PDF file whose pages are repeated")
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20, 80], help="Document sizes, in pages")
+    args = parser.parse_args(argv)
+
+    repository = DocAnalyserRepository()
+
+    with open(args.file, "rb") as f:
+        text = repository._extract_text(f.read())
+
+    # Page bodies without their markers
+    pages = [re.sub(r"^\n--- Page \d+ ---\n", "", page) for page in re.split(PAGE_MARKER_PATTERN, text) if page.strip()]
+
+    asyncio.run(bench(repository, pages, args.pages))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,98 @@
+"""
+Blob I/O benchmark: the former synchronous, one-blob-at-a-time calls against the async BlobService.
+
+Uploads, lists and downloads --count blobs of --size-mb each, and reports throughput for both.
+Runs against the Azurite emulator by default; start it with
+
+    docker run -p 10000:10000 mcr.microsoft.com/azure-storage/azurite azurite-blob --blobHost 0.0.0.0
+
+Usage:
+    python -m benchmarks.bench_blob_io --count 16 --size-mb 32
+    python -m benchmarks.bench_blob_io --connection-string "<storage connection string>"
+"""
+import os
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+
+from azure.storage.blob import BlobServiceClient as SyncBlobServiceClient
+from src.services.azure.blob import BlobService
+
+# Azurite's well-known development account
+AZURITE_CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;"
+    "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;"
+)
+
+def _report(label: str, seconds: float, total_bytes: int) -> None:
+    print(f"{label:<28} {seconds:>8.2f} s {total_bytes / seconds / 1024 / 1024:>9.1f} MB/s")
+
+def bench_sync(connection_string: str, container: str, prefix: str, names: list[str], payload: bytes) -> None:
+    client = SyncBlobServiceClient.from_connection_string(connection_string)
+    container_client = client.get_container_client(container)
+    total_bytes = len(payload) * len(names)
+
+    start = time.perf_counter()
+    for name in names:
+        container_client.get_blob_client(f"{prefix}{name}").upload_blob(payload, overwrite=True)
+    _report("sync upload", time.perf_counter() - start, total_bytes)
+
+    start = time.perf_counter()
+    blobs = list(container_client.list_blobs(name_starts_with=prefix))
+    print(f"{'sync list':<28} {time.perf_counter() - start:>8.2f} s {len(blobs):>9} blobs")
+
+    start = time.perf_counter()
+    for name in names:
+        container_client.get_blob_client(f"{prefix}{name}").download_blob().readall()
+    _report("sync download", time.perf_counter() - start, total_bytes)
+
+async def bench_async(connection_string: str, container: str, prefix: str, names: list[str], payload: bytes) -> None:
+    blob_service = BlobService(connection_string=connection_string)
+    total_bytes = len(payload) * len(names)
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(blob_service.upload_stream(container, f"{prefix}{name}", payload) for name in names))
+        _report("async upload", time.perf_counter() - start, total_bytes)
+
+        start = time.perf_counter()
+        blobs = await blob_service.list_blobs_in_folder(container, prefix)
+        print(f"{'async list':<28} {time.perf_counter() - start:>8.2f} s {len(blobs):>9} blobs")
+
+        with tempfile.TemporaryDirectory() as target_dir:
+            start = time.perf_counter()
+            await blob_service.download_blobs_to_dir(container, [blob["name"] for blob in blobs], target_dir)
+            _report("async download (to disk)", time.perf_counter() - start, total_bytes)
+
+    finally:
+        await BlobService.close_shared_clients()
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connection-string", default=os.getenv("AZURITE_CONNECTION_STRING", AZURITE_CONNECTION_STRING))
+    parser.add_argument("--container", default="bench-blob-io")
+    parser.add_argument("--count", type=int, default=16, help="Blobs per run")
+    parser.add_argument("--size-mb", type=int, default=32, help="Size of every blob")
+    args = parser.parse_args(argv)
+
+    container_client = SyncBlobServiceClient.from_connection_string(args.connection_string).get_container_client(args.container)
+    if not container_client.exists():
+        container_client.create_container()
+
+    payload = os.urandom(args.size_mb * 1024 * 1024)
+    names = [f"file-{i:04d}.bin" for i in range(args.count)]
+    run_id = uuid.uuid4().hex[:8]
+
+    print(f"{args.count} blobs x {args.size_mb} MB")
+    bench_sync(args.connection_string, args.container, f"{run_id}/sync/", names, payload)
+    asyncio.run(bench_async(args.connection_string, args.container, f"{run_id}/async/", names, payload))
+
+    for blob in container_client.list_blobs(name_starts_with=f"{run_id}/"):
+        container_client.delete_blob(blob.name)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,62 @@
+"""
+Compares page-per-chunk splitting with the structure-aware DoclingDocumentChunker.
+
+For every file it reports the embedding tokens per document (the sum over all chunks)
+and the context tokens a chat answer pays for with k=5 retrieved chunks: the expected
+value (5 x mean chunk size) and the worst case (the 5 largest chunks).
+
+Usage:
+    python -m benchmarks.bench_chunking notebook/data/attention.pdf notebook/data/MLC_user_guide.pdf
+"""
+import sys
+import argparse
+import statistics
+
+from docling.document_converter import DocumentConverter
+from src.services.extractors.docling_chunker import DoclingDocumentChunker
+from src.utils.token_counter import count_tokens
+
+K = 5
+
+def _page_chunks(document) -> list[str]:
+    return [document.export_to_markdown(page_no=page_no).strip() for page_no in sorted(document.pages.keys())]
+
+def _stats(chunk_tokens: list[int]) -> dict:
+    largest = sorted(chunk_tokens, reverse=True)[:K]
+    return {
+        "chunks": len(chunk_tokens),
+        "embedding_tokens": sum(chunk_tokens),
+        "mean": statistics.mean(chunk_tokens) if chunk_tokens else 0,
+        "max": max(chunk_tokens, default=0),
+        "under_50": sum(1 for tokens in chunk_tokens if tokens < 50),
+        "prompt_expected": K * statistics.mean(chunk_tokens) if chunk_tokens else 0,
+        "prompt_worst": sum(largest),
+    }
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="PDF or DOCX files")
+    parser.add_argument("--min-tokens", type=int, default=None)
+    parser.add_argument("--max-tokens", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    converter = DocumentConverter()
+    chunker = DoclingDocumentChunker(min_tokens=args.min_tokens, max_tokens=args.max_tokens)
+
+    print(f"{'file':<40} {'mode':<10} {'chunks':>6} {'embed tok':>10} {'mean':>7} {'max':>6} {'<50':>4} {'k=5 exp':>8} {'k=5 max':>8}")
+
+    for path in args.files:
+        document = converter.convert(path).document
+
+        before = _stats([count_tokens(text) for text in _page_chunks(document)])
+        after = _stats([count_tokens(doc.page_content) for doc in chunker.chunk(document)])
+
+        for mode, stats in (("per-page", before), ("structure", after)):
+            print(
+                f"{path[-40:]:<40} {mode:<10} {stats['chunks']:>6} {stats['embedding_tokens']:>10} "
+                f"{stats['mean']:>7.0f} {stats['max']:>6} {stats['under_50']:>4} "
+                f"{stats['prompt_expected']:>8.0f} {stats['prompt_worst']:>8}"
+            )
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,47 @@
+"""
+Compares the context tokens of the former fixed k=5 retrieval with the score-thresholded, token-budgeted ContextBuilder.
+
+For every query the product's vector store is searched once; the report shows the tokens of the five
+nearest chunks joined whole (before) and of the context the builder packs from the same hits (after).
+Needs a vectorized product in ./faiss_vector_store and the Azure OpenAI settings of the app.
+
+Usage:
+    python -m benchmarks.bench_context <client_id> <product_id> "What is the warranty period?" "How do I reset it?"
+"""
+import sys
+import asyncio
+import argparse
+
+from src.services.vectorstores.context_builder import ContextBuilder
+from src.services.vectorstores.faiss_store import FaissService
+from src.utils.token_counter import count_tokens
+
+K = 5
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("client_id")
+    parser.add_argument("product_id")
+    parser.add_argument("queries", nargs="+")
+    parser.add_argument("--max-context-tokens", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    faiss_service = FaissService()
+    vector_store = faiss_service.load_vector_store(args.client_id, args.product_id)
+    builder = ContextBuilder(max_context_tokens=args.max_context_tokens)
+
+    embeddings = asyncio.run(faiss_service.azOpenAIEmbeddings.aembed_documents(args.queries))
+
+    print(f"{'query':<40} {'before tok':>10} {'after tok':>10} {'chunks':>7} {'best':>6} {'overlaps':>8}")
+
+    for query, embedding in zip(args.queries, embeddings):
+        hits = faiss_service.search_with_scores(vector_store, embedding, k=max(builder.fetch_k, K))
+
+        before = count_tokens("\n\n".join(doc.page_content for doc, _ in hits[:K]))
+        documents, stats = builder.build(hits)
+        after = count_tokens("\n\n".join(doc.page_content for doc in documents))
+
+        print(f"{query[:40]:<40} {before:>10} {after:>10} {len(documents):>7} {stats['best_score']:>6.3f} {stats['overlaps_removed']:>8}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
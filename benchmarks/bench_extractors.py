@@ -0,0 +1,87 @@
+"""
+Per-format throughput benchmark for the document extractors.
+
+Runs every file through the native fast path used by DoclingFileExtractor.chunk_file
+and, with --with-docling, through a default Docling DocumentConverter for comparison.
+
+Usage:
+    python -m benchmarks.bench_extractors notebook/data/sample.md notebook/data/sample.pptx --with-docling
+"""
+import os
+import sys
+import time
+import argparse
+
+from collections import defaultdict
+from src.services.extractors.native_file_extractor import NativeFileExtractor
+from src.services.extractors.spreadsheet_chunker import SpreadsheetChunker
+
+def _native_routes(extractor: NativeFileExtractor, spreadsheet_chunker: SpreadsheetChunker) -> dict:
+    return {
+        ".txt": extractor.chunk_text,
+        ".md": extractor.chunk_markdown,
+        ".pptx": extractor.chunk_pptx,
+        ".csv": spreadsheet_chunker.chunk_csv,
+        ".xlsx": spreadsheet_chunker.chunk_xlsx,
+    }
+
+def _time_call(fn, *args, repeat: int = 3) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Local files to benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per file; the best time is reported")
+    parser.add_argument("--with-docling", action="store_true", help="Also time a default Docling conversion")
+    args = parser.parse_args(argv)
+
+    routes = _native_routes(NativeFileExtractor(), SpreadsheetChunker())
+    converter = None
+
+    if args.with_docling:
+        from docling.document_converter import DocumentConverter
+        converter = DocumentConverter()
+
+    totals = defaultdict(lambda: {"bytes": 0, "native": 0.0, "docling": 0.0, "chunks": 0})
+
+    for path in args.files:
+        ext = os.path.splitext(path)[1].lower()
+        route = routes.get(ext)
+
+        if route is None:
+            print(f"skipping {path}: no native route for '{ext}'")
+            continue
+
+        size = os.path.getsize(path)
+        native_time, documents = _time_call(route, path, repeat=args.repeat)
+
+        totals[ext]["bytes"] += size
+        totals[ext]["native"] += native_time
+        totals[ext]["chunks"] += len(documents)
+
+        line = f"{path}: {size / 1024:.1f} KiB, {len(documents)} chunks, native {native_time * 1000:.1f} ms"
+
+        if converter is not None:
+            try:
+                docling_time, _ = _time_call(converter.convert, path, repeat=args.repeat)
+                totals[ext]["docling"] += docling_time
+                line += f", docling {docling_time * 1000:.1f} ms ({docling_time / max(native_time, 1e-9):.0f}x)"
+            except Exception as e:
+                line += f", docling failed ({e.__class__.__name__})"
+
+        print(line)
+
+    print("\nformat  MiB      native MiB/s  docling MiB/s")
+    for ext, total in sorted(totals.items()):
+        mib = total["bytes"] / (1024 * 1024)
+        native_rate = mib / total["native"] if total["native"] else 0.0
+        docling_rate = f"{mib / total['docling']:.2f}" if total["docling"] else "-"
+        print(f"{ext:<7} {mib:<8.2f} {native_rate:<13.2f} {docling_rate}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -41,6 +41,56 @@ class DocAnalyserController:
             self.log.error("Document analysis failed", error_msg=error_msg)
             raise HTTPException(status_code=500, detail=f"Unexpected error during document upload.")
 
+    async def analyse_document_stream(self, data: UploadFile = File(...)):
+        """
+        Endpoint to upload a document to analyze it, streaming the metadata fields over SSE as they are generated.
+        """
+        try:
+            self.log.info("Streamed document analysis started")
+
+            return await self.repository.analyse_document_stream(data)
+
+        except ValueError as ve:
+            error_msg = CustomException(str(ve), sys).__str__()
+            self.log.error("Streamed document analysis failed", error_msg=error_msg)
+            raise HTTPException(status_code=400, detail=f"{error_msg}")
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Streamed document analysis failed", error_msg=error_msg)
+            raise HTTPException(status_code=500, detail=f"Unexpected error during document upload.")
+
+    async def analyse_documents(self, files: list[UploadFile] = File(...)):
+        """
+        Endpoint to upload several documents at once to analyze them; results are streamed as NDJSON as they finish.
+        """
+        try:
+            self.log.info("Batch document analysis started", files=len(files))
+
+            return await self.repository.analyse_documents(files)
+
+        except ValueError as ve:
+            error_msg = CustomException(str(ve), sys).__str__()
+            self.log.error("Batch document analysis failed", error_msg=error_msg)
+            raise HTTPException(status_code=400, detail=f"{ve}")
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Batch document analysis failed", error_msg=error_msg)
+            raise HTTPException(status_code=500, detail=f"Unexpected error during batch document analysis.")
+
+    async def get_metrics(self):
+        """
+        Endpoint to read the response parsing counters of the document analyser.
+        """
+        try:
+            return self.repository.get_parsing_stats()
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Reading analyser metrics failed", error_msg=error_msg)
+            raise HTTPException(status_code=500, detail=f"Unexpected error while reading analyser metrics.")
+
 # Initialize the controller      
 doc_analyser_controller = DocAnalyserController()
 
@@ -51,6 +101,21 @@ endpoints = [
         "path": "/analyze",
         "method": "post",
         "handler": doc_analyser_controller.analyse_document
+    },
+    {
+        "path": "/analyze-stream",
+        "method": "post",
+        "handler": doc_analyser_controller.analyse_document_stream
+    },
+    {
+        "path": "/analyze-batch",
+        "method": "post",
+        "handler": doc_analyser_controller.analyse_documents
+    },
+    {
+        "path": "/metrics",
+        "method": "get",
+        "handler": doc_analyser_controller.get_metrics
     }
 ]
 
@@ -3,10 +3,11 @@ import structlog
 
 from fastapi import APIRouter, status
 from src.utils.custom_exception import CustomException
-from fastapi import UploadFile, File
+from fastapi import UploadFile, File, Request
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
 from src.repositories.doc_chat_repository import DocChatRepository
+from src.repositories.jobs_repository import JobsRepository
 from src.models.requests import ChatRequest
 
 router = APIRouter()
@@ -19,6 +20,7 @@ class DocChatController:
         """
         self.log = structlog.get_logger(self.__class__.__name__)
         self.repository = DocChatRepository()
+        self.jobs_repository = JobsRepository()
 
     async def upload_document(self, client_id: str, product_id: str, data: UploadFile = File(...)):
         """
@@ -43,18 +45,134 @@ class DocChatController:
             self.log.error("Upload document failed", error_msg=error_msg)
             raise HTTPException(status_code=500, detail=f"Unexpected error during document upload.")
         
+    async def create_upload_url(self, client_id: str, product_id: str, filename: str, content_type: str):
+        """
+        Endpoint to get a short-lived SAS URL for uploading a document straight to storage.
+        """
+        try:
+            response = await self.repository.create_upload_url(client_id=client_id, product_id=product_id, filename=filename, content_type=content_type)
+
+            return JSONResponse(content=response)
+
+        except ValueError as ve:
+            error_msg = CustomException(str(ve), sys).__str__()
+            self.log.error("Create upload URL failed", error_msg=error_msg)
+            raise HTTPException(status_code=400, detail=f"{ve}")
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Create upload URL failed", error_msg=error_msg)
+            raise HTTPException(status_code=500, detail=f"Unexpected error while creating the upload URL.")
+
+    async def complete_upload(self, client_id: str, product_id: str, blob_name: str):
+        """
+        Endpoint called once a SAS upload has finished; validates the uploaded document.
+        """
+        try:
+            response = await self.repository.complete_upload(client_id=client_id, product_id=product_id, blob_name=blob_name)
+
+            return JSONResponse(content=response)
+
+        except ValueError as ve:
+            error_msg = CustomException(str(ve), sys).__str__()
+            self.log.error("Complete upload failed", error_msg=error_msg)
+            raise HTTPException(status_code=400, detail=f"{ve}")
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Complete upload failed", error_msg=error_msg)
+            raise HTTPException(status_code=500, detail=f"Unexpected error while completing the upload.")
+
+    async def initiate_upload(self, client_id: str, product_id: str, filename: str, content_type: str, total_size: int):
+        """
+        Endpoint to start a resumable upload.
+        """
+        try:
+            response = await self.repository.initiate_upload(client_id=client_id, product_id=product_id, filename=filename, content_type=content_type, total_size=total_size)
+
+            return JSONResponse(content=response)
+
+        except ValueError as ve:
+            error_msg = CustomException(str(ve), sys).__str__()
+            self.log.error("Initiate upload failed", error_msg=error_msg)
+            raise HTTPException(status_code=400, detail=f"{ve}")
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Initiate upload failed", error_msg=error_msg)
+            raise HTTPException(status_code=500, detail=f"Unexpected error while initiating the upload.")
+
+    async def upload_chunk(self, upload_id: str, index: int, request: Request, sha256: str | None = None):
+        """
+        Endpoint to upload one chunk of a resumable upload, sent as the raw request body.
+        """
+        try:
+            response = await self.repository.upload_chunk(upload_id=upload_id, index=index, chunks=request.stream(), expected_sha256=sha256)
+
+            return JSONResponse(content=response)
+
+        except ValueError as ve:
+            error_msg = CustomException(str(ve), sys).__str__()
+            self.log.error("Upload chunk failed", error_msg=error_msg)
+            raise HTTPException(status_code=400, detail=f"{ve}")
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Upload chunk failed", error_msg=error_msg)
+            raise HTTPException(status_code=500, detail=f"Unexpected error while uploading the chunk.")
+
+    async def get_upload_status(self, upload_id: str):
+        """
+        Endpoint to list the chunks of a resumable upload that have arrived.
+        """
+        try:
+            response = await self.repository.get_upload_status(upload_id=upload_id)
+
+            return JSONResponse(content=response)
+
+        except ValueError as ve:
+            error_msg = CustomException(str(ve), sys).__str__()
+            self.log.error("Get upload status failed", error_msg=error_msg)
+            raise HTTPException(status_code=400, detail=f"{ve}")
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Get upload status failed", error_msg=error_msg)
+            raise HTTPException(status_code=500, detail=f"Unexpected error while reading the upload status.")
+
+    async def commit_upload(self, upload_id: str):
+        """
+        Endpoint to assemble the chunks of a resumable upload into the document.
+        """
+        try:
+            response = await self.repository.commit_upload(upload_id=upload_id)
+
+            return JSONResponse(content=response)
+
+        except ValueError as ve:
+            error_msg = CustomException(str(ve), sys).__str__()
+            self.log.error("Commit upload failed", error_msg=error_msg)
+            raise HTTPException(status_code=400, detail=f"{ve}")
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Commit upload failed", error_msg=error_msg)
+            raise HTTPException(status_code=500, detail=f"Unexpected error while committing the upload.")
+
     async def vectorize_document(self, client_id: str, product_id: str):
         """
         Endpoint to vectorize a document for chat analysis.
+        The work runs on the ingestion worker; poll /jobs/{job_id} for its status and progress.
         """
         try:
-            self.log.info("Document vectorization started")
+            job = self.jobs_repository.submit_product_job("vectorize", client_id=client_id, product_id=product_id)
 
-            await self.repository.vectorize_document(client_id=client_id, product_id=product_id)
+            self.log.info("Document vectorization queued", job_id=job.id)
 
-            self.log.info("Document vectorization completed successfully")
-
-            return JSONResponse(content="Document vectorization completed successfully")
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={"message": "Document vectorization queued", "job_id": job.id, "status": job.status.value}
+            )
 
         except ValueError as ve:
             error_msg = CustomException(str(ve), sys).__str__()
@@ -64,7 +182,7 @@ class DocChatController:
         except Exception as e:
             error_msg = CustomException(str(e), sys).__str__()
             self.log.error("Vectorize document failed", error_msg=error_msg)
-            raise HTTPException(status_code=500, detail=f"Unexpected error during document vectorization.")
+            raise HTTPException(status_code=500, detail=f"Unexpected error while queuing document vectorization.")
         
     async def chat(self, chat_request: ChatRequest):
         try:
@@ -113,6 +231,36 @@ endpoints = [
         "method": "post",
         "handler": doc_chat_controller.upload_document
     },
+    {
+        "path": "/upload-url",
+        "method": "post",
+        "handler": doc_chat_controller.create_upload_url
+    },
+    {
+        "path": "/upload-complete",
+        "method": "post",
+        "handler": doc_chat_controller.complete_upload
+    },
+    {
+        "path": "/uploads",
+        "method": "post",
+        "handler": doc_chat_controller.initiate_upload
+    },
+    {
+        "path": "/uploads/{upload_id}/chunks/{index}",
+        "method": "put",
+        "handler": doc_chat_controller.upload_chunk
+    },
+    {
+        "path": "/uploads/{upload_id}",
+        "method": "get",
+        "handler": doc_chat_controller.get_upload_status
+    },
+    {
+        "path": "/uploads/{upload_id}/commit",
+        "method": "post",
+        "handler": doc_chat_controller.commit_upload
+    },
     {
         "path": "/vectorize",
         "method": "post",
@@ -1,7 +1,7 @@
 import sys
 import structlog
 
-from src.repositories.doc_extractor_repository import DocExtractorRepository
+from src.repositories.jobs_repository import JobsRepository
 from src.utils.custom_exception import CustomException
 from fastapi import APIRouter, status
 from fastapi.responses import JSONResponse
@@ -12,20 +12,22 @@ router = APIRouter()
 class DocExtractorController:
     def __init__(self):
         self.log = structlog.get_logger(self.__class__.__name__)
-        self.repository = DocExtractorRepository()
+        self.jobs_repository = JobsRepository()
         
     async def sync_documents(self, client_id: str, product_id: str):
         """
         Endpoint to synchronize documents for chat analysis.
+        The work runs on the ingestion worker; poll /jobs/{job_id} for its status and progress.
         """
         try:
-            self.log.info("Document synchronization started")
+            job = self.jobs_repository.submit_product_job("sync", client_id=client_id, product_id=product_id)
 
-            await self.repository.sync_documents(client_id=client_id, product_id=product_id)
+            self.log.info("Document synchronization queued", job_id=job.id)
 
-            self.log.info("Document synchronization completed successfully")
-
-            return JSONResponse(content="Document synchronization completed successfully")
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={"message": "Document synchronization queued", "job_id": job.id, "status": job.status.value}
+            )
 
         except ValueError as ve:
             error_msg = CustomException(str(ve), sys).__str__()
@@ -35,7 +37,32 @@ class DocExtractorController:
         except Exception as e:
             error_msg = CustomException(str(e), sys).__str__()
             self.log.error("Sync documents failed", error_msg=error_msg)
-            raise HTTPException(status_code=500, detail=f"Unexpected error during document synchronization.")
+            raise HTTPException(status_code=500, detail=f"Unexpected error while queuing document synchronization.")
+
+    async def ingest_documents(self, client_id: str, product_id: str):
+        """
+        Endpoint to synchronize documents and update their vector store in one streaming pass.
+        The work runs on the ingestion worker; poll /jobs/{job_id} for its status and per-stage progress.
+        """
+        try:
+            job = self.jobs_repository.submit_product_job("ingest", client_id=client_id, product_id=product_id)
+
+            self.log.info("Document ingestion queued", job_id=job.id)
+
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={"message": "Document ingestion queued", "job_id": job.id, "status": job.status.value}
+            )
+
+        except ValueError as ve:
+            error_msg = CustomException(str(ve), sys).__str__()
+            self.log.error("Ingest documents failed", error_msg=error_msg)
+            raise HTTPException(status_code=400, detail=f"{ve}")
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Ingest documents failed", error_msg=error_msg)
+            raise HTTPException(status_code=500, detail=f"Unexpected error while queuing document ingestion.")
 
 doc_extractor_controller = DocExtractorController()
 
@@ -44,6 +71,11 @@ endpoints = [
         "path": "/sync",
         "method": "post",
         "handler": doc_extractor_controller.sync_documents
+    },
+    {
+        "path": "/ingest",
+        "method": "post",
+        "handler": doc_extractor_controller.ingest_documents
     }
 ]
 
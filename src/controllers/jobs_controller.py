@@ -0,0 +1,81 @@
+import sys
+import structlog
+
+from fastapi import APIRouter, status
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from src.repositories.jobs_repository import JobsRepository
+from src.utils.custom_exception import CustomException
+
+router = APIRouter()
+
+class JobsController:
+    def __init__(self):
+        """
+        Initializes the JobsController.
+        This controller exposes the status of background ingestion jobs.
+        """
+        self.log = structlog.get_logger(self.__class__.__name__)
+        self.repository = JobsRepository()
+
+    async def get_job(self, job_id: str):
+        """
+        Endpoint to poll the status and progress of a job.
+        """
+        try:
+            job = self.repository.get_job(job_id)
+
+            return JSONResponse(content=job.model_dump(mode="json"))
+
+        except LookupError as le:
+            raise HTTPException(status_code=404, detail=f"{le}")
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Get job failed", error_msg=error_msg)
+            raise HTTPException(status_code=500, detail=f"Unexpected error while reading the job.")
+
+    async def cancel_job(self, job_id: str):
+        """
+        Endpoint to cancel a job. Queued jobs are cancelled right away, running jobs at their next progress step.
+        """
+        try:
+            job = self.repository.cancel_job(job_id)
+
+            self.log.info("Job cancellation requested", job_id=job_id, status=job.status.value)
+
+            return JSONResponse(content=job.model_dump(mode="json"))
+
+        except LookupError as le:
+            raise HTTPException(status_code=404, detail=f"{le}")
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Cancel job failed", error_msg=error_msg)
+            raise HTTPException(status_code=500, detail=f"Unexpected error while cancelling the job.")
+
+# Initialize the controller
+jobs_controller = JobsController()
+
+# Define the endpoints for the router
+endpoints = [
+    {
+        "path": "/{job_id}",
+        "method": "get",
+        "handler": jobs_controller.get_job
+    },
+    {
+        "path": "/{job_id}/cancel",
+        "method": "post",
+        "handler": jobs_controller.cancel_job
+    }
+]
+
+# Register the endpoints with the router
+for endpoint in endpoints:
+    router.add_api_route(
+        path=endpoint["path"],
+        endpoint=endpoint["handler"],
+        methods=[endpoint["method"]],
+        status_code=status.HTTP_200_OK
+    )
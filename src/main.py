@@ -9,8 +9,11 @@ from fastapi.middleware.cors import CORSMiddleware
 from src.controllers.doc_analyser_controller import router as doc_analyser_router
 from src.controllers.doc_chat_controller import router as doc_chat_router
 # from src.controllers.doc_extractor_controller import router as doc_extractor_router
+from src.controllers.jobs_controller import router as jobs_router
 from src.controllers.user_registration_controller import router as user_registration_router
 from src.core.app_settings import get_settings, refresh_settings
+from src.services.azure.blob import BlobService
+from src.services.memory.memory_extractor import memory_extraction_worker
 from src.utils.az_logger import az_logging
 from contextlib import asynccontextmanager
 
@@ -24,10 +27,13 @@ logger = structlog.get_logger("app")
 async def lifespan(app: FastAPI):
     # startup logic
     _ = get_settings()  # Ensure settings are loaded at startup
+    await memory_extraction_worker.start()
     logger.info("App setting configurations loaded and application startup complete")
     yield
     # shutdown logic
     logger.info("Application shutdown initiated")
+    await memory_extraction_worker.stop()
+    await BlobService.close_shared_clients()
 
 def verify_token(token: str) -> dict:
     return jwt.decode(token, os.getenv("JWT_SECRET_KEY", None), algorithms=["HS256"], options={"require": ["exp", "iat", "nbf"]})
@@ -87,6 +93,7 @@ routers = [
     (doc_analyser_router, "/doc-analyser", ["Document Analysis"]),
     (doc_chat_router, "/doc-chat", ["Document Chat"]),
     # (doc_extractor_router, "/doc-extractor", ["Document Extractor"]),
+    (jobs_router, "/jobs", ["Jobs"]),
     (user_registration_router, "/user", ["User Registration"]),
 ]
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Union
+from typing import List, Optional, Union
 
 class DocAnalyserMetadata(BaseModel):
     summary: List[str] = Field(default_factory=list, description="Summary of the document")
@@ -10,4 +10,15 @@ class DocAnalyserMetadata(BaseModel):
     publisher: str = Field(..., description="Publisher of the document")
     language: str = Field(..., description="Language of the document")
     page_count: Union[int, str] = Field(..., description="Page count of the document")
-    sentiment_tone: str = Field(..., description="Sentiment tone of the document")
\ No newline at end of file
+    sentiment_tone: str = Field(..., description="Sentiment tone of the document")
+
+class DocAnalyserPartialMetadata(BaseModel):
+    """Metadata found in one excerpt of a document; fields the excerpt says nothing about stay null."""
+    summary: List[str] = Field(default_factory=list, description="Key points of this excerpt")
+    title: Optional[str] = Field(None, description="Title of the document, if the excerpt shows it")
+    author: Optional[str] = Field(None, description="Author of the document, if the excerpt shows it")
+    date_created: Optional[str] = Field(None, description="Creation date of the document, if the excerpt shows it")
+    last_modified_date: Optional[str] = Field(None, description="Last modified date of the document, if the excerpt shows it")
+    publisher: Optional[str] = Field(None, description="Publisher of the document, if the excerpt shows it")
+    language: Optional[str] = Field(None, description="Language of the excerpt")
+    sentiment_tone: Optional[str] = Field(None, description="Sentiment tone of the excerpt")
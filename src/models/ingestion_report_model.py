@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+
+class PageRangeReport(BaseModel):
+    start: int
+    end: int
+    profile: str
+
+class IngestionReport(BaseModel):
+    file_url: str = Field(description="Path or URL of the ingested file")
+    extractor: str = Field(description="Extractor that handled the file, e.g. 'docling', 'native', 'spreadsheet'")
+    profile: str = Field(description="Profile used for the file; PDFs list every profile they used joined by '+'")
+    page_ranges: list[PageRangeReport] = Field(default_factory=list, description="Profile chosen for each page range of a PDF")
+    page_count: int = Field(default=0, description="Number of pages (or chunks for non-paged formats)")
+    prescan_seconds: float = Field(default=0.0, description="Time spent in the PyMuPDF pre-scan")
+    conversion_seconds: float = Field(default=0.0, description="Time spent extracting the file")
+    assumed_full_pipeline_seconds_per_page: float = Field(default=0.0, description="Assumed, not measured, per-page cost of the full table, image and OCR pipeline")
+    assumed_full_pipeline_seconds: float = Field(default=0.0, description="Page count times the assumed per-page cost; a rough estimate, not a measurement")
+    assumed_time_saved_seconds: float = Field(default=0.0, description="Assumed full pipeline time minus the actual pre-scan and extraction time")
+    picture_description: dict[str, int] = Field(default_factory=dict, description="Pictures found, skipped, unique, served from cache and described through the API")
@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class ExtractedMemories(BaseModel):
+    facts: List[str] = Field(default_factory=list, description="Durable facts about the user, one short sentence each")
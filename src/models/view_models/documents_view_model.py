@@ -9,10 +9,28 @@ class CustomDocument(BaseModel):
     page_content: str
     type: str = "text"
 
+class DocumentChunkViewModel(CustomDocument):
+    # Stored one item per chunk in the "document-chunks" container, partitioned by /product_id
+    client_id: str
+    product_id: str
+
+    @staticmethod
+    def build_id(blob_name: str, etag: str | None, ordinal: int) -> str:
+        # Deterministic, so re-extracting the same blob version writes over the chunks of an interrupted run
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{blob_name}|{etag}|{ordinal}"))
+
+class BlobManifestEntry(BaseModel):
+    blob_name: str
+    etag: str | None = None
+    last_modified: str | None = None
+    chunk_ids: list[str] = Field(default_factory=list)
+
 class DocumentsViewModel(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     client_id: str
     product_id: str
-    chunked_documents: list[CustomDocument] = Field(default_factory=list[CustomDocument])
+    manifest: list[BlobManifestEntry] = Field(default_factory=list[BlobManifestEntry])
+    # Tokens of the indexed chunks, recorded when the vector store is built
+    corpus_tokens: int | None = None
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
-    modified_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
\ No newline at end of file
+    modified_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
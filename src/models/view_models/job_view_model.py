@@ -0,0 +1,30 @@
+import uuid
+
+from enum import Enum
+from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+# Jobs in these states never run again
+FINAL_JOB_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+class JobViewModel(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), description="Unique identifier for the job")
+    kind: str = Field(description="Kind of work, e.g. 'sync', 'vectorize'")
+    tenant_id: str = Field(description="Tenant the job belongs to; concurrency is limited per tenant")
+    payload: dict = Field(default_factory=dict, description="Arguments passed to the job handler")
+    status: JobStatus = Field(default=JobStatus.QUEUED, description="Current status of the job")
+    progress: dict = Field(default_factory=dict, description="Latest progress reported by the job handler")
+    result: dict | None = Field(default=None, description="Result of a succeeded job")
+    error: str | None = Field(default=None, description="Error of the last failed attempt")
+    attempts: int = Field(default=0, description="Number of attempts started so far")
+    max_attempts: int = Field(default=1, description="Attempts allowed before the job is marked as failed")
+    cancel_requested: bool = Field(default=False, description="Whether cancellation has been requested")
+    created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat(), description="Creation timestamp")
+    updated_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat(), description="Last updated timestamp")
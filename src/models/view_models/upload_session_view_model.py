@@ -0,0 +1,23 @@
+import uuid
+
+from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+
+class UploadSessionViewModel(BaseModel):
+    # Stored in the "upload-sessions" container, partitioned by /id
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), description="Unique identifier for the upload session")
+    client_id: str = Field(description="Client identifier")
+    product_id: str = Field(description="Product identifier")
+    filename: str = Field(description="Original file name")
+    content_type: str = Field(description="MIME type of the file")
+    blob_name: str = Field(description="Blob the chunks are staged on")
+    total_size: int = Field(description="Size of the whole file in bytes")
+    chunk_size: int = Field(description="Size of every chunk but the last one, in bytes")
+    total_chunks: int = Field(description="Number of chunks the file is split into")
+    status: str = Field(default="initiated", description="'initiated' or 'committed'")
+    content_hash: str | None = Field(default=None, description="SHA-256 over the SHA-256 of every chunk, set on commit")
+    file_url: str | None = Field(default=None, description="URL of the committed document")
+    deduplicated: bool = Field(default=False, description="Whether an identical committed upload was reused instead of this one")
+    expires_at: str = Field(description="Chunks can no longer be uploaded or committed after this time")
+    created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat(), description="Creation timestamp")
+    modified_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat(), description="Last updated timestamp")
@@ -0,0 +1,14 @@
+import uuid
+
+from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+
+class UserMemoryViewModel(BaseModel):
+    # Stored in the "user-memories" container, partitioned by /user_id
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), description="Unique identifier for the memory")
+    user_id: str = Field(description="User the memory belongs to")
+    text: str = Field(description="The remembered fact")
+    embedding: list[float] = Field(description="Embedding of the text, computed once when the memory is written")
+    source: str = Field(default="seed", description="Where the memory came from, e.g. 'seed'")
+    created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat(), description="Creation timestamp")
+    modified_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat(), description="Last updated timestamp")
@@ -1,53 +1,350 @@
-import aiohttp
+import re
+import json
 import uuid
+import asyncio
 import structlog
 import fitz # From PyMuPDF for PDF processing
 
 from fastapi import UploadFile, File
+from fastapi.responses import StreamingResponse
 from datetime import datetime
+from typing import AsyncIterator
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 from langchain.output_parsers import OutputFixingParser
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import Generation
 from langchain_core.output_parsers import JsonOutputParser
 from src.services.azure.blob import BlobService
 from src.services.llm.providers import LLMService
+from src.services.llm.parsing_stats import analyser_parsing_stats
 from src.services.prompts.prompting import *
-from src.models.doc_analyser_model import DocAnalyserMetadata
+from src.models.doc_analyser_model import DocAnalyserMetadata, DocAnalyserPartialMetadata
+from src.utils.get_configs import GetConfigs
+from src.utils.hash_cache import HashCache
+from src.utils.token_counter import count_tokens, split_by_tokens
+
+# Page separators written by _extract_text, kept at the start of every page when splitting
+PAGE_MARKER_PATTERN = r"(?=\n--- Page \d+ ---\n)"
 
 class DocAnalyserRepository:
     def __init__(self):
         self.azOpenA_llm = LLMService().getAzOpenAIllm()
         self.blob_service = BlobService()
         self.log = structlog.get_logger(self.__class__.__name__)
+        self.analyser_configs = GetConfigs().get_configs()['doc_analyser']
+        self.cache = HashCache("doc_analysis")
+        self.cache_version = self._get_cache_version()
+
+    def _get_cache_version(self) -> str:
+        """
+        Fingerprint of everything that shapes an analysis besides the document: the model, the analyser
+        modes, the prompts and the metadata schema. Changing any of them starts a fresh set of cache entries.
+        """
+        return HashCache.hash_text(json.dumps({
+            "llm": GetConfigs().get_configs()['chat_llm'],
+            "mode": self.analyser_configs['mode'],
+            "output_mode": self.analyser_configs['output_mode'],
+            "map_reduce": self.analyser_configs['map_reduce'],
+            "prompts": [prompt.pretty_repr() for prompt in (doc_analyse_prompt, doc_analyse_map_prompt, doc_analyse_reduce_prompt)],
+            "schema": DocAnalyserMetadata.model_json_schema(),
+        }, sort_keys=True, default=str))[:16]
+
+    def _cache_key(self, content_hash: str) -> str:
+        return f"{content_hash}:{self.cache_version}"
         
     async def analyse_document(self, data: UploadFile = File(...)) -> dict:
         """
-        Analyzes a document by uploading it to Azure Blob Storage, reading its content,
-        and extracting structured metadata using a language model.
+        Analyzes a document: its bytes are read once, uploaded to Azure Blob Storage in the background
+        while PyMuPDF extracts the text in a worker thread, and structured metadata is extracted from
+        the text using a language model. Results are cached by content hash.
         
         :param data: File-like object containing the document data.
         :return: Dictionary containing the extracted metadata.
         """
         self.log.info("Starting document analysis", filename=data.filename)
         
-        file_url = await self._upload_document(data)
-        
-        self.log.info("Document uploaded to Azure Blob Storage", file_url=file_url)
-        
-        file_text = await self._read_file(file_url)
-        
-        self.log.info("Extracted text from document", text_length=len(file_text))
-        
-        response = await self._analyze_document(file_text)
+        self._validate_document(data)
+
+        pdf_bytes = await data.read()
+
+        response, _ = await self._analyse_bytes(pdf_bytes)
         
         self.log.info("Document analysis completed")
         
         return response
 
-    async def _upload_document(self, data: UploadFile = File(...)) -> str:
+    async def analyse_document_stream(self, data: UploadFile = File(...)) -> StreamingResponse:
         """
-        Uploads a document to Azure Blob Storage.
+        Analyzes a document like analyse_document, but streams the result over SSE: a "field" event for every
+        metadata field as soon as the language model has completed it, then a "result" event with the
+        validated metadata, then [DONE]. Failures after the stream started are sent as an "error" event.
+
+        :param data: File-like object containing the document data.
+        :return: StreamingResponse of server-sent events.
+        """
+        self.log.info("Starting streamed document analysis", filename=data.filename)
+
+        self._validate_document(data)
+
+        # Read before responding: the uploaded file is closed once the endpoint returns
+        pdf_bytes = await data.read()
+
+        headers = {
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",  # prevents buffering on some proxies
+        }
+
+        return StreamingResponse(self._stream_analysis(pdf_bytes), media_type="text/event-stream", headers=headers)
+
+    async def _stream_analysis(self, pdf_bytes: bytes) -> AsyncIterator[str]:
+        # small heartbeat to keep certain proxies happy
+        yield ": ping\n\n"
+
+        try:
+            content_hash = HashCache.hash_bytes(pdf_bytes)
+
+            cached = self.cache.get(self._cache_key(content_hash))
+            if cached is not None:
+                self.log.info("Document analysis served from cache", content_hash=content_hash)
+                for name, value in cached.items():
+                    yield self._sse_event("field", {"name": name, "value": value})
+                yield self._sse_event("result", cached)
+                yield "data: [DONE]\n\n"
+                return
+
+            upload_task = asyncio.create_task(self._upload_document(pdf_bytes))
+
+            try:
+                file_text = await run_in_threadpool(self._extract_text, pdf_bytes)
+
+                self.log.info("Extracted text from document", text_length=len(file_text))
+
+                # In map-reduce mode the map step runs first and only the reduce call is streamed
+                prompt, inputs = await self._prepare_final_call(file_text)
+
+                parser = JsonOutputParser(pydantic_object=DocAnalyserMetadata)
+                chain = prompt | self._streaming_llm(DocAnalyserMetadata)
+
+                self.log.info("Streaming prompt chain for document analysis")
+
+                text = ""
+                emitted: set[str] = set()
+
+                async for chunk in chain.astream({"format_instructions": parser.get_format_instructions(), **inputs}):
+                    if not chunk.content:
+                        continue
+
+                    text += chunk.content
+                    partial = parser.parse_result([Generation(text=text)], partial=True)
+                    if not isinstance(partial, dict):
+                        continue
+
+                    # The model writes the keys in order, so every key but the last one is complete
+                    for name in list(partial)[:-1]:
+                        if name not in emitted:
+                            emitted.add(name)
+                            yield self._sse_event("field", {"name": name, "value": partial[name]})
+
+                self.log.info("Received response from language model")
+
+                response = await self._parse_response(AIMessage(content=text), parser, mode="stream")
+
+                try:
+                    response = DocAnalyserMetadata.model_validate(response).model_dump()
+                except ValidationError as e:
+                    raise ValueError(f"The analysis did not match the metadata schema: {e}")
+
+            finally:
+                uploaded = await self._await_upload(upload_task)
+
+            # Only archived documents are cached, so a cache hit never skips the upload of a file that isn't stored
+            if uploaded:
+                self.cache.set(self._cache_key(content_hash), response)
+
+            for name, value in response.items():
+                if name not in emitted:
+                    yield self._sse_event("field", {"name": name, "value": value})
+
+            yield self._sse_event("result", response)
+
+            self.log.info("Streamed document analysis completed")
+
+        except ValueError as ve:
+            self.log.error("Streamed document analysis failed", error=str(ve))
+            yield self._sse_event("error", {"detail": str(ve)})
+
+        except Exception as e:
+            self.log.error("Streamed document analysis failed", error=str(e))
+            yield self._sse_event("error", {"detail": "Unexpected error during document analysis."})
+
+        yield "data: [DONE]\n\n"
+
+    @staticmethod
+    def _sse_event(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def _streaming_llm(self, schema):
+        """
+        The language model for streamed analysis. In "structured" mode the response is constrained by the
+        JSON schema of the model, bound as a plain response format so its tokens still stream.
+        """
+        if self.analyser_configs['output_mode'] != "structured":
+            return self.azOpenA_llm
+
+        return self.azOpenA_llm.bind(response_format={
+            "type": "json_schema",
+            "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema()},
+        })
+
+    async def analyse_documents(self, files: list[UploadFile]) -> StreamingResponse:
+        """
+        Analyzes several documents concurrently, at most batch.max_concurrency at a time, and streams
+        one NDJSON line per file as soon as its analysis finishes, in completion order.
+        Files with identical content are analyzed once.
+
+        :param files: File-like objects containing the documents.
+        :return: StreamingResponse of NDJSON lines with the file index, filename, status, cached flag and result or error.
+        """
+        configs = self.analyser_configs['batch']
+
+        if not files:
+            raise ValueError("No files provided.")
+
+        if len(files) > configs['max_files']:
+            raise ValueError(f"At most {configs['max_files']} files can be analyzed in one batch.")
+
+        self.log.info("Starting batch document analysis", files=len(files))
+
+        # Uploaded files are closed once the endpoint returns, so every file is validated and read up front;
+        # an invalid file fails on its own line instead of failing the batch
+        documents = []
+        for index, data in enumerate(files):
+            try:
+                self._validate_document(data)
+                documents.append((index, data.filename, await data.read(), None))
+            except ValueError as ve:
+                documents.append((index, data.filename, None, str(ve)))
+
+        headers = {
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable buffering in nginx
+        }
+
+        return StreamingResponse(self._stream_batch_results(documents), media_type="application/x-ndjson", headers=headers)
+
+    async def _stream_batch_results(self, documents: list[tuple]) -> AsyncIterator[str]:
+        semaphore = asyncio.Semaphore(self.analyser_configs['batch']['max_concurrency'])
+
+        async def analyse_one(content_hash: str, pdf_bytes: bytes) -> tuple[str, dict | None, bool, str | None]:
+            async with semaphore:
+                try:
+                    response, cached = await self._analyse_bytes(pdf_bytes, content_hash)
+                    return content_hash, response, cached, None
+                except ValueError as ve:
+                    return content_hash, None, False, str(ve)
+                except Exception as e:
+                    self.log.error("Document analysis failed", error=str(e))
+                    return content_hash, None, False, "Unexpected error during document analysis."
+
+        files_by_hash: dict[str, list[tuple[int, str]]] = {}
+        pdf_bytes_by_hash: dict[str, bytes] = {}
+
+        for index, filename, pdf_bytes, error in documents:
+            if error:
+                yield self._batch_line(index, filename, error=error)
+                continue
+
+            content_hash = HashCache.hash_bytes(pdf_bytes)
+            files_by_hash.setdefault(content_hash, []).append((index, filename))
+            pdf_bytes_by_hash[content_hash] = pdf_bytes
+
+        tasks = [asyncio.create_task(analyse_one(content_hash, pdf_bytes)) for content_hash, pdf_bytes in pdf_bytes_by_hash.items()]
+
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                content_hash, response, cached, error = await next_result
+
+                for index, filename in files_by_hash[content_hash]:
+                    yield self._batch_line(index, filename, response, cached, error)
+
+            self.log.info("Batch document analysis completed", files=len(documents))
+        finally:
+            # The client went away: stop the analyses still running
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def _batch_line(index: int, filename: str, response: dict | None = None, cached: bool = False, error: str | None = None) -> str:
+        line = {"index": index, "filename": filename, "status": "failed" if error else "completed", "cached": cached}
+
+        if error:
+            line["error"] = error
+        else:
+            line["result"] = response
+
+        return json.dumps(line, ensure_ascii=False) + "\n"
+
+    async def _analyse_bytes(self, pdf_bytes: bytes, content_hash: str | None = None) -> tuple[dict, bool]:
+        """
+        Analyzes a document held in memory, unless a document with the same content was analyzed before.
+
+        :param pdf_bytes: Content of the document.
+        :param content_hash: SHA-256 of the content, when the caller has computed it already.
+        :return: The extracted metadata and whether it came from the cache.
+        """
+        content_hash = content_hash or HashCache.hash_bytes(pdf_bytes)
+
+        cached = self.cache.get(self._cache_key(content_hash))
+        if cached is not None:
+            # The identical file was archived when it was first analyzed; only archived documents are cached
+            self.log.info("Document analysis served from cache", content_hash=content_hash)
+            return cached, True
+
+        # The upload only archives the file; analysis works on the bytes already in memory
+        upload_task = asyncio.create_task(self._upload_document(pdf_bytes))
+
+        try:
+            file_text = await run_in_threadpool(self._extract_text, pdf_bytes)
+
+            self.log.info("Extracted text from document", text_length=len(file_text))
+
+            response = await self._analyze_document(file_text)
+        finally:
+            uploaded = await self._await_upload(upload_task)
+
+        if uploaded:
+            self.cache.set(self._cache_key(content_hash), response)
+
+        return response, False
+
+    def get_parsing_stats(self) -> dict:
+        """
+        Returns how often analyser responses validated on the first try and how often the fixing parser
+        had to make another LLM call, since the process started.
+        """
+        return {
+            "output_mode": self.analyser_configs['output_mode'],
+            "parsing": analyser_parsing_stats.snapshot(),
+        }
+
+    async def _await_upload(self, upload_task: asyncio.Task) -> bool:
+        # A failed upload is logged but doesn't fail an analysis that has already succeeded; returns whether it succeeded
+        try:
+            file_url = await upload_task
+            self.log.info("Document uploaded to Azure Blob Storage", file_url=file_url)
+            return True
+        except Exception as e:
+            self.log.error("Document upload failed", error=str(e))
+            return False
+
+    def _validate_document(self, data: UploadFile) -> None:
+        """
+        Validates the uploaded document before it is read.
         
         :param data: File-like object containing the document data.
-        :return: URL of the uploaded document.
         """
         self.log.info("Validating uploaded file", filename=data.filename)
         
@@ -65,7 +362,14 @@ class DocAnalyserRepository:
         if data.size > 2 * 1024 * 1024:  # 2 MB limit
             self.log.error("File size exceeds limit", size=data.size)
             raise ValueError("File size exceeds the 2 MB limit.")
+
+    async def _upload_document(self, pdf_bytes: bytes) -> str:
+        """
+        Uploads a document to Azure Blob Storage.
         
+        :param pdf_bytes: Content of the document.
+        :return: URL of the uploaded document.
+        """
         client_id = "a5f4ca5e-36f6-4eb3-93fe-517b16f66f4d" #Todo: Replace with actual client ID
         product_id = "a88cffc2-3f4d-4351-81b8-39ea3317a731" #Todo: Replace with actual product ID
         version = datetime.now().strftime("%d%m%Y%H%M%S")
@@ -76,33 +380,24 @@ class DocAnalyserRepository:
         
         self.log.info("Uploading file to Azure Blob Storage", container="document-analysis", blob_path=blob_path)
         
-        file_url = self.blob_service.upload_stream("document-analysis", blob_path, data.file, content_type)
+        file_url = await self.blob_service.upload_stream("document-analysis", blob_path, pdf_bytes, content_type)
         
         self.log.info("File uploaded successfully", file_url=file_url)
         
         return file_url
 
-    async def _read_file(self, file_url: str) -> str:
+    def _extract_text(self, pdf_bytes: bytes) -> str:
         """
-        Asynchronously reads a PDF file from the given URL and extracts its text content.
+        Extracts the text content of a PDF held in memory. CPU-bound; run it off the event loop.
         Args:
-            file_url (str): The URL of the PDF file to read.
+            pdf_bytes (bytes): The content of the PDF file.
         Returns:
             str: The extracted text from the PDF, with each page separated and labeled.
-        Raises:
-            RuntimeError: If the file cannot be read or processed.
         """
-        self.log.info("Starting to read PDF file from URL")
+        self.log.info("Starting to read PDF file", file_size=len(pdf_bytes))
 
         text_chunks = []
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(file_url) as response:
-                response.raise_for_status()
-                pdf_bytes = await response.read()
-
-        self.log.info("PDF file downloaded successfully", file_size=len(pdf_bytes))
-
         with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
             for page_num, page in enumerate(doc, start=1):
                 page_text = page.get_text()
@@ -114,37 +409,159 @@ class DocAnalyserRepository:
 
         return text
 
-    async def _analyze_document(self, doc_text: str) -> dict:
+    def _build_chain(self, prompt, schema):
+        """
+        Builds the prompt chain for the configured output mode, and the JsonOutputParser whose format instructions
+        go into the prompt. In "structured" mode the deployment's JSON-schema structured output, generated from the
+        schema, constrains the response; the raw message is kept for the fallback to the fixing parser.
+        """
+        # Use JsonOutputParser to get well-structured JSON responses from a language model
+        parser = JsonOutputParser(pydantic_object=schema)
+
+        if self.analyser_configs['output_mode'] == "structured":
+            llm = self.azOpenA_llm.with_structured_output(schema, method="json_schema", include_raw=True)
+        else:
+            llm = self.azOpenA_llm
+
+        # Create a prompt chain that combines the chat prompt template with the language model
+        return prompt | llm, parser
+
+    async def _parse_response(self, response, parser: JsonOutputParser, mode: str | None = None) -> dict:
+        """
+        Turns the chain response into a dict. Responses that don't validate on the first try go through the
+        OutputFixingParser, which costs another LLM call; both outcomes are counted in analyser_parsing_stats.
+        The mode defaults to the configured output mode; other modes are counted separately and parse a plain message.
+        """
+        mode = mode or self.analyser_configs['output_mode']
+
+        if mode == "structured":
+            if response["parsed"] is not None:
+                analyser_parsing_stats.record(mode, "parsed")
+                return response["parsed"].model_dump()
+
+            message = response["raw"]
+            self.log.warning("Structured output did not validate, falling back to the fixing parser", error=str(response["parsing_error"]))
+        else:
+            message = response
+            try:
+                result = parser.parse(message.content)
+                analyser_parsing_stats.record(mode, "parsed")
+                return result
+            except OutputParserException as e:
+                self.log.warning("Response is not valid JSON, falling back to the fixing parser", error=str(e))
+
+        # Use OutputFixingParser to automatically fix and get responses that have small formatting errors, making your data extraction more reliable and error-proof
+        fixing_parser = OutputFixingParser.from_llm(llm=self.azOpenA_llm, parser=parser)
+
+        try:
+            result = await fixing_parser.aparse(message.content or "")
+        except OutputParserException:
+            analyser_parsing_stats.record(mode, "failed")
+            raise
+
+        analyser_parsing_stats.record(mode, "fallback")
+        return result
+
+    @staticmethod
+    def _split_into_excerpts(doc_text: str, max_tokens: int) -> list[str]:
+        """
+        Groups consecutive pages into excerpts of at most max_tokens tokens; pages larger than that are split on their own.
+        """
+        excerpts: list[str] = []
+        current: list[str] = []
+        current_tokens = 0
+
+        for page in re.split(PAGE_MARKER_PATTERN, doc_text):
+            page_tokens = count_tokens(page)
+            if not page_tokens:
+                continue
+
+            if current and current_tokens + page_tokens > max_tokens:
+                excerpts.append("".join(current))
+                current, current_tokens = [], 0
+
+            if page_tokens > max_tokens:
+                excerpts.extend(split_by_tokens(page, max_tokens))
+                continue
+
+            current.append(page)
+            current_tokens += page_tokens
+
+        if current:
+            excerpts.append("".join(current))
+
+        return excerpts
+
+    async def _analyze_document(self, doc_text: str, mode: str | None = None) -> dict:
         """
-        Asynchronously analyzes the given document text using a language model and returns structured metadata.
-        This method utilizes a JsonOutputParser to extract well-structured JSON responses from the language model,
-        and an OutputFixingParser to automatically correct minor formatting errors in the output. The analysis is
-        performed by invoking a prompt chain with the provided document text.
+        Analyzes the given document text using a language model and returns structured metadata.
+        Documents that fit the single-call token budget are analyzed in one call; larger ones in map-reduce mode.
         Args:
             doc_text (str): The text content of the document to be analyzed.
+            mode (str | None): "single", "map_reduce" or "auto"; defaults to the configured mode.
         Returns:
             dict: A dictionary containing the extracted metadata from the document.
         """
-        self.log.info("Initializing output parsers for document analysis")
-        
-        # Use JsonOutputParser to get well-structured JSON responses from a language model
-        parser = JsonOutputParser(pydantic_object=DocAnalyserMetadata)
-        # Use OutputFixingParser to automatically fix and get responses that have small formatting errors, making your data extraction more reliable and error-proof
-        fixing_parser = OutputFixingParser.from_llm(llm=self.azOpenA_llm, parser=parser)
+        prompt, inputs = await self._prepare_final_call(doc_text, mode)
 
-        self.log.info("Creating prompt chain for document analysis")
-        
-        # Create a prompt chain that combines the chat prompt template with the language model and output parser
         # The prompt chain will analyze the document text and return structured metadata in JSON format
-        chain = doc_analyse_prompt | self.azOpenA_llm | fixing_parser
-        
+        chain, parser = self._build_chain(prompt, DocAnalyserMetadata)
+
         self.log.info("Invoking prompt chain for document analysis")
-        
-        response = await chain.ainvoke({
-            "format_instructions": parser.get_format_instructions(),
-            "document_text": doc_text
-        })
-        
+
+        response = await chain.ainvoke({"format_instructions": parser.get_format_instructions(), **inputs})
+
         self.log.info("Received response from language model")
-        
-        return response
+
+        return await self._parse_response(response, parser)
+
+    async def _prepare_final_call(self, doc_text: str, mode: str | None = None) -> tuple:
+        """
+        Picks the analysis mode and returns the prompt and inputs of the call that produces the final metadata:
+        the whole text in single mode, or, in map-reduce mode, the partial results of the map step to merge.
+        """
+        mode = mode or self.analyser_configs['mode']
+        doc_tokens = count_tokens(doc_text)
+
+        if mode == "map_reduce" or (mode == "auto" and doc_tokens > self.analyser_configs['map_reduce']['max_single_call_tokens']):
+            partial_results = await self._map_excerpts(doc_text, doc_tokens)
+
+            return doc_analyse_reduce_prompt, {
+                "page_count": len(re.findall(PAGE_MARKER_PATTERN, doc_text)) or "unknown",
+                "partial_results": json.dumps(partial_results, ensure_ascii=False, indent=1)
+            }
+
+        self.log.info("Creating prompt chain for document analysis", mode="single", doc_tokens=doc_tokens)
+
+        return doc_analyse_prompt, {"document_text": doc_text}
+
+    async def _map_excerpts(self, doc_text: str, doc_tokens: int) -> list[dict]:
+        """
+        Splits the document into excerpts by token budget and extracts partial metadata from every excerpt
+        concurrently; the reduce call then merges them into the metadata of the whole document.
+        """
+        configs = self.analyser_configs['map_reduce']
+        excerpts = self._split_into_excerpts(doc_text, configs['excerpt_tokens'])
+
+        self.log.info("Creating prompt chains for document analysis", mode="map_reduce", doc_tokens=doc_tokens, excerpts=len(excerpts))
+
+        map_chain, map_parser = self._build_chain(doc_analyse_map_prompt, DocAnalyserPartialMetadata)
+
+        responses = await map_chain.abatch(
+            [
+                {
+                    "format_instructions": map_parser.get_format_instructions(),
+                    "part": part,
+                    "total_parts": len(excerpts),
+                    "document_text": excerpt
+                }
+                for part, excerpt in enumerate(excerpts, start=1)
+            ],
+            config={"max_concurrency": configs['max_concurrency']}
+        )
+
+        partial_results = await asyncio.gather(*(self._parse_response(response, map_parser) for response in responses))
+
+        self.log.info("Received partial results from language model", excerpts=len(partial_results))
+
+        return partial_results
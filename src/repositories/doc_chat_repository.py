@@ -1,8 +1,11 @@
 import os
 import uuid
+import base64
+import hashlib
 import structlog
 
-from typing import AsyncIterator
+from typing import AsyncIterator, Callable
+from datetime import datetime, timedelta, timezone
 from fastapi import UploadFile, File
 from fastapi.responses import StreamingResponse
 from langchain.schema import Document
@@ -12,15 +15,23 @@ from langchain.schema import AIMessage, HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from src.services.azure.blob import BlobService
 from src.services.llm.providers import LLMService
+from src.services.llm.embedding_context import EmbeddingContext
 from src.services.vectorstores.faiss_store import FaissService
+from src.services.vectorstores.context_builder import ContextBuilder, get_tiny_corpus_max_tokens
+from src.services.ingestion.streaming_pipeline import StreamingIngestionPipeline
 from src.services.azure.cosmos import CosmosService
 from src.models.requests import ChatRequest
 from src.models.view_models.documents_view_model import DocumentsViewModel
 from src.models.view_models.chat_history_view_model import ChatHistoryViewModel
+from src.models.view_models.upload_session_view_model import UploadSessionViewModel
 from src.services.prompts.prompting import contextualize_question_prompt, context_qa_prompt
 from src.services.evaluate.deepeval_evaluate import DeepevalEvaluate
 from src.services.memory.user_memory import UserMemory
+from src.services.memory.memory_extractor import memory_extraction_worker
 from src.core.app_settings import get_settings
+from src.utils.get_configs import GetConfigs
+from src.utils.token_counter import count_tokens
+from src.utils.document_types import ALLOWED_CONTENT_TYPES, ALLOWED_TYPES_MESSAGE, get_extension, matches_signature, validate_document_type
 from src.services.evaluate.azure_cs.content_safety_evaluate import is_content_safe
 
 class DocChatRepository:
@@ -35,6 +46,8 @@ class DocChatRepository:
         self.isPromptLoggingEnabled = os.getenv("IS_PROMPT_LOGGING_ENABLED", "false").lower() == "true"
         self.isDeepevalEnabled = os.getenv("IS_DEEPEVAL_ENABLED", "false").lower() == "true"
         self.deepeval = DeepevalEvaluate()
+        self.upload_configs = GetConfigs().get_configs()['uploads']
+        self.chat_context_configs = GetConfigs().get_configs()['chat_context']
     
     async def upload_document(self, client_id: str, product_id: str, data: UploadFile = File(...)) -> str:
         """
@@ -58,28 +71,18 @@ class DocChatRepository:
             raise ValueError("File is empty or not provided.")
         
         # Validate the file type
-        allowed_types = [
-            "application/pdf",  # .pdf
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",  # .docx
-            "application/vnd.openxmlformats-officedocument.presentationml.presentation",  # .pptx
-            "text/markdown",  # .md
-            "text/plain",  # .txt
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",  # .xlsx
-            "text/csv",  # .csv
-        ]
-        
-        if data.content_type not in allowed_types:
+        if data.content_type not in ALLOWED_CONTENT_TYPES:
             self.log.error("Invalid file type", content_type=data.content_type)
-            raise ValueError("Only files of type PDF, DOCX, PPTX, MD, TXT, XLSX, or CSV are allowed.")
+            raise ValueError(ALLOWED_TYPES_MESSAGE)
         
-        # Validate the file size (limit to 5 MB)
-        if data.size > 5 * 1024 * 1024:  # 5 MB limit
+        # Validate the file size; larger files are uploaded straight to storage, see create_upload_url
+        max_size_mb = self.upload_configs['max_size_mb']
+        if data.size > max_size_mb * 1024 * 1024:
             self.log.error("File size exceeds limit", size=data.size)
-            raise ValueError("File size exceeds the 5 MB limit.")
+            raise ValueError(f"File size exceeds the {max_size_mb} MB limit.")
         
         # Get the file extension from the uploaded file's filename
-        _, ext = os.path.splitext(data.filename)
-        ext = ext.lower() if ext else ""
+        ext = get_extension(data.filename)
         blob_name = f"{uuid.uuid4()}{ext}"
         # Use the uploaded file's content type
         content_type = data.content_type
@@ -88,13 +91,347 @@ class DocChatRepository:
         
         self.log.info("Uploading file to Azure Blob Storage", container="document-chat", blob_path=blob_path)
 
-        file_url = self.blob_service.upload_stream("document-chat", blob_path, data.file, content_type)
+        file_url = await self.blob_service.upload_stream("document-chat", blob_path, data.file, content_type)
         
         self.log.info("File uploaded successfully", file_url=file_url)
         
         return file_url
 
-    async def vectorize_document(self, client_id: str, product_id: str) -> None:
+    async def create_upload_url(self, client_id: str, product_id: str, filename: str, content_type: str) -> dict:
+        """
+        Issues a short-lived, write-only SAS URL for uploading a document straight to Azure Blob Storage,
+        so the bytes never pass through the API. Call complete_upload once the upload has finished.
+
+        :param client_id: Client ID for the document.
+        :param product_id: Product ID for the document.
+        :param filename: Name of the file to upload; its extension must match the content type.
+        :param content_type: MIME type of the file; it must be sent as the Content-Type of the upload.
+        :return: The upload URL, the blob name to complete, the expiry time and the headers the upload must carry.
+        """
+        # Throw error if client_id or product_id is not provided
+        if not client_id or not product_id:
+            self.log.error("Client ID or Product ID is not provided")
+            raise ValueError("Client ID and Product ID must be provided.")
+
+        try:
+            ext = validate_document_type(filename, content_type)
+        except ValueError:
+            self.log.error("Invalid file type", filename=filename, content_type=content_type)
+            raise
+
+        # Outside the product folder, so the document is neither synced nor ingested before complete_upload accepts it
+        blob_path = f"{self.upload_configs['direct']['staging_folder']}/{client_id}/{product_id}/{uuid.uuid4()}{ext}"
+
+        upload_url, expires_on = self.blob_service.generate_upload_sas_url(
+            "document-chat", blob_path, self.upload_configs['direct']['sas_expiry_minutes']
+        )
+
+        self.log.info("Upload URL issued", blob_path=blob_path, expires_on=expires_on.isoformat())
+
+        return {
+            "upload_url": upload_url,
+            "blob_name": blob_path,
+            "expires_on": expires_on.isoformat(),
+            "max_size_bytes": self.upload_configs['direct']['max_size_mb'] * 1024 * 1024,
+            "headers": {"x-ms-blob-type": "BlockBlob", "Content-Type": content_type},
+        }
+
+    async def complete_upload(self, client_id: str, product_id: str, blob_name: str) -> dict:
+        """
+        Validates a document uploaded through a SAS URL. The stored content type must match the extension,
+        the size must be within the limit and binary formats must start with their file signature.
+        Accepted uploads are copied from the staging folder into the product folder, pinned to the validated
+        version, so the SAS URL cannot change them afterwards; the staged blob is deleted either way.
+
+        :param client_id: Client ID for the document.
+        :param product_id: Product ID for the document.
+        :param blob_name: Blob name returned by create_upload_url.
+        :return: URL, size and content type of the accepted document.
+        """
+        # Throw error if client_id or product_id is not provided
+        if not client_id or not product_id:
+            self.log.error("Client ID or Product ID is not provided")
+            raise ValueError("Client ID and Product ID must be provided.")
+
+        # Only blobs of the caller's own staging folder can be completed
+        prefix = f"{self.upload_configs['direct']['staging_folder']}/{client_id}/{product_id}/"
+        if not blob_name or not blob_name.startswith(prefix) or "/" in blob_name[len(prefix):]:
+            self.log.error("Blob is outside the product folder", blob_name=blob_name)
+            raise ValueError("The blob does not belong to this client and product.")
+
+        properties = await self.blob_service.get_blob_properties("document-chat", blob_name)
+
+        if properties is None:
+            self.log.error("Uploaded blob not found", blob_name=blob_name)
+            raise ValueError("No upload found for this blob; upload the file before completing it.")
+
+        ext = get_extension(blob_name)
+        max_size_mb = self.upload_configs['direct']['max_size_mb']
+        error = None
+
+        try:
+            validate_document_type(blob_name, properties["content_type"])
+        except ValueError as e:
+            error = str(e)
+
+        if error is None and not 0 < properties["size"] <= max_size_mb * 1024 * 1024:
+            error = f"File size must be between 1 byte and {max_size_mb} MB."
+
+        if error is None and not matches_signature(ext, await self.blob_service.read_blob_head("document-chat", blob_name, 8)):
+            error = "The file content does not match its type."
+
+        if error:
+            self.log.error("Uploaded blob rejected", blob_name=blob_name, error=error, content_type=properties["content_type"], size=properties["size"])
+            await self.blob_service.delete_blob("document-chat", blob_name)
+            raise ValueError(error)
+
+        blob_path = f"{client_id}/{product_id}/{blob_name[len(prefix):]}"
+
+        try:
+            file_url = await self.blob_service.copy_blob("document-chat", blob_name, blob_path, source_etag=properties["etag"])
+        finally:
+            await self.blob_service.delete_blob("document-chat", blob_name)
+
+        self.log.info("Upload completed", blob_name=blob_path, size=properties["size"])
+
+        return {"file_url": file_url, "size": properties["size"], "content_type": properties["content_type"]}
+
+    @staticmethod
+    def _encode_block_id(index: int, chunk_hash: bytes) -> str:
+        # The block ID carries the chunk index and its SHA-256, so the staged blocks alone tell which chunks
+        # arrived and the content hash needs no second read. 6 + 32 bytes stays under Azure's 64-byte limit.
+        return base64.b64encode(f"{index:06d}".encode("ascii") + chunk_hash).decode("ascii")
+
+    @staticmethod
+    def _decode_block_id(block_id: str) -> tuple[int, bytes]:
+        raw = base64.b64decode(block_id)
+        return int(raw[:6].decode("ascii")), raw[6:]
+
+    async def _get_upload_session(self, upload_id: str) -> UploadSessionViewModel:
+        # Sessions are partitioned by their own ID, so every chunk request costs a single point read
+        session = await self.cosmos_service.read_item_async("upload-sessions", upload_id, partition_key=upload_id)
+
+        if session is None:
+            self.log.error("Upload session not found", upload_id=upload_id)
+            raise ValueError("Upload session not found.")
+
+        return UploadSessionViewModel(**session)
+
+    def _ensure_session_open(self, session: UploadSessionViewModel) -> None:
+        if session.status != "initiated":
+            raise ValueError("The upload has already been committed.")
+
+        if datetime.fromisoformat(session.expires_at) < datetime.now(timezone.utc):
+            raise ValueError("The upload session has expired; initiate a new upload.")
+
+    async def _get_received_chunks(self, session: UploadSessionViewModel) -> dict[int, list[str]]:
+        block_ids = await self.blob_service.get_uncommitted_block_ids("document-chat", session.blob_name)
+
+        received: dict[int, list[str]] = {}
+        for block_id in block_ids:
+            index, _ = self._decode_block_id(block_id)
+            received.setdefault(index, []).append(block_id)
+
+        return received
+
+    async def initiate_upload(self, client_id: str, product_id: str, filename: str, content_type: str, total_size: int) -> dict:
+        """
+        Starts a resumable upload. The file is sent as numbered chunks of the returned chunk size, each staged
+        as a block of the final blob, in any order and as many times as needed, then committed.
+
+        :param client_id: Client ID for the document.
+        :param product_id: Product ID for the document.
+        :param filename: Name of the file; its extension must match the content type.
+        :param content_type: MIME type of the file.
+        :param total_size: Size of the whole file in bytes.
+        :return: The upload session: its ID, chunk size, chunk count and expiry time.
+        """
+        # Throw error if client_id or product_id is not provided
+        if not client_id or not product_id:
+            self.log.error("Client ID or Product ID is not provided")
+            raise ValueError("Client ID and Product ID must be provided.")
+
+        try:
+            ext = validate_document_type(filename, content_type)
+        except ValueError:
+            self.log.error("Invalid file type", filename=filename, content_type=content_type)
+            raise
+
+        configs = self.upload_configs['resumable']
+        max_size_mb = configs['max_size_mb']
+
+        if not 0 < total_size <= max_size_mb * 1024 * 1024:
+            self.log.error("File size exceeds limit", size=total_size)
+            raise ValueError(f"File size must be between 1 byte and {max_size_mb} MB.")
+
+        chunk_size = configs['chunk_size_mb'] * 1024 * 1024
+
+        session = UploadSessionViewModel(
+            client_id=client_id,
+            product_id=product_id,
+            filename=filename,
+            content_type=content_type,
+            blob_name=f"{client_id}/{product_id}/{uuid.uuid4()}{ext}",
+            total_size=total_size,
+            chunk_size=chunk_size,
+            total_chunks=-(-total_size // chunk_size),
+            expires_at=(datetime.now(timezone.utc) + timedelta(hours=configs['session_expiry_hours'])).isoformat(),
+        )
+
+        await self.cosmos_service.create_item_async("upload-sessions", session.model_dump())
+
+        self.log.info("Upload session initiated", upload_id=session.id, total_size=total_size, total_chunks=session.total_chunks)
+
+        return {
+            "upload_id": session.id,
+            "chunk_size": session.chunk_size,
+            "total_chunks": session.total_chunks,
+            "expires_at": session.expires_at,
+        }
+
+    async def upload_chunk(self, upload_id: str, index: int, chunks: AsyncIterator[bytes], expected_sha256: str | None = None) -> dict:
+        """
+        Stages one chunk of a resumable upload. Re-sending a chunk with the same bytes is harmless.
+
+        :param upload_id: ID of the upload session.
+        :param index: Zero-based chunk number.
+        :param chunks: The request body stream.
+        :param expected_sha256: Optional hex SHA-256 of the chunk, checked before it is staged.
+        :return: The chunk index and its SHA-256.
+        """
+        session = await self._get_upload_session(upload_id)
+        self._ensure_session_open(session)
+
+        if not 0 <= index < session.total_chunks:
+            raise ValueError(f"Chunk index must be between 0 and {session.total_chunks - 1}.")
+
+        expected_size = session.chunk_size if index < session.total_chunks - 1 else session.total_size - session.chunk_size * index
+
+        # Read at most one byte more than expected, so an oversized body is rejected without buffering it
+        data = bytearray()
+        async for part in chunks:
+            data.extend(part)
+            if len(data) > expected_size:
+                break
+
+        if len(data) != expected_size:
+            self.log.error("Invalid chunk size", upload_id=upload_id, index=index, size=len(data), expected_size=expected_size)
+            raise ValueError(f"Chunk {index} must be exactly {expected_size} bytes.")
+
+        # The first bytes are at hand here, so the file signature is checked without reading the blob back
+        if index == 0 and not matches_signature(get_extension(session.blob_name), bytes(data[:8])):
+            self.log.error("Chunk content does not match the file type", upload_id=upload_id)
+            raise ValueError("The file content does not match its type.")
+
+        chunk_hash = hashlib.sha256(data).digest()
+
+        if expected_sha256 and expected_sha256.lower() != chunk_hash.hex():
+            self.log.error("Chunk checksum mismatch", upload_id=upload_id, index=index)
+            raise ValueError(f"Chunk {index} does not match its SHA-256; send it again.")
+
+        await self.blob_service.stage_block("document-chat", session.blob_name, self._encode_block_id(index, chunk_hash), bytes(data))
+
+        self.log.info("Chunk staged", upload_id=upload_id, index=index, size=len(data))
+
+        return {"index": index, "sha256": chunk_hash.hex()}
+
+    async def get_upload_status(self, upload_id: str) -> dict:
+        """
+        Reports which chunks of a resumable upload have arrived, so an interrupted client only resends the rest.
+
+        :param upload_id: ID of the upload session.
+        :return: The session status with the received and missing chunk indexes.
+        """
+        session = await self._get_upload_session(upload_id)
+
+        if session.status == "committed":
+            received = list(range(session.total_chunks))
+        else:
+            received = sorted(await self._get_received_chunks(session))
+
+        return {
+            "upload_id": session.id,
+            "status": session.status,
+            "total_chunks": session.total_chunks,
+            "received_chunks": received,
+            "missing_chunks": sorted(set(range(session.total_chunks)) - set(received)),
+            "file_url": session.file_url,
+            "expires_at": session.expires_at,
+        }
+
+    async def commit_upload(self, upload_id: str) -> dict:
+        """
+        Assembles the staged chunks into the document. When the product already holds a committed upload
+        with the same content hash, that document is returned instead and nothing new is stored.
+
+        :param upload_id: ID of the upload session.
+        :return: URL of the document, its content hash and whether it was deduplicated.
+        """
+        session = await self._get_upload_session(upload_id)
+        self._ensure_session_open(session)
+
+        received = await self._get_received_chunks(session)
+        missing = sorted(set(range(session.total_chunks)) - set(received))
+
+        if missing:
+            self.log.error("Upload incomplete", upload_id=upload_id, missing=len(missing))
+            raise ValueError(f"Chunks {missing[:20]} have not been uploaded yet.")
+
+        conflicting = [index for index, block_ids in received.items() if len(block_ids) > 1]
+        if conflicting:
+            self.log.error("Chunks uploaded with different contents", upload_id=upload_id, chunks=conflicting)
+            raise ValueError(f"Chunks {conflicting[:20]} were uploaded with different contents; initiate a new upload.")
+
+        block_ids = [received[index][0] for index in range(session.total_chunks)]
+
+        # Hash of the chunk hashes, in order; identical files split with the same chunk size hash the same
+        content_hash = hashlib.sha256(b"".join(self._decode_block_id(block_id)[1] for block_id in block_ids)).hexdigest()
+
+        duplicates = list(
+            await self.cosmos_service.query_items_async(
+                "upload-sessions",
+                "SELECT * FROM c WHERE c.client_id = @client_id AND c.product_id = @product_id AND c.content_hash = @content_hash AND c.status = 'committed' AND c.deduplicated = false",
+                [
+                    {"name": "@client_id", "value": session.client_id},
+                    {"name": "@product_id", "value": session.product_id},
+                    {"name": "@content_hash", "value": content_hash}
+                ]
+            )
+        )
+        original = None
+        for duplicate in duplicates:
+            # Only reuse documents that are still in storage
+            if await self.blob_service.get_blob_properties("document-chat", duplicate["blob_name"]) is not None:
+                original = UploadSessionViewModel(**duplicate)
+                break
+
+        if original:
+            # The staged blocks are never committed; Azure discards uncommitted blocks after a week
+            session.file_url, session.deduplicated = original.file_url, True
+            self.log.info("Identical document already uploaded", upload_id=upload_id, original_upload_id=original.id)
+        else:
+            session.file_url = await self.blob_service.commit_block_list("document-chat", session.blob_name, block_ids, session.content_type)
+            self.log.info("Upload committed", upload_id=upload_id, blob_name=session.blob_name)
+
+        session.status = "committed"
+        session.content_hash = content_hash
+        session.modified_at = datetime.now(timezone.utc).isoformat()
+
+        await self.cosmos_service.update_item_async("upload-sessions", session.model_dump())
+
+        return {"upload_id": session.id, "file_url": session.file_url, "content_hash": content_hash, "deduplicated": session.deduplicated}
+
+    async def vectorize_document(self, client_id: str, product_id: str, progress: Callable[[dict], None] | None = None) -> dict:
+        """
+        Builds or updates the FAISS vector store of a product from its chunk items.
+        Chunks are streamed from Cosmos DB page by page, near-duplicates are collapsed
+        before embedding, and only the delta against the saved index is embedded.
+
+        :param client_id: Client ID for the documents.
+        :param product_id: Product ID for the documents.
+        :param progress: Optional callback receiving per-stage progress updates.
+        :return: Near-duplicate statistics for the product.
+        """
         # Validate input
         if not client_id or not product_id:
             self.log.error("Client ID or Product ID is not provided")
@@ -116,15 +453,26 @@ class DocChatRepository:
             self.log.error("Multiple document records found which should not happen.", client_id=client_id, product_id=product_id)
             raise ValueError("Multiple document records found which should not happen.")
         
+        if not documents:
+            self.log.error("No document record found", client_id=client_id, product_id=product_id)
+            raise LookupError("No document record found for the client and product.")
+
         self.log.info("Vectorizing documents", client_id=client_id, product_id=product_id)
 
-        faiss_service = FaissService()
-        faiss_service.create_vector_store(
-            client_id, product_id, 
-            documents=[Document(page_content=doc["page_content"], metadata=doc["metadata"]) for doc in documents[0]["chunked_documents"]]
-        )
+        # Chunks are streamed from Cosmos straight into the embed and index stages
+        result = await StreamingIngestionPipeline(client_id, product_id, progress=progress).run(files=[])
 
-        self.log.info("Vector store created successfully", client_id=client_id, product_id=product_id)
+        self.log.info("Vector store saved successfully", client_id=client_id, product_id=product_id, stages=result["stages"])
+
+        # Chat skips retrieval for products whose whole corpus fits in the prompt
+        document = documents[0]
+        document["corpus_tokens"] = result["corpus_tokens"]
+        document["modified_at"] = datetime.now(timezone.utc).isoformat()
+        await self.cosmos_service.update_item_async("documents", document)
+
+        self.log.info("Corpus token count recorded", client_id=client_id, product_id=product_id, corpus_tokens=result["corpus_tokens"])
+
+        return result["near_duplicates"]
 
     async def _init_chat(self, client_id: str, product_id: str) -> ChatHistoryViewModel:
         self.log.info("Initializing new chat", client_id=client_id, product_id=product_id)
@@ -212,6 +560,11 @@ class DocChatRepository:
 
         self.log.info("Chat history updated successfully", chat_id=chat_id, messages_count=len(chat_details.messages))
     
+    def _log_prompt_tokens(self, prompt):
+        # Prompt tokens per turn, to compare context settings
+        self.log.info("Answer prompt built", prompt_tokens=sum(count_tokens(str(msg.content)) for msg in prompt.messages))
+        return prompt
+
     def _log_prompt(self, prompt, prompt_type: str = "text"):
         if self.isPromptLoggingEnabled:
             save_path = os.getcwd()
@@ -233,6 +586,95 @@ class DocChatRepository:
 
         return prompt
     
+    async def _prepare_turn(self, chat_request: ChatRequest) -> dict:
+        """
+        Gathers what the answer prompt of a chat turn needs: the chat history, the documents to answer from
+        and the user's memories. Products whose whole corpus fits in the prompt skip retrieval entirely.
+        Returns the prompt inputs and the documents.
+        """
+        # Get chat history
+        self.log.info("Fetching conversation history")
+        conversation_history = await self._get_chat_history(chat_request["chat_id"])
+        self.log.info("Conversation history fetched successfully")
+
+        embedding_context = EmbeddingContext(self.faiss_service.azOpenAIEmbeddings)
+
+        # Tiny corpora are put in the prompt whole: no index to load and no question to rewrite and embed
+        documents = self.faiss_service.load_tiny_corpus(
+            chat_request["client_id"], chat_request["product_id"], get_tiny_corpus_max_tokens(self.chat_context_configs)
+        )
+
+        if documents is not None:
+            self.log.info("Corpus fits in the prompt, skipping retrieval", chunks=len(documents))
+        else:
+            documents = await self._retrieve_documents(chat_request, conversation_history, embedding_context)
+
+        # Get user memory
+        user_memories = ""
+        if chat_request["user_id"]:
+            self.log.info("Fetching user memory")
+            user_memories = await UserMemory(chat_request["user_id"]).retrieve_memories_async(
+                chat_request["query"],
+                query_embedding=await embedding_context.embed(chat_request["query"])
+            )
+            self.log.info("User memory retrieved successfully")
+
+        self.log.info("Chat turn prepared", documents=len(documents), embedding_requests=embedding_context.requests)
+
+        return {
+            "inputs": {
+                "context": self._format_docs(documents),
+                "input": chat_request["query"],
+                "chat_history": conversation_history,
+                "user_memory": user_memories,
+            },
+            "documents": documents,
+        }
+
+    async def _retrieve_documents(self, chat_request: ChatRequest, conversation_history: list, embedding_context: EmbeddingContext) -> list[Document]:
+        """
+        Rewrites the question with the chat history and searches the product's vector store with it.
+        The rewritten question and, for user memory, the raw query are embedded in one request.
+        Hits are filtered by score, stripped of overlapping text and packed into the context token budget.
+        """
+        # Load the vector store
+        self.log.info("Loading vector store...")
+        vector_store = self.faiss_service.load_vector_store(chat_request["client_id"], chat_request["product_id"])
+        self.log.info("Vector store loaded successfully")
+
+        # Rewrite user question with chat history context
+        question_rewriter = (
+            contextualize_question_prompt
+            | RunnableLambda(lambda prompt: self._log_prompt(prompt, prompt_type="contextualize_question_prompt"))
+            | self.azOpenAIllm
+            | StrOutputParser()
+        )
+
+        rewritten_question = await question_rewriter.ainvoke({"input": chat_request["query"], "chat_history": conversation_history})
+        rewritten_question = self._log_prompt(rewritten_question.strip() or chat_request["query"], prompt_type="rewritten_question")
+
+        # Embed every text the turn searches with in a single request
+        await embedding_context.embed_many([rewritten_question] + ([chat_request["query"]] if chat_request["user_id"] else []))
+
+        # Retrieve scored docs for the rewritten question and keep the relevant ones that fit the context budget
+        context_builder = ContextBuilder()
+        hits = self.faiss_service.search_with_scores(vector_store, await embedding_context.embed(rewritten_question), k=context_builder.fetch_k)
+        documents, stats = context_builder.build(hits)
+
+        self.log.info("Context built", **stats)
+
+        return documents
+
+    def _get_answer_chain(self):
+        # Answer using retrieved docs + original input + chat history
+        return (
+            context_qa_prompt
+            | RunnableLambda(lambda prompt: self._log_prompt(prompt, prompt_type="context_qa_prompt"))
+            | RunnableLambda(self._log_prompt_tokens)
+            | self.azOpenAIllm
+            | StrOutputParser()
+        )
+
     async def chat(self, chat_request: ChatRequest) -> dict:
         try:
             # If query is not provided, then return an error
@@ -257,86 +699,18 @@ class DocChatRepository:
                     "chatId": chat_request["chat_id"]
                 }
             
-            # Load the vector store
-            self.log.info("Loading vector store...")
-            vector_store = self.faiss_service.load_vector_store(chat_request["client_id"], chat_request["product_id"])
-            self.log.info("Vector store loaded successfully")
-
-            # Create retriever from vector store
-            self.log.info("Creating retriever from vector store...")
-            retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 5})
-            self.log.info("Retriever created successfully")
-            
-            # Get chat history
-            self.log.info("Fetching conversation history")
-            conversation_history = await self._get_chat_history(chat_request["chat_id"])
-            self.log.info("Conversation history fetched successfully")
-            
-            # Get user memory
-            user_memories = ""
-            if chat_request["user_id"]:
-                self.log.info("Fetching user memory")
-                user_memories = UserMemory(chat_request["user_id"]).retrieve_memories(chat_request["query"])
-                self.log.info("User memory retrieved successfully")
-
-            self.log.info("Preparing question rewriter and retrieval chain")
-
-            # Rewrite user question with chat history context
-            question_rewriter = (
-                {
-                    "input": RunnableLambda(lambda x: x["question"]), 
-                    "chat_history": RunnableLambda(lambda x: x["chat_history"])
-                }
-                | contextualize_question_prompt 
-                | RunnableLambda(lambda prompt: self._log_prompt(prompt, prompt_type="contextualize_question_prompt"))
-                | self.azOpenAIllm 
-                | StrOutputParser()
-            )
+            turn = await self._prepare_turn(chat_request)
 
-            # Retrieve docs for rewritten question
-            retrieve_docs = (
-                {
-                    "question": question_rewriter,
-                    "chat_history": RunnableLambda(lambda x: x["chat_history"])
-                }
-                | RunnableLambda(lambda x: self._log_prompt(x["question"], prompt_type="rewritten_question"))
-                | retriever
-                | self._format_docs
-            )
-
-            # Answer using retrieved docs + original input + chat history
-            chain = (
-                {
-                    "context": retrieve_docs,
-                    "input": RunnableLambda(lambda x: x["question"]),
-                    "chat_history": RunnableLambda(lambda x: x["chat_history"]),
-                    "user_memory": RunnableLambda(lambda x: x["user_memory"]),
-                }
-                | context_qa_prompt
-                | RunnableLambda(lambda prompt: self._log_prompt(prompt, prompt_type="context_qa_prompt"))
-                | self.azOpenAIllm
-                | StrOutputParser()
-            )
-            
             self.log.info("Invoking chain for response generation")
 
             # Invoke the chain
-            result = chain.invoke(
-                {
-                    "question": chat_request["query"],
-                    "chat_history": conversation_history,
-                    "user_memory": user_memories
-                }
-            )
+            result = await self._get_answer_chain().ainvoke(turn["inputs"])
 
             # Evaluate response
             if self.isDeepevalEnabled:
                 self.log.info("Evaluating the response")
-                retrieved_docs = retrieve_docs.invoke({
-                    "question": chat_request["query"],
-                    "chat_history": conversation_history,
-                })
-                self.deepeval.evaluate(chat_request["query"], result, None, [retrieved_docs])
+                # Evaluated against the documents the answer was generated from, without retrieving them again
+                self.deepeval.evaluate(chat_request["query"], result, None, [doc.page_content for doc in turn["documents"]])
                 self.log.info("Response evaluated successfully")
             else:
                 self.log.info("Skipping evaluation as Deepeval is disabled")
@@ -346,6 +720,9 @@ class DocChatRepository:
             await self._update_chat_history(chat_request["chat_id"], chat_request["query"], result)
             self.log.info("Chat details updated successfully")
 
+            # Extract user memories from the turn in the background
+            memory_extraction_worker.submit(chat_request["user_id"], chat_request["query"], result)
+
             return {
                 "response": result,
                 "chatId": chat_request["chat_id"]
@@ -407,67 +784,8 @@ class DocChatRepository:
                     ]
                 )
             
-            # Load the vector store
-            self.log.info("Loading vector store...")
-            vector_store = self.faiss_service.load_vector_store(chat_request["client_id"], chat_request["product_id"])
-            self.log.info("Vector store loaded successfully")
-
-            # Create retriever from vector store
-            self.log.info("Creating retriever from vector store...")
-            retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": 5})
-            self.log.info("Retriever created successfully")
-            
-            # Get chat history
-            self.log.info("Fetching conversation history")
-            conversation_history = await self._get_chat_history(chat_request["chat_id"])
-            self.log.info("Conversation history fetched successfully")
-            
-            # Get user memory
-            user_memories = ""
-            if chat_request["user_id"]:
-                self.log.info("Fetching user memory")
-                user_memories = UserMemory(chat_request["user_id"]).retrieve_memories(chat_request["query"])
-                self.log.info("User memory retrieved successfully")
-
-            self.log.info("Preparing question rewriter and retrieval chain")
-
-            # Rewrite user question with chat history context
-            question_rewriter = (
-                {
-                    "input": RunnableLambda(lambda x: x["question"]), 
-                    "chat_history": RunnableLambda(lambda x: x["chat_history"])
-                }
-                | contextualize_question_prompt 
-                | RunnableLambda(lambda prompt: self._log_prompt(prompt, prompt_type="contextualize_question_prompt"))
-                | self.azOpenAIllm 
-                | StrOutputParser()
-            )
-
-            # Retrieve docs for rewritten question
-            retrieve_docs = (
-                {
-                    "question": question_rewriter,
-                    "chat_history": RunnableLambda(lambda x: x["chat_history"])
-                }
-                | RunnableLambda(lambda x: self._log_prompt(x["question"], prompt_type="rewritten_question"))
-                | retriever
-                | self._format_docs
-            )
+            turn = await self._prepare_turn(chat_request)
 
-            # Answer using retrieved docs + original input + chat history
-            chain = (
-                {
-                    "context": retrieve_docs,
-                    "input": RunnableLambda(lambda x: x["question"]),
-                    "chat_history": RunnableLambda(lambda x: x["chat_history"]),
-                    "user_memory": RunnableLambda(lambda x: x["user_memory"]),
-                }
-                | context_qa_prompt
-                | RunnableLambda(lambda prompt: self._log_prompt(prompt, prompt_type="context_qa_prompt"))
-                | self.azOpenAIllm
-                | StrOutputParser()
-            )
-            
             self.log.info("Invoking chain for response generation")
 
             async def sse_event_gen() -> AsyncIterator[str]:
@@ -478,13 +796,7 @@ class DocChatRepository:
                 result = ""
                 
                 try:
-                    async for token in chain.astream(
-                        {
-                            "question": chat_request["query"],
-                            "chat_history": conversation_history,
-                            "user_memory": user_memories
-                        }
-                    ):
+                    async for token in self._get_answer_chain().astream(turn["inputs"]):
                         if token:
                             result += token
                             yield f"data: {token}\n\n"
@@ -498,6 +810,9 @@ class DocChatRepository:
                 self.log.info("Updating chat details with new messages")
                 await self._update_chat_history(chat_request["chat_id"], chat_request["query"], result)
                 self.log.info("Chat details updated successfully")
+
+                # Extract user memories from the turn in the background
+                memory_extraction_worker.submit(chat_request["user_id"], chat_request["query"], result)
                     
                 yield f"data: {self._get_chat_id_sse_message(chat_request['chat_id'])}\n\n"
                 yield "data: [DONE]\n\n"
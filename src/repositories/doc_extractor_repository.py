@@ -1,8 +1,11 @@
 import os
 import structlog
 
-from src.models.view_models.documents_view_model import DocumentsViewModel, CustomDocument
+from typing import Callable
+from datetime import datetime, timezone
+from src.models.view_models.documents_view_model import DocumentsViewModel, DocumentChunkViewModel, BlobManifestEntry
 from src.services.extractors.docling_file_extractor import DoclingFileExtractor
+from src.services.ingestion.streaming_pipeline import StreamingIngestionPipeline
 from src.services.azure.blob import BlobService
 from src.services.azure.cosmos import CosmosService
 
@@ -13,20 +16,28 @@ class DocExtractorRepository:
         self.log = structlog.get_logger(self.__class__.__name__)
         self.blob_service = BlobService()
         self.cosmos_service = CosmosService()
-    
-    async def sync_documents(self, client_id: str, product_id: str) -> None:
-        # Validate input
-        if not client_id or not product_id:
-            self.log.error("Client ID or Product ID is not provided")
-            raise ValueError("Client ID and Product ID must be provided.")
 
-        # List files from blob storage
-        file_urls = self.blob_service.list_files_in_folder("document-chat", f"{client_id}/{product_id}/") # Todo: Make list_files_in_folder async
-        
-        if not file_urls:
-            self.log.error("No files found in blob storage", client_id=client_id, product_id=product_id)
-            raise ValueError(f"No files found for client_id '{client_id}' and product_id '{product_id}' in blob storage.")
+    @staticmethod
+    def _is_blob_changed(previous: dict, current: dict) -> bool:
+        return previous.get("etag") != current["etag"] or previous.get("last_modified") != current["last_modified"]
+
+    async def _iter_chunk_ids(self, client_id: str, product_id: str, sources: list[str] | None = None):
+        # All chunks of the product, or only those of the given blobs
+        query = "SELECT c.id FROM c WHERE c.client_id = @client_id AND c.product_id = @product_id"
+        parameters = [
+            {"name": "@client_id", "value": client_id},
+            {"name": "@product_id", "value": product_id}
+        ]
+
+        if sources is not None:
+            query += " AND ARRAY_CONTAINS(@sources, c.metadata.source)"
+            parameters.append({"name": "@sources", "value": sources})
 
+        async for items, _ in self.cosmos_service.query_items_paged_async("document-chunks", query, parameters, partition_key=product_id):
+            for item in items:
+                yield item["id"]
+
+    async def _load_document_record(self, client_id: str, product_id: str) -> dict | None:
         # Query documents from Cosmos DB
         documents: list[DocumentsViewModel] = list(
             await self.cosmos_service.query_items_async(
@@ -38,37 +49,208 @@ class DocExtractorRepository:
                 ]
             )
         )
-        
+
         if len(documents) > 1:
             self.log.error("Multiple document records found which should not happen.", client_id=client_id, product_id=product_id)
             raise ValueError("Multiple document records found which should not happen.")
 
-        docling_file_extractor = DoclingFileExtractor()
-        custom_documents: list[CustomDocument] = []
+        return documents[0] if documents else None
+
+    def _compute_blob_delta(self, client_id: str, product_id: str, document: dict | None, blobs: list[dict]) -> dict:
+        # Records created before the manifest existed, or that still hold their chunks inline, are fully rebuilt
+        is_legacy = document is not None and "chunked_documents" in document
+        previous_manifest = {entry["blob_name"]: entry for entry in document.get("manifest", [])} if document and not is_legacy else {}
+        current_blobs = {blob["name"]: blob for blob in blobs}
+
+        delta = {
+            "previous_manifest": previous_manifest,
+            "current_blobs": current_blobs,
+            "added": [name for name in current_blobs if name not in previous_manifest],
+            "changed": [name for name in current_blobs if name in previous_manifest and self._is_blob_changed(previous_manifest[name], current_blobs[name])],
+            "deleted": [name for name in previous_manifest if name not in current_blobs],
+        }
+        delta["unchanged"] = [name for name in current_blobs if name in previous_manifest and name not in delta["changed"]]
+
+        self.log.info(
+            "Computed blob delta",
+            client_id=client_id, product_id=product_id,
+            added=len(delta["added"]), changed=len(delta["changed"]), deleted=len(delta["deleted"]), unchanged=len(delta["unchanged"])
+        )
 
-        # Chunk files
-        for url in file_urls:
-            custom_documents.extend(docling_file_extractor.chunk_file(url)) # Todo: Make chunk_file async
+        return delta
 
+    async def _remove_stale_chunks(self, client_id: str, product_id: str, delta: dict) -> int:
+        # Drop the chunks of changed and deleted blobs, keep everything else as is.
+        # Chunks are found by their source rather than by the manifest, so chunks persisted by an interrupted run
+        # (which reached no manifest) are removed as well; added blobs are included for the same reason.
+        if delta["previous_manifest"]:
+            sources = delta["added"] + delta["changed"] + delta["deleted"]
+            stale_chunk_ids = [item_id async for item_id in self._iter_chunk_ids(client_id, product_id, sources)] if sources else []
+        else:
+            stale_chunk_ids = [item_id async for item_id in self._iter_chunk_ids(client_id, product_id)]
+
+        if stale_chunk_ids:
+            await self.cosmos_service.bulk_delete_items_async("document-chunks", stale_chunk_ids, partition_key=product_id)
+
+        return len(stale_chunk_ids)
+
+    async def _save_document_record(
+        self, client_id: str, product_id: str, document: dict | None, manifest: list[BlobManifestEntry], corpus_tokens: int | None = None
+    ) -> None:
         # Create or update document record
-        if len(documents) == 0:
+        if document is None:
             self.log.info("Creating new document record", client_id=client_id, product_id=product_id)
-            
+
             documents_view_model = DocumentsViewModel(
                 client_id=client_id,
                 product_id=product_id,
-                chunked_documents=custom_documents
+                manifest=manifest,
+                corpus_tokens=corpus_tokens
             )
-            
+
             await self.cosmos_service.create_item_async("documents", documents_view_model.model_dump())
-            
+
             self.log.info("Document record created successfully", client_id=client_id, product_id=product_id)
         else:
             self.log.info("Updating existing document record", client_id=client_id, product_id=product_id)
-            
-            document = documents[0]
-            document["chunked_documents"] = [doc.model_dump() for doc in custom_documents]
+
+            document.pop("chunked_documents", None)
+            document["manifest"] = [entry.model_dump() for entry in manifest]
+            if corpus_tokens is not None:
+                document["corpus_tokens"] = corpus_tokens
+            document["modified_at"] = datetime.now(timezone.utc).isoformat()
 
             await self.cosmos_service.update_item_async("documents", document)
-            
-            self.log.info("Document record updated successfully", client_id=client_id, product_id=product_id)
\ No newline at end of file
+
+            self.log.info("Document record updated successfully", client_id=client_id, product_id=product_id)
+
+    async def _list_product_blobs(self, client_id: str, product_id: str) -> list[dict]:
+        # Validate input
+        if not client_id or not product_id:
+            self.log.error("Client ID or Product ID is not provided")
+            raise ValueError("Client ID and Product ID must be provided.")
+
+        # List blobs (with ETag and last-modified) from blob storage
+        blobs = await self.blob_service.list_blobs_in_folder("document-chat", f"{client_id}/{product_id}/")
+
+        if not blobs:
+            self.log.error("No files found in blob storage", client_id=client_id, product_id=product_id)
+            raise ValueError(f"No files found for client_id '{client_id}' and product_id '{product_id}' in blob storage.")
+
+        return blobs
+
+    async def sync_documents(self, client_id: str, product_id: str, progress: Callable[[dict], None] | None = None) -> dict:
+        """
+        Incrementally synchronizes the chunked documents of a product with its blob folder.
+        Only added or changed blobs are re-extracted, and the chunks of deleted blobs are dropped.
+        The manifest of blob name, ETag and chunk IDs kept on the document record drives the diff.
+        Chunks are stored as individual items in the "document-chunks" container, partitioned by product.
+
+        :param client_id: Client ID for the documents.
+        :param product_id: Product ID for the documents.
+        :param progress: Optional callback receiving progress updates, called after each file.
+        :return: Summary of the delta applied by this sync.
+        """
+        blobs = await self._list_product_blobs(client_id, product_id)
+        document = await self._load_document_record(client_id, product_id)
+        delta = self._compute_blob_delta(client_id, product_id, document, blobs)
+        added, changed, deleted, unchanged = delta["added"], delta["changed"], delta["deleted"], delta["unchanged"]
+
+        summary = {
+            "added": added,
+            "changed": changed,
+            "deleted": deleted,
+            "unchanged": len(unchanged),
+            "chunks_added": 0,
+            "chunks_removed": 0,
+            "reports": [],
+        }
+
+        if document and delta["previous_manifest"] and not (added or changed or deleted):
+            self.log.info("No blob changes detected, skipping sync", client_id=client_id, product_id=product_id)
+            return summary
+
+        summary["chunks_removed"] = await self._remove_stale_chunks(client_id, product_id, delta)
+
+        docling_file_extractor = DoclingFileExtractor()
+        manifest: list[BlobManifestEntry] = [BlobManifestEntry(**delta["previous_manifest"][name]) for name in unchanged]
+
+        # Chunk only the added and changed files, writing each file's chunks as soon as it is extracted
+        files_to_chunk = added + changed
+
+        for index, name in enumerate(files_to_chunk, start=1):
+            blob = delta["current_blobs"][name]
+            file_chunks = docling_file_extractor.chunk_file(blob["url"]) # Todo: Make chunk_file async
+
+            chunk_items = [
+                DocumentChunkViewModel(
+                    **chunk.model_dump(exclude={"id", "metadata"}),
+                    id=DocumentChunkViewModel.build_id(name, blob["etag"], ordinal),
+                    metadata={**chunk.metadata, "source": name},
+                    client_id=client_id,
+                    product_id=product_id
+                ).model_dump()
+                for ordinal, chunk in enumerate(file_chunks)
+            ]
+
+            await self.cosmos_service.bulk_upsert_items_async("document-chunks", chunk_items, partition_key=product_id)
+
+            summary["chunks_added"] += len(chunk_items)
+            manifest.append(
+                BlobManifestEntry(
+                    blob_name=name,
+                    etag=blob["etag"],
+                    last_modified=blob["last_modified"],
+                    chunk_ids=[chunk["id"] for chunk in chunk_items]
+                )
+            )
+
+            if progress:
+                progress({"stage": "chunking", "files_done": index, "files_total": len(files_to_chunk), "chunks_added": summary["chunks_added"]})
+
+        summary["reports"] = [report.model_dump() for report in docling_file_extractor.ingestion_reports]
+
+        await self._save_document_record(client_id, product_id, document, manifest)
+
+        self.log.info("Document sync completed", client_id=client_id, product_id=product_id, **{k: v for k, v in summary.items() if isinstance(v, int)})
+
+        return summary
+
+    async def ingest_documents(self, client_id: str, product_id: str, progress: Callable[[dict], None] | None = None) -> dict:
+        """
+        Synchronizes a product with its blob folder and updates its vector store in one streaming pass:
+        added and changed blobs are extracted, persisted, embedded and indexed through bounded queues,
+        so the chunks of the first file are embedded while later files are still converting.
+        The blob delta is the same as in sync_documents.
+
+        :param client_id: Client ID for the documents.
+        :param product_id: Product ID for the documents.
+        :param progress: Optional callback receiving per-stage progress updates.
+        :return: Summary of the delta, per-stage throughput and near-duplicate statistics.
+        """
+        blobs = await self._list_product_blobs(client_id, product_id)
+        document = await self._load_document_record(client_id, product_id)
+        delta = self._compute_blob_delta(client_id, product_id, document, blobs)
+
+        chunks_removed = await self._remove_stale_chunks(client_id, product_id, delta)
+
+        pipeline = StreamingIngestionPipeline(client_id, product_id, progress=progress)
+        result = await pipeline.run(files=[delta["current_blobs"][name] for name in delta["added"] + delta["changed"]])
+
+        manifest = [BlobManifestEntry(**delta["previous_manifest"][name]) for name in delta["unchanged"]] + pipeline.manifest
+        await self._save_document_record(client_id, product_id, document, manifest, corpus_tokens=result["corpus_tokens"])
+
+        summary = {
+            "added": delta["added"],
+            "changed": delta["changed"],
+            "deleted": delta["deleted"],
+            "unchanged": len(delta["unchanged"]),
+            "chunks_added": sum(len(entry.chunk_ids) for entry in pipeline.manifest),
+            "chunks_removed": chunks_removed,
+            **result,
+            "reports": [report.model_dump() for report in pipeline.extractor.ingestion_reports],
+        }
+
+        self.log.info("Document ingestion completed", client_id=client_id, product_id=product_id, elapsed_seconds=result["elapsed_seconds"])
+
+        return summary
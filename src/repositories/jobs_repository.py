@@ -0,0 +1,40 @@
+import structlog
+
+from src.models.view_models.job_view_model import JobViewModel
+from src.services.jobs.job_queue import JobQueue
+
+class JobsRepository:
+    def __init__(self):
+        self.log = structlog.get_logger(self.__class__.__name__)
+        self.job_queue = JobQueue()
+
+    def submit_product_job(self, kind: str, client_id: str, product_id: str) -> JobViewModel:
+        """
+        Queues an ingestion job for a product; the ingestion worker picks it up.
+
+        :param kind: Kind of job, e.g. "sync" or "vectorize".
+        :param client_id: Client ID for the documents; jobs are limited per client.
+        :param product_id: Product ID for the documents.
+        :return: The queued job.
+        """
+        if not client_id or not product_id:
+            self.log.error("Client ID or Product ID is not provided")
+            raise ValueError("Client ID and Product ID must be provided.")
+
+        return self.job_queue.enqueue(kind, tenant_id=client_id, payload={"client_id": client_id, "product_id": product_id})
+
+    def get_job(self, job_id: str) -> JobViewModel:
+        job = self.job_queue.get(job_id)
+
+        if job is None:
+            raise LookupError(f"Job {job_id} not found.")
+
+        return job
+
+    def cancel_job(self, job_id: str) -> JobViewModel:
+        job = self.job_queue.request_cancel(job_id)
+
+        if job is None:
+            raise LookupError(f"Job {job_id} not found.")
+
+        return job
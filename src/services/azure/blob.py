@@ -1,45 +1,220 @@
-from azure.storage.blob import BlobServiceClient, ContentSettings
+import os
+import asyncio
+import weakref
+
+from datetime import datetime, timedelta, timezone
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob import BlobSasPermissions, ContentSettings, generate_blob_sas
+from azure.storage.blob.aio import BlobServiceClient
 from src.core.app_settings import get_settings
+from src.utils.get_configs import GetConfigs
 from typing import BinaryIO
 
+# One client per event loop: the async client's HTTP session is bound to the loop it was created on,
+# and worker processes run every job in a fresh loop
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, BlobServiceClient]]" = weakref.WeakKeyDictionary()
+
 class BlobService:
-    def __init__(self):
-        settings = get_settings()
-        self.client = BlobServiceClient.from_connection_string(
-            settings.AZURE_STORAGE_CONN_STR
-        )
-        
-    def upload_stream(self, container_name: str, blob_name: str, data: BinaryIO, content_type: str = None) -> str:
+    def __init__(self, connection_string: str | None = None):
+        self.connection_string = connection_string or get_settings().AZURE_STORAGE_CONN_STR
+        self.configs = GetConfigs().get_configs()['azure_blob']
+
+    @property
+    def client(self) -> BlobServiceClient:
+        """The client shared by every BlobService on the running event loop."""
+        clients = _shared_clients.setdefault(asyncio.get_running_loop(), {})
+
+        if self.connection_string not in clients:
+            clients[self.connection_string] = BlobServiceClient.from_connection_string(
+                self.connection_string,
+                max_block_size=self.configs['max_block_size'],
+                max_single_put_size=self.configs['max_single_put_size'],
+            )
+
+        return clients[self.connection_string]
+
+    @staticmethod
+    async def close_shared_clients() -> None:
+        """Closes the clients of the running event loop; called on application shutdown."""
+        clients = _shared_clients.pop(asyncio.get_running_loop(), {})
+
+        for client in clients.values():
+            await client.close()
+
+    async def upload_stream(self, container_name: str, blob_name: str, data: BinaryIO | bytes, content_type: str = None) -> str:
         """
         Uploads a file-like stream to Azure Blob Storage.
-        
+        Large files are staged as blocks of the configured size, uploaded in parallel.
+
         :param container_name: Name of the Azure Blob Storage container.
         :param blob_name: Name of the blob (file) to be created.
-        :param data: File-like object containing the document data.
+        :param data: File-like object or bytes containing the document data.
         :param content_type: MIME type of the document.
         :return: URL of the uploaded document.
         """
         try:
-            container = self.client.get_container_client(container_name)
-        
-            blob = container.get_blob_client(blob_name)
-            
-            blob.upload_blob(
+            blob = self.client.get_blob_client(container_name, blob_name)
+
+            await blob.upload_blob(
                 data,
                 overwrite=True,
+                max_concurrency=self.configs['max_concurrency'],
                 content_settings=ContentSettings(content_type=content_type)
                 if content_type else None
             )
-            
-            # Construct URL
-            account_url = self.client.primary_endpoint
-            
-            return f"{account_url}{container_name}/{blob_name}"
-        
+
+            return blob.url
+
         except Exception as e:
             raise RuntimeError(f"Failed to upload blob: {e}")
 
-    def list_files_in_folder(self, container_name: str, folder_name: str) -> list[str]:
+    def generate_upload_sas_url(self, container_name: str, blob_name: str, expiry_minutes: int) -> tuple[str, datetime]:
+        """
+        Issues a short-lived SAS URL that only allows writing the given blob, so clients upload straight to storage.
+
+        :param container_name: Name of the Azure Blob Storage container.
+        :param blob_name: Name of the blob the URL is scoped to.
+        :param expiry_minutes: Lifetime of the URL.
+        :return: The SAS URL and its expiry time.
+        """
+        credential = self.client.credential
+        if not getattr(credential, "account_key", None):
+            raise RuntimeError("SAS URLs require a storage connection string with an account key.")
+
+        now = datetime.now(timezone.utc)
+        expires_on = now + timedelta(minutes=expiry_minutes)
+
+        sas_token = generate_blob_sas(
+            account_name=self.client.account_name,
+            container_name=container_name,
+            blob_name=blob_name,
+            account_key=credential.account_key,
+            # Create and write only: the holder can neither read nor list nor delete
+            permission=BlobSasPermissions(create=True, write=True),
+            # Tolerate clock skew between the API and storage
+            start=now - timedelta(minutes=5),
+            expiry=expires_on,
+        )
+
+        return f"{self.client.get_blob_client(container_name, blob_name).url}?{sas_token}", expires_on
+
+    async def get_blob_properties(self, container_name: str, blob_name: str) -> dict | None:
+        """
+        Reads the properties of a blob.
+
+        :param container_name: Name of the Azure Blob Storage container.
+        :param blob_name: Name of the blob.
+        :return: Dict with the blob URL, size, content type and ETag, or None when the blob does not exist.
+        """
+        blob = self.client.get_blob_client(container_name, blob_name)
+
+        try:
+            properties = await blob.get_blob_properties()
+        except ResourceNotFoundError:
+            return None
+        except Exception as e:
+            raise RuntimeError(f"Failed to read blob properties: {e}")
+
+        return {
+            "url": blob.url,
+            "size": properties.size,
+            "content_type": properties.content_settings.content_type,
+            "etag": properties.etag,
+        }
+
+    async def read_blob_head(self, container_name: str, blob_name: str, length: int) -> bytes:
+        """Reads the first bytes of a blob, e.g. to check its file signature."""
+        try:
+            downloader = await self.client.get_blob_client(container_name, blob_name).download_blob(offset=0, length=length)
+            return await downloader.readall()
+
+        except Exception as e:
+            raise RuntimeError(f"Failed to read blob: {e}")
+
+    async def delete_blob(self, container_name: str, blob_name: str) -> None:
+        try:
+            await self.client.get_blob_client(container_name, blob_name).delete_blob()
+
+        except ResourceNotFoundError:
+            return
+        except Exception as e:
+            raise RuntimeError(f"Failed to delete blob: {e}")
+
+    async def copy_blob(self, container_name: str, source_blob_name: str, target_blob_name: str, source_etag: str | None = None) -> str:
+        """
+        Copies a blob within the storage account and waits for the copy to finish.
+
+        :param container_name: Name of the Azure Blob Storage container.
+        :param source_blob_name: Name of the blob to copy.
+        :param target_blob_name: Name of the copy; an existing blob is overwritten.
+        :param source_etag: When given, the copy fails if the source blob has changed since it was read.
+        :return: URL of the copy.
+        """
+        try:
+            source = self.client.get_blob_client(container_name, source_blob_name)
+            target = self.client.get_blob_client(container_name, target_blob_name)
+
+            conditions = {"source_etag": source_etag, "source_match_condition": MatchConditions.IfNotModified} if source_etag else {}
+            copy = await target.start_copy_from_url(source.url, **conditions)
+
+            # Copies within an account usually finish at once; larger ones are polled until done
+            status = copy["copy_status"]
+            while status == "pending":
+                await asyncio.sleep(1)
+                status = (await target.get_blob_properties()).copy.status
+
+            if status != "success":
+                raise RuntimeError(f"copy ended with status {status}")
+
+            return target.url
+
+        except Exception as e:
+            raise RuntimeError(f"Failed to copy blob: {e}")
+
+    async def stage_block(self, container_name: str, blob_name: str, block_id: str, data: bytes) -> None:
+        """
+        Stages one block of a blob; it stays invisible until commit_block_list includes it.
+        Staging the same block ID again replaces the block, so retries are safe.
+        """
+        try:
+            await self.client.get_blob_client(container_name, blob_name).stage_block(block_id, data, validate_content=True)
+
+        except Exception as e:
+            raise RuntimeError(f"Failed to stage block: {e}")
+
+    async def get_uncommitted_block_ids(self, container_name: str, blob_name: str) -> list[str]:
+        """Returns the IDs of the blocks staged for a blob and not committed yet."""
+        try:
+            _, uncommitted = await self.client.get_blob_client(container_name, blob_name).get_block_list("uncommitted")
+            return [block.id for block in uncommitted]
+
+        except ResourceNotFoundError:
+            return []
+        except Exception as e:
+            raise RuntimeError(f"Failed to read block list: {e}")
+
+    async def commit_block_list(self, container_name: str, blob_name: str, block_ids: list[str], content_type: str = None) -> str:
+        """
+        Assembles staged blocks, in the given order, into the blob.
+
+        :return: URL of the committed blob.
+        """
+        try:
+            blob = self.client.get_blob_client(container_name, blob_name)
+
+            await blob.commit_block_list(
+                block_ids,
+                content_settings=ContentSettings(content_type=content_type)
+                if content_type else None
+            )
+
+            return blob.url
+
+        except Exception as e:
+            raise RuntimeError(f"Failed to commit block list: {e}")
+
+    async def list_files_in_folder(self, container_name: str, folder_name: str) -> list[str]:
         """
         Lists all file URLs in a given folder (prefix) within a container.
 
@@ -47,20 +222,80 @@ class BlobService:
         :param folder_name: Folder (prefix) to search within (e.g., 'myfolder/').
         :return: List of blob URLs.
         """
+        return [blob["url"] for blob in await self.list_blobs_in_folder(container_name, folder_name)]
+
+    async def list_blobs_in_folder(self, container_name: str, folder_name: str) -> list[dict]:
+        """
+        Lists all blobs in a given folder (prefix) together with the properties needed for change detection.
+
+        :param container_name: Name of the Azure Blob Storage container.
+        :param folder_name: Folder (prefix) to search within (e.g., 'myfolder/').
+        :return: List of dicts with the blob name, URL, ETag and last-modified timestamp.
+        """
         try:
             container = self.client.get_container_client(container_name)
-            
+
             # Ensure folder_name ends with a slash for prefix matching
             prefix = folder_name if folder_name.endswith('/') else folder_name + '/'
-            
-            blob_list = container.list_blobs(name_starts_with=prefix)
-            
-            account_url = self.client.primary_endpoint
-            
+
             return [
-                f"{account_url}{container_name}/{blob.name}"
-                for blob in blob_list
+                {
+                    "name": blob.name,
+                    "url": container.get_blob_client(blob.name).url,
+                    "etag": blob.etag,
+                    "last_modified": blob.last_modified.isoformat() if blob.last_modified else None,
+                }
+                async for blob in container.list_blobs(name_starts_with=prefix)
             ]
-            
+
         except Exception as e:
             raise RuntimeError(f"Failed to list blobs in folder: {e}")
+
+    async def download_blob(self, container_name: str, blob_name: str) -> bytes:
+        """
+        Downloads a blob into memory, fetching its ranges in parallel.
+
+        :param container_name: Name of the Azure Blob Storage container.
+        :param blob_name: Name of the blob (file) to download.
+        :return: The blob content.
+        """
+        try:
+            downloader = await self.client.get_blob_client(container_name, blob_name).download_blob(
+                max_concurrency=self.configs['max_concurrency']
+            )
+            return await downloader.readall()
+
+        except Exception as e:
+            raise RuntimeError(f"Failed to download blob: {e}")
+
+    async def download_blobs_to_dir(self, container_name: str, blob_names: list[str], target_dir: str) -> dict[str, str]:
+        """
+        Downloads several blobs to a local directory, with at most download_concurrency blobs in flight.
+
+        :param container_name: Name of the Azure Blob Storage container.
+        :param blob_names: Names of the blobs to download.
+        :param target_dir: Directory the blobs are written to, keeping their folder structure.
+        :return: Local path of every downloaded blob, by blob name.
+        """
+        semaphore = asyncio.Semaphore(self.configs['download_concurrency'])
+
+        async def download_one(blob_name: str) -> tuple[str, str]:
+            path = os.path.join(target_dir, *blob_name.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            async with semaphore:
+                downloader = await self.client.get_blob_client(container_name, blob_name).download_blob(
+                    max_concurrency=self.configs['max_concurrency']
+                )
+                with open(path, "wb") as f:
+                    # Streamed chunk by chunk, so large blobs never sit in memory whole
+                    async for chunk in downloader.chunks():
+                        f.write(chunk)
+
+            return blob_name, path
+
+        try:
+            return dict(await asyncio.gather(*(download_one(blob_name) for blob_name in blob_names)))
+
+        except Exception as e:
+            raise RuntimeError(f"Failed to download blobs: {e}")
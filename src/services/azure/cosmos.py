@@ -1,7 +1,13 @@
+import asyncio
+
+from typing import AsyncIterator
 from azure.cosmos import CosmosClient, exceptions
 from src.core.app_settings import get_settings
 from starlette.concurrency import run_in_threadpool
 
+# Transactional batches are limited to 100 operations on a single partition key
+MAX_BATCH_OPERATIONS = 100
+
 class CosmosService:
     def __init__(self):
         self.settings = get_settings()
@@ -20,6 +26,23 @@ class CosmosService:
         except exceptions.CosmosHttpResponseError as e:
             raise RuntimeError(f"An error occurred while adding documents: {e}")
 
+    async def read_item_async(self, container_name, item_id: str, partition_key) -> dict | None:
+        """
+        Point-reads an item by its ID and partition key; None when it does not exist.
+        """
+        try:
+            return await run_in_threadpool(
+                self.db.get_container_client(container_name).read_item,
+                item_id,
+                partition_key
+            )
+
+        except exceptions.CosmosResourceNotFoundError:
+            return None
+
+        except exceptions.CosmosHttpResponseError as e:
+            raise RuntimeError(f"An error occurred while reading a document: {e}")
+
     async def query_items_async(self, container_name, query: str, parameters: list[dict]):
         try:
             response = await run_in_threadpool(
@@ -43,6 +66,96 @@ class CosmosService:
         except exceptions.CosmosHttpResponseError as e:
             raise RuntimeError(f"An error occurred while updating documents: {e}")
 
+    async def execute_item_batch_async(self, container_name, batch_operations: list[tuple], partition_key):
+        try:
+            response = await run_in_threadpool(
+                self.db.get_container_client(container_name).execute_item_batch,
+                batch_operations=batch_operations,
+                partition_key=partition_key
+            )
+            return response
+
+        except exceptions.CosmosBatchOperationError as e:
+            raise RuntimeError(f"A batch operation failed at index {e.error_index}: {e}")
+
+        except exceptions.CosmosHttpResponseError as e:
+            raise RuntimeError(f"An error occurred while executing a batch: {e}")
+
+    async def _run_batches_async(self, container_name, batch_operations: list[tuple], partition_key, max_concurrency: int):
+        # Split into transactional batches of at most 100 operations and run a few of them at a time
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(operations: list[tuple]):
+            async with semaphore:
+                return await self.execute_item_batch_async(container_name, operations, partition_key)
+
+        await asyncio.gather(*[
+            run(batch_operations[i:i + MAX_BATCH_OPERATIONS])
+            for i in range(0, len(batch_operations), MAX_BATCH_OPERATIONS)
+        ])
+
+    async def bulk_upsert_items_async(self, container_name, items: list[dict], partition_key, max_concurrency: int = 4):
+        """
+        Upserts items sharing a partition key with transactional batches of up to 100 operations.
+        """
+        await self._run_batches_async(container_name, [("upsert", (item,)) for item in items], partition_key, max_concurrency)
+
+    async def bulk_delete_items_async(self, container_name, item_ids: list[str], partition_key, max_concurrency: int = 4):
+        """
+        Deletes items sharing a partition key, a few at a time.
+        Plain deletes rather than a transactional batch: an item that is already gone is skipped instead of
+        failing the whole batch, so a retried job can delete the same items again.
+        """
+        container = self.db.get_container_client(container_name)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        def delete(item_id: str):
+            try:
+                container.delete_item(item_id, partition_key=partition_key)
+            except exceptions.CosmosResourceNotFoundError:
+                pass
+
+        async def run(item_id: str):
+            async with semaphore:
+                try:
+                    await run_in_threadpool(delete, item_id)
+                except exceptions.CosmosHttpResponseError as e:
+                    raise RuntimeError(f"An error occurred while deleting documents: {e}")
+
+        await asyncio.gather(*(run(item_id) for item_id in item_ids))
+
+    async def query_items_paged_async(
+        self, container_name, query: str, parameters: list[dict], partition_key=None, page_size: int = 100, continuation_token: str | None = None
+    ) -> AsyncIterator[tuple[list[dict], str | None]]:
+        """
+        Streams query results one page at a time, so only one page is held in memory.
+        Yields each page with the continuation token of the next one; a token can be passed back in to resume.
+        """
+        container = self.db.get_container_client(container_name)
+
+        while True:
+            def fetch_page(token: str | None):
+                pager = container.query_items(
+                    query,
+                    parameters=parameters,
+                    partition_key=partition_key,
+                    enable_cross_partition_query=partition_key is None,
+                    max_item_count=page_size
+                ).by_page(token)
+                page = list(next(pager, []))
+                return page, pager.continuation_token
+
+            try:
+                items, continuation_token = await run_in_threadpool(fetch_page, continuation_token)
+            except exceptions.CosmosHttpResponseError as e:
+                raise RuntimeError(f"An error occurred while querying documents: {e}")
+
+            if items:
+                yield items, continuation_token
+
+            if not continuation_token:
+                break
+
 # For testing purposes
 if __name__ == "__main__":
     import uuid
@@ -0,0 +1,291 @@
+import re
+import structlog
+
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+from docling_core.types.doc import (
+    DocItemLabel,
+    DoclingDocument,
+    ListItem,
+    PictureItem,
+    SectionHeaderItem,
+    TableItem,
+    TextItem,
+    TitleItem,
+)
+from src.models.view_models.documents_view_model import CustomDocument
+from src.utils.get_configs import GetConfigs
+from src.utils.token_counter import count_tokens
+
+# Repeated on every page and useless for retrieval
+SKIPPED_LABELS = {DocItemLabel.PAGE_HEADER, DocItemLabel.PAGE_FOOTER}
+
+MARKDOWN_HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+)$")
+
+# Rough characters per token, used to bound the text buffered for one paragraph
+CHARS_PER_TOKEN = 4
+
+@dataclass
+class _Block:
+    text: str
+    tokens: int
+    page: int | None
+    is_heading: bool = False
+
+@dataclass
+class _ChunkBuilder:
+    headings: list[str]
+    blocks: list[_Block] = field(default_factory=list)
+    tokens: int = 0
+
+    def add(self, block: _Block) -> None:
+        self.blocks.append(block)
+        # +2 for the blank line that joins blocks
+        self.tokens += block.tokens + 2
+
+    def pop_trailing_headings(self) -> list[_Block]:
+        headings: list[_Block] = []
+        while self.blocks and self.blocks[-1].is_heading:
+            block = self.blocks.pop()
+            self.tokens -= block.tokens + 2
+            headings.insert(0, block)
+        return headings
+
+class DoclingDocumentChunker:
+    """
+    Chunks a Docling document along its structure (headings, paragraphs, lists, tables, pictures)
+    instead of by page. Chunks stay between min_tokens and max_tokens where the content allows,
+    carry the heading breadcrumb that leads to them, and keep the pages they were taken from.
+    """
+    def __init__(self, min_tokens: int | None = None, max_tokens: int | None = None):
+        self.log = structlog.get_logger(self.__class__.__name__)
+        configs = GetConfigs().get_configs()['ingestion']['chunking']
+        self.min_tokens = min_tokens or configs['min_tokens']
+        self.max_tokens = max_tokens or configs['max_tokens']
+
+    def _split_oversized(self, text: str, page: int | None) -> list[_Block]:
+        """
+        Splits a block larger than max_tokens on lines, then sentences, then words.
+        Table rows are split on lines with the header rows repeated in every part.
+        """
+        lines = text.split("\n")
+        header: list[str] = []
+
+        if len(lines) > 2 and lines[0].startswith("|") and set(lines[1].replace("|", "").strip()) <= set("-: "):
+            header, lines = lines[:2], lines[2:]
+
+        if len(lines) > 1:
+            pieces, separator = lines, "\n"
+        else:
+            pieces, separator = re.split(r"(?<=[.!?])\s+", text), " "
+            if len(pieces) == 1:
+                pieces = text.split(" ")
+
+        header_text = "\n".join(header)
+        header_tokens = count_tokens(header_text) + 1 if header else 0
+
+        blocks: list[_Block] = []
+        current: list[str] = []
+        current_tokens = header_tokens
+
+        for piece in pieces:
+            piece_tokens = count_tokens(piece) + 1
+            if current and current_tokens + piece_tokens > self.max_tokens:
+                body = separator.join(current)
+                blocks.append(_Block(f"{header_text}\n{body}" if header else body, current_tokens, page))
+                current, current_tokens = [], header_tokens
+            current.append(piece)
+            current_tokens += piece_tokens
+
+        if current:
+            body = separator.join(current)
+            blocks.append(_Block(f"{header_text}\n{body}" if header else body, current_tokens, page))
+
+        return blocks
+
+    def _get_item_text(self, item, document: DoclingDocument) -> str:
+        if isinstance(item, TableItem):
+            return item.export_to_markdown(doc=document)
+
+        if isinstance(item, PictureItem):
+            parts = [item.caption_text(document)]
+            parts.extend(getattr(annotation, "text", "") for annotation in item.annotations)
+            text = " ".join(part for part in parts if part)
+            return f"Image: {text}" if text else ""
+
+        if isinstance(item, ListItem):
+            return f"- {item.text}"
+
+        if isinstance(item, TextItem):
+            return item.text
+
+        return ""
+
+    @staticmethod
+    def _build_document(chunk: _ChunkBuilder) -> CustomDocument:
+        pages = sorted({block.page for block in chunk.blocks if block.page is not None})
+        return CustomDocument(
+            page_content="\n\n".join(block.text for block in chunk.blocks),
+            metadata={
+                "page": pages[0] if pages else 1,
+                "pages": pages,
+                "headings": chunk.headings,
+                "token_count": chunk.tokens,
+            },
+        )
+
+    def _pack(self, items: Iterable[tuple[str, int | None, int | None]]) -> Iterator[_ChunkBuilder]:
+        """
+        Packs text items, in reading order, into token-bounded chunks, yielded as they are completed.
+        Each item is its text, its page and its heading level, None for anything but a heading.
+        """
+        chunks: list[_ChunkBuilder] = []
+        breadcrumb: list[tuple[int, str]] = []
+        current = _ChunkBuilder(headings=[])
+
+        def flush():
+            nonlocal current
+            if current.blocks:
+                chunks.append(current)
+            current = _ChunkBuilder(headings=[text for _, text in breadcrumb])
+
+        for text, page, level in items:
+            is_heading = level is not None
+
+            if is_heading:
+                # A new section starts a new chunk once the current one is big enough to stand alone
+                if current.tokens >= self.min_tokens:
+                    flush()
+                breadcrumb = [(lvl, heading) for lvl, heading in breadcrumb if lvl < level] + [(level, text)]
+                if not current.blocks:
+                    current.headings = [heading for _, heading in breadcrumb]
+                text = f"{'#' * min(level + 1, 6)} {text}"
+
+            if not text.strip():
+                continue
+
+            tokens = count_tokens(text)
+            blocks = [_Block(text, tokens, page, is_heading)] if tokens <= self.max_tokens else self._split_oversized(text, page)
+
+            for block in blocks:
+                if current.blocks and current.tokens + block.tokens + 2 > self.max_tokens:
+                    # Don't strand a heading at the end of a chunk, carry it over to its content
+                    carried = current.pop_trailing_headings()
+                    flush()
+                    for heading in carried:
+                        current.add(heading)
+                current.add(block)
+
+            # The last completed chunk is held back, the trailing one may still be folded into it
+            while len(chunks) > 1:
+                yield chunks.pop(0)
+
+        flush()
+
+        # Fold a small trailing chunk into its predecessor when they fit together
+        if len(chunks) > 1 and chunks[-1].tokens < self.min_tokens and chunks[-2].tokens + chunks[-1].tokens <= self.max_tokens:
+            for block in chunks.pop().blocks:
+                chunks[-1].add(block)
+
+        yield from chunks
+
+    def _iter_document_items(self, document: DoclingDocument) -> Iterable[tuple[str, int | None, int | None]]:
+        last_page: int | None = None
+
+        for item, _ in document.iterate_items():
+            if getattr(item, "label", None) in SKIPPED_LABELS:
+                continue
+
+            page = item.prov[0].page_no if getattr(item, "prov", None) else last_page
+            last_page = page
+
+            if isinstance(item, TitleItem):
+                yield item.text, page, 0
+            elif isinstance(item, SectionHeaderItem):
+                yield item.text, page, item.level
+            else:
+                yield self._get_item_text(item, document), page, None
+
+    def _iter_text_items(self, lines: Iterable[str], markdown: bool, page_breaks: bool) -> Iterator[tuple[str, int | None, int | None]]:
+        # Paragraphs are separated by blank lines; in markdown, "#" lines outside code fences are headings.
+        # A paragraph is passed on in parts once it reaches about max_tokens, so text without blank lines is
+        # never buffered whole; parts above max_tokens are split further by _pack anyway.
+        max_paragraph_chars = self.max_tokens * CHARS_PER_TOKEN
+        page = 1
+        in_fence = False
+        body: list[str] = []
+        body_chars = 0
+
+        def flush_body():
+            nonlocal body, body_chars
+            paragraph = "\n".join(body).strip()
+            body, body_chars = [], 0
+            return paragraph
+
+        for raw_line in lines:
+            segments = raw_line.split("\f") if page_breaks else [raw_line]
+
+            for index, segment in enumerate(segments):
+                if index:
+                    # Form feed: a new page starts, and with it a new paragraph
+                    if body:
+                        yield flush_body(), page, None
+                    page += 1
+
+                line = segment.rstrip("\r\n")
+
+                if not line.strip():
+                    if body:
+                        yield flush_body(), page, None
+                    continue
+
+                if markdown:
+                    if line.lstrip().startswith("```"):
+                        in_fence = not in_fence
+                    match = None if in_fence else MARKDOWN_HEADING_PATTERN.match(line.strip())
+                    if match:
+                        if body:
+                            yield flush_body(), page, None
+                        yield match.group(2).strip(), page, len(match.group(1)) - 1
+                        continue
+
+                body.append(line)
+                body_chars += len(line)
+                if body_chars >= max_paragraph_chars:
+                    yield flush_body(), page, None
+
+        if body:
+            yield flush_body(), page, None
+
+    def chunk(self, document: DoclingDocument) -> list[CustomDocument]:
+        """
+        Walks the document tree in reading order and emits token-bounded chunks.
+        Args:
+            document (DoclingDocument): The converted document.
+        Returns:
+            list[CustomDocument]: The chunks, in reading order.
+        """
+        chunks = list(self._pack(self._iter_document_items(document)))
+        documents = [self._build_document(chunk) for chunk in chunks]
+
+        self.log.info(
+            "Docling document chunked.",
+            chunk_count=len(documents),
+            total_tokens=sum(chunk.tokens for chunk in chunks),
+        )
+
+        return documents
+
+    def iter_text_chunks(self, lines: Iterable[str], markdown: bool = False, page_breaks: bool = False) -> Iterator[CustomDocument]:
+        """
+        Chunks plain text or markdown, read line by line, with the same token bounds as Docling documents.
+        Only the paragraph and the chunks being built are held in memory.
+        Args:
+            lines (Iterable[str]): The lines of the text, with paragraphs separated by blank lines.
+            markdown (bool): Whether "#" lines are headings that start sections and form the breadcrumb.
+            page_breaks (bool): Whether form feed characters start a new page; pages are numbered from 1.
+        Returns:
+            Iterator[CustomDocument]: The chunks, in reading order.
+        """
+        for chunk in self._pack(self._iter_text_items(lines, markdown, page_breaks)):
+            yield self._build_document(chunk)
@@ -1,60 +1,100 @@
+import os
 import time
 import structlog
 
+from typing import Iterator
+from urllib.parse import urlparse
+
 from docling.datamodel.base_models import InputFormat
-from docling.datamodel.pipeline_options import PdfPipelineOptions, PictureDescriptionApiOptions, PipelineOptions
+from docling.datamodel.pipeline_options import PdfPipelineOptions, PipelineOptions
 from docling.document_converter import DocumentConverter, PdfFormatOption, WordFormatOption
-from docling_core.types.doc import ImageRefMode
+from docling_core.types.doc import DoclingDocument
 from docling.datamodel.accelerator_options import AcceleratorDevice, AcceleratorOptions
-from langchain.schema import Document
 from src.core.app_settings import get_settings
+from src.models.ingestion_report_model import IngestionReport, PageRangeReport
 from src.models.view_models.documents_view_model import CustomDocument
+from src.services.extractors.docling_chunker import DoclingDocumentChunker
+from src.services.extractors.native_file_extractor import NativeFileExtractor, open_local_path
+from src.services.extractors.pdf_prescan import IngestionProfile, PdfPrescanner
+from src.services.extractors.picture_describer import PictureDescriber
+from src.services.extractors.spreadsheet_chunker import SpreadsheetChunker
+from src.utils.get_configs import GetConfigs
 
 class DoclingFileExtractor:
     def __init__(self):
         self.app_settings = get_settings()
         self.log = structlog.get_logger(self.__class__.__name__)
+        self.configs = GetConfigs().get_configs()
+        self.native_file_extractor = NativeFileExtractor()
+        self.spreadsheet_chunker = SpreadsheetChunker()
+        self.pdf_prescanner = PdfPrescanner()
+        self.picture_describer = PictureDescriber()
+        self.document_chunker = DoclingDocumentChunker()
+        self.assumed_full_pipeline_seconds_per_page = self.configs['ingestion']['pdf_profiles']['assumed_full_pipeline_seconds_per_page']
+        # One converter per profile, so Docling's pipeline and model initialization is reused across files
+        self.converters: dict[str, DocumentConverter] = {}
+        # One report per chunked file, read by the caller after a sync
+        self.ingestion_reports: list[IngestionReport] = []
+        # Formats that need no layout model are routed to lightweight native parsers,
+        # spreadsheets are streamed row by row. Docling is reserved for PDF and DOCX.
+        self.native_routes = {
+            ".txt": self.native_file_extractor.chunk_text,
+            ".md": self.native_file_extractor.chunk_markdown,
+            ".pptx": self.native_file_extractor.chunk_pptx,
+            ".csv": self.spreadsheet_chunker.chunk_csv,
+            ".xlsx": self.spreadsheet_chunker.chunk_xlsx,
+        }
+        # Text, markdown and spreadsheets can also be streamed chunk by chunk, see iter_file_batches
+        self.streaming_routes = {
+            ".txt": self.native_file_extractor.iter_text,
+            ".md": self.native_file_extractor.iter_markdown,
+            ".csv": self.spreadsheet_chunker.iter_csv,
+            ".xlsx": self.spreadsheet_chunker.iter_xlsx,
+        }
     
-    def __get_pic_desc_api_opts(self) -> PictureDescriptionApiOptions:
-        picture_desc_api_option = PictureDescriptionApiOptions(
-            url=self.app_settings.AZURE_OPENAI_GPT_4O_FULL_ENDPOINT,
-            prompt="Describe this image in sentences in a single paragraph.",
-            params={
-                "model": self.app_settings.AZURE_OPENAI_GPT_4O_MODEL,
-                "max_tokens": 200,
-                "temperature": 0.5
-            },
-            headers={
-                "api-key": self.app_settings.AZURE_OPENAI_API_KEY,
-            },
-            timeout=90,
-        )
-        
-        return picture_desc_api_option
-    
-    def __get_pdf_pipeline_options(self) -> PdfPipelineOptions:
+    def __get_pdf_pipeline_options(self, profile: IngestionProfile) -> PdfPipelineOptions:
         # Set device to CUDA for GPU usage
         accelerator_options = AcceleratorOptions(num_threads=8, device=AcceleratorDevice.CUDA)
         
         pipeline_options = PdfPipelineOptions()
-        pipeline_options.do_ocr = False
-        pipeline_options.do_table_structure = True
+        pipeline_options.do_ocr = profile.do_ocr
+        pipeline_options.do_table_structure = profile.do_table_structure
         pipeline_options.table_structure_options.do_cell_matching = True
-        pipeline_options.generate_picture_images = True
-        pipeline_options.do_picture_description = True
-        pipeline_options.picture_description_options = self.__get_pic_desc_api_opts()
-        pipeline_options.enable_remote_services = True
+        # Docling only renders the pictures; describing them is a separate stage, see PictureDescriber
+        pipeline_options.generate_picture_images = profile.do_picture_description
+        pipeline_options.do_picture_description = False
         pipeline_options.accelerator_options = accelerator_options
         
         return pipeline_options
+
+    def __get_converter(self, profile: IngestionProfile | None = None) -> DocumentConverter:
+        """
+        Returns the cached converter for a PDF profile, or the DOCX converter when no profile is given.
+        """
+        key = profile.name if profile else "docx"
+
+        if key not in self.converters:
+            if profile:
+                self.converters[key] = DocumentConverter(
+                    allowed_formats=[InputFormat.PDF],
+                    format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=self.__get_pdf_pipeline_options(profile))}
+                )
+            else:
+                # TXT, MD, PPTX, CSV and XLSX never reach Docling, see chunk_file.
+                self.converters[key] = DocumentConverter(
+                    allowed_formats=[InputFormat.DOCX],
+                    format_options={InputFormat.DOCX: WordFormatOption(pipeline_options=PipelineOptions())}
+                )
+
+        return self.converters[key]
     
-    def __get_file_markdown(self, file_url: str) -> str:
+    def __convert_document(self, file_url: str) -> DoclingDocument:
         """
-        Converts a file at the given URL to Markdown using Docling.
+        Converts a non-PDF file (DOCX) at the given URL with Docling.
         Args:
             file_url (str): Path or URL to the file.
         Returns:
-            str: Markdown representation of the file.
+            DoclingDocument: The converted document.
         Raises:
             ValueError, Exception
         """
@@ -64,21 +104,7 @@ class DoclingFileExtractor:
         
         self.log.info("Starting document conversion.", file_url=file_url)
 
-        # For now, we will only support PDF files. In the future, we may add support for other formats.
-        doc_converter = DocumentConverter(
-            allowed_formats=[
-                InputFormat.PDF,
-                InputFormat.DOCX,
-                InputFormat.MD,
-                InputFormat.XLSX,
-                InputFormat.CSV,
-                InputFormat.ASCIIDOC,
-            ],
-            format_options={
-                InputFormat.PDF: PdfFormatOption(pipeline_options=self.__get_pdf_pipeline_options()),
-                InputFormat.DOCX: WordFormatOption(pipeline_options=PipelineOptions()),
-            }
-        )
+        doc_converter = self.__get_converter()
         
         try:
             start_time = time.time()
@@ -91,60 +117,175 @@ class DoclingFileExtractor:
             self.log.error("Document conversion failed.", error=str(e))
             raise
 
-        mark_down = conv_result.document.export_to_markdown(
-            page_break_placeholder="--- PAGE BREAK ---", 
-            image_mode=ImageRefMode.PLACEHOLDER
-        )
-        
-        self.log.info("Markdown exported successfully.", preview=mark_down[:100])
-        
-        return mark_down
-    
-    def __get_file_documents(self, mark_down: str) -> list[Document]:
+        return conv_result.document
+
+    def __chunk_pdf(self, file_url: str) -> list[CustomDocument]:
         """
-        Splits the provided markdown string into pages and creates a list of Document objects for each page.
+        Pre-scans a PDF with PyMuPDF and converts each page range with the cheapest adequate Docling profile.
         Args:
-            mark_down (str): The markdown string to be split into pages.
+            file_url (str): Path or URL to the PDF file.
         Returns:
-            list[Document]: A list of Document objects, each representing a page.
-        Raises:
-            ValueError: If the markdown string is empty or None.
+            list[CustomDocument]: Structure-aware chunks, in reading order.
         """
-        if mark_down is None or mark_down.strip() == "":
-            self.log.error("No markdown found.")
-            raise ValueError("No markdown found.")
+        documents: list[CustomDocument] = []
 
-        self.log.info("Splitting markdown into pages.")
-        
-        page_split = mark_down.split("--- PAGE BREAK ---")
-
-        documents: list[Document] = []
-        
-        self.log.info("Creating Document objects for each page.", total_pages=len(page_split))
+        # Download once; the pre-scan and every Docling conversion read the same local file
+        with open_local_path(file_url) as file_path:
+            prescan_start = time.time()
+            scans = self.pdf_prescanner.scan(file_path)
+            plans = self.pdf_prescanner.plan(scans)
+            prescan_seconds = time.time() - prescan_start
 
-        for i, page in enumerate(page_split):
-            doc = Document(
-                page_content=page.strip(),
-                metadata={"page": i + 1}
+            self.log.info(
+                "PDF ingestion plan created.",
+                file_url=file_url,
+                plan=[f"{plan.start}-{plan.end}:{plan.profile.name}" for plan in plans]
             )
-            documents.append(doc)
 
-        self.log.info("All Document objects created successfully.", document_count=len(documents))
-        
+            conversion_start = time.time()
+            picture_stats: dict[str, int] = {}
+
+            for plan in plans:
+                try:
+                    conv_result = self.__get_converter(plan.profile).convert(source=file_path, page_range=(plan.start, plan.end))
+                except Exception as e:
+                    self.log.error("Document conversion failed.", error=str(e), page_range=(plan.start, plan.end), profile=plan.profile.name)
+                    raise
+
+                if plan.profile.do_picture_description:
+                    for key, value in self.picture_describer.describe_pictures(conv_result.document).items():
+                        picture_stats[key] = picture_stats.get(key, 0) + value
+
+                # Docling keeps absolute page numbers for ranged conversions, so chunk pages stay correct
+                documents.extend(self.document_chunker.chunk(conv_result.document))
+
+            conversion_seconds = time.time() - conversion_start
+
+        # Rough comparison against an assumed, unmeasured per-page cost of the full pipeline
+        assumed_full_seconds = len(scans) * self.assumed_full_pipeline_seconds_per_page
+        profiles_used = sorted({plan.profile for plan in plans}, key=lambda p: p.rank)
+
+        report = IngestionReport(
+            file_url=file_url,
+            extractor="docling",
+            profile="+".join(profile.name for profile in profiles_used),
+            page_ranges=[PageRangeReport(start=plan.start, end=plan.end, profile=plan.profile.name) for plan in plans],
+            page_count=len(scans),
+            prescan_seconds=round(prescan_seconds, 3),
+            conversion_seconds=round(conversion_seconds, 3),
+            assumed_full_pipeline_seconds_per_page=self.assumed_full_pipeline_seconds_per_page,
+            assumed_full_pipeline_seconds=round(assumed_full_seconds, 3),
+            assumed_time_saved_seconds=round(assumed_full_seconds - prescan_seconds - conversion_seconds, 3),
+            picture_description=picture_stats,
+        )
+        self.ingestion_reports.append(report)
+
+        self.log.info("PDF ingestion completed.", **report.model_dump(exclude={"page_ranges", "picture_description"}), **picture_stats)
+
         return documents
 
+    @staticmethod
+    def get_file_extension(file_url: str) -> str:
+        """
+        Returns the lower-cased extension of a path or URL, ignoring any query string (e.g. a SAS token).
+        """
+        _, ext = os.path.splitext(urlparse(file_url).path)
+        return ext.lower()
+
     def chunk_file(self, file_url: str) -> list[CustomDocument]:
         """
         Splits a file into chunks and returns a list of Document objects.
+        Plain text, markdown and PPTX files are routed to native parsers, CSV and XLSX files to the
+        streaming spreadsheet chunker. PDFs are pre-scanned to pick a Docling profile per page range,
+        and everything else goes through Docling's default pipeline.
         Args:
             file_url (str): The path or URL to the file.
         Returns:
             list[Document]: A list of Document objects extracted from the file.
         """
-        mark_down = self.__get_file_markdown(file_url=file_url)
-        documents = self.__get_file_documents(mark_down=mark_down)
+        ext = self.get_file_extension(file_url)
+        native_route = self.native_routes.get(ext)
+
+        if native_route is not None:
+            start_time = time.time()
+            documents = native_route(file_url)
+            duration = time.time() - start_time
+            self.log.info("Native extraction completed.", file_url=file_url, duration=f"{duration:.2f} seconds")
+            self.ingestion_reports.append(IngestionReport(
+                file_url=file_url,
+                extractor="spreadsheet" if ext in (".csv", ".xlsx") else "native",
+                profile=ext.lstrip("."),
+                page_count=len(documents),
+                conversion_seconds=round(duration, 3),
+            ))
+            return documents
+
+        if ext == ".pdf":
+            return self.__chunk_pdf(file_url)
+
+        start_time = time.time()
+        documents = self.document_chunker.chunk(self.__convert_document(file_url=file_url))
+
+        if not documents:
+            self.log.error("No content found.", file_url=file_url)
+            raise ValueError("No content found.")
+
+        self.ingestion_reports.append(IngestionReport(
+            file_url=file_url,
+            extractor="docling",
+            profile=ext.lstrip("."),
+            page_count=len(documents),
+            conversion_seconds=round(time.time() - start_time, 3),
+        ))
+
+        return documents
+
+    def iter_file_batches(self, file_url: str, batch_size: int) -> Iterator[list[CustomDocument]]:
+        """
+        Yields the chunks of a file in batches of up to batch_size chunks.
+        TXT, MD, CSV and XLSX files are streamed, so a large one is never held in memory whole;
+        every other format is chunked by chunk_file and yielded as a single batch.
+        Args:
+            file_url (str): The path or URL to the file.
+            batch_size (int): The most chunks per batch.
+        Returns:
+            Iterator[list[CustomDocument]]: The batches, in reading order; at least one, possibly empty.
+        """
+        ext = self.get_file_extension(file_url)
+        streaming_route = self.streaming_routes.get(ext)
+
+        if streaming_route is None:
+            yield self.chunk_file(file_url)
+            return
+
+        # Time spent by the consumer between batches is not counted as extraction
+        duration = 0.0
+        resumed_at = time.time()
+        batch: list[CustomDocument] = []
+        chunk_count = 0
+
+        for document in streaming_route(file_url):
+            batch.append(document)
+            if len(batch) >= batch_size:
+                chunk_count += len(batch)
+                duration += time.time() - resumed_at
+                yield batch
+                resumed_at = time.time()
+                batch = []
+
+        duration += time.time() - resumed_at
+        chunk_count += len(batch)
+        if batch or not chunk_count:
+            yield batch
 
-        return [CustomDocument(page_content=doc.page_content, metadata=doc.metadata) for doc in documents]
+        self.log.info("Native extraction completed.", file_url=file_url, duration=f"{duration:.2f} seconds", document_count=chunk_count)
+        self.ingestion_reports.append(IngestionReport(
+            file_url=file_url,
+            extractor="spreadsheet" if ext in (".csv", ".xlsx") else "native",
+            profile=ext.lstrip("."),
+            page_count=chunk_count,
+            conversion_seconds=round(duration, 3),
+        ))
 
 if __name__ == "__main__":
     file_extractor = DoclingFileExtractor()
@@ -0,0 +1,181 @@
+import os
+import codecs
+import tempfile
+import requests
+import structlog
+
+from typing import IO, Iterator
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE, PP_PLACEHOLDER
+from pptx.util import Length
+from src.models.view_models.documents_view_model import CustomDocument
+from src.services.extractors.docling_chunker import DoclingDocumentChunker
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+def is_remote_source(source: str) -> bool:
+    return source.startswith("http://") or source.startswith("https://")
+
+def _iter_response_lines(response: requests.Response) -> Iterator[str]:
+    # Decoded as UTF-8 whatever the Content-Type says (blob storage often sends no charset), and split on "\n"
+    # only: iter_lines and str.splitlines also split on form feeds and Unicode line separators, which would
+    # lose page breaks and break quoted CSV fields
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+
+    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+@contextmanager
+def open_text_source(source: str) -> Iterator[Iterator[str]]:
+    """
+    Yields an iterator over the lines of a local file or URL, decoded as UTF-8, without loading it whole.
+    Lines keep their line endings.
+    """
+    if is_remote_source(source):
+        with requests.get(source, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            yield _iter_response_lines(response)
+    else:
+        with open(source, "r", encoding="utf-8", errors="replace", newline="") as f:
+            yield f
+
+@contextmanager
+def open_binary_source(source: str) -> Iterator[IO[bytes]]:
+    """
+    Yields a seekable binary file for a local file or URL. Remote files are spooled to disk.
+    """
+    if is_remote_source(source):
+        with requests.get(source, stream=True, timeout=60) as response, tempfile.SpooledTemporaryFile(max_size=STREAM_CHUNK_SIZE) as spool:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                spool.write(chunk)
+            spool.seek(0)
+            yield spool
+    else:
+        with open(source, "rb") as f:
+            yield f
+
+@contextmanager
+def open_local_path(source: str) -> Iterator[str]:
+    """
+    Yields a local file path for a local file or URL. Remote files are streamed to a temporary file
+    that is removed on exit, so libraries that need a real path never hold the whole file in memory.
+    """
+    if not is_remote_source(source):
+        yield source
+        return
+
+    _, ext = os.path.splitext(urlparse(source).path)
+
+    with tempfile.NamedTemporaryFile(suffix=ext.lower(), delete=False) as tmp:
+        try:
+            with requests.get(source, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    tmp.write(chunk)
+        except Exception:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+
+    try:
+        yield tmp.name
+    finally:
+        os.remove(tmp.name)
+
+def to_markdown_row(cells: list) -> str:
+    return "| " + " | ".join(("" if cell is None else str(cell)).replace("\n", " ").replace("|", "\\|").strip() for cell in cells) + " |"
+
+def to_markdown_separator(column_count: int) -> str:
+    return "| " + " | ".join("---" for _ in range(column_count)) + " |"
+
+class NativeFileExtractor:
+    """
+    Lightweight parsers for formats that need no layout model (TXT, MD, PPTX).
+    Each parser returns chunks in the same shape as DoclingFileExtractor: text and markdown are split
+    into token-bounded chunks like Docling documents, PPTX files into one CustomDocument per slide,
+    with the page number in metadata. Text and markdown can also be streamed chunk by chunk with
+    iter_text and iter_markdown, so a large file is never held in memory whole.
+    """
+    def __init__(self):
+        self.log = structlog.get_logger(self.__class__.__name__)
+        self.chunker = DoclingDocumentChunker()
+
+    def iter_text(self, source: str) -> Iterator[CustomDocument]:
+        """
+        Streams a plain text file line by line into token-bounded chunks. Form feed characters are treated as page breaks.
+        """
+        with open_text_source(source) as lines:
+            yield from self.chunker.iter_text_chunks(lines, page_breaks=True)
+
+    def iter_markdown(self, source: str) -> Iterator[CustomDocument]:
+        """
+        Streams a markdown file line by line into token-bounded chunks split along its headings;
+        markdown is already the format every other extractor exports to.
+        """
+        with open_text_source(source) as lines:
+            yield from self.chunker.iter_text_chunks(lines, markdown=True)
+
+    def chunk_text(self, source: str) -> list[CustomDocument]:
+        documents = list(self.iter_text(source))
+        self.log.info("Text file parsed.", source=source, document_count=len(documents))
+        return documents
+
+    def chunk_markdown(self, source: str) -> list[CustomDocument]:
+        documents = list(self.iter_markdown(source))
+        self.log.info("Markdown file parsed.", source=source, document_count=len(documents))
+        return documents
+
+    def _get_shape_markdown(self, shape) -> list[str]:
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            return [text for child in shape.shapes for text in self._get_shape_markdown(child)]
+
+        if getattr(shape, "has_table", False) and shape.has_table:
+            table_rows = [[cell.text for cell in row.cells] for row in shape.table.rows]
+            if not table_rows:
+                return []
+            return ["\n".join([to_markdown_row(table_rows[0]), to_markdown_separator(len(table_rows[0]))] + [to_markdown_row(r) for r in table_rows[1:]])]
+
+        if getattr(shape, "has_text_frame", False) and shape.has_text_frame:
+            text = "\n".join(p.text for p in shape.text_frame.paragraphs if p.text.strip())
+            if not text:
+                return []
+            if shape.is_placeholder and shape.placeholder_format.type in (PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE):
+                return [f"## {text}"]
+            return [text]
+
+        return []
+
+    def chunk_pptx(self, source: str) -> list[CustomDocument]:
+        """
+        Walks the slides of a PPTX file, one document per slide, including tables and speaker notes.
+        """
+        documents: list[CustomDocument] = []
+
+        with open_binary_source(source) as f:
+            presentation = Presentation(f)
+
+            for slide_number, slide in enumerate(presentation.slides, start=1):
+                # Keep reading order top-to-bottom, left-to-right
+                shapes = sorted(slide.shapes, key=lambda s: (s.top or Length(0), s.left or Length(0)))
+                parts = [text for shape in shapes for text in self._get_shape_markdown(shape)]
+
+                if slide.has_notes_slide and slide.notes_slide.notes_text_frame is not None:
+                    notes = slide.notes_slide.notes_text_frame.text.strip()
+                    if notes:
+                        parts.append(f"Notes: {notes}")
+
+                documents.append(CustomDocument(page_content="\n\n".join(parts).strip(), metadata={"page": slide_number}))
+
+        self.log.info("PPTX file parsed.", source=source, document_count=len(documents))
+
+        return [doc for doc in documents if doc.page_content]
@@ -1,14 +1,38 @@
+import os
 import json
+import mmap
+import asyncio
+import fitz # From PyMuPDF for PDF processing
 import pdfplumber
-import requests
 import structlog
 
-from src.services.prompts.prompting import doc_analyse_prompt
+from concurrent.futures import ProcessPoolExecutor
+from src.services.extractors.native_file_extractor import open_local_path
+from src.services.prompts.prompting import table_cleaning_prompt
+from src.utils.get_configs import GetConfigs
+from src.utils.hash_cache import HashCache
 from typing import List
-from io import BytesIO
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+def _extract_page_range(file_path: str, start: int, end: int) -> List[tuple[int, str, List[str]]]:
+    """
+    Worker process entry point: extracts text and normalized tables from pages [start, end).
+    The file is memory-mapped, so pages are read from the page cache instead of a private copy.
+    """
+    pages = []
+
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with pdfplumber.open(mapped, pages=list(range(start + 1, end + 1))) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text()
+                tables = [ChunkPDF._normalize_table(table) for table in page.extract_tables()]
+                pages.append((page.page_number, text, tables))
+                # Release the page's parsed layout before moving on
+                page.close()
+
+    return pages
+
 class ChunkPDF:
     """
     ChunkPDF is a utility class for processing and chunking PDF documents from a given URL.
@@ -16,46 +40,72 @@ class ChunkPDF:
     pretty-prints the JSON, and splits both text and tables into manageable chunks for further processing.
         azOpenA_llm: An instance of an LLM (Large Language Model) interface used for table analysis.
     Methods:
-        _jsonify_tables(tables: List[List[List[str | None]]]) -> list[str | dict]:
-            Converts extracted tables from the PDF into a JSON format using the LLM.
+        _normalize_table(table: List[List[str | None]]) -> str:
+            Flattens an extracted table into pipe-separated rows; this text is also the cache key.
+        _ajsonify_tables(table_texts: List[str]) -> List[str]:
+            Converts the tables of the whole PDF into JSON with the LLM, concurrently and through a table-hash cache.
         _pretty_print_json(json_data: str) -> str:
             Formats JSON strings for better readability, removing code block markers if present.
-        _extract_text_from_pdf(url: str) -> List[Document]:
-            Downloads the PDF from the given URL, extracts text and tables from each page,
-            and returns a list of Document objects containing the extracted content.
+        _extract_text_from_pdf(url: str) -> List[tuple[int, str, List[str]]]:
+            Spools the PDF from the given URL to a temporary file and extracts the text and normalized
+            tables of its pages in worker processes, keeping page order.
         _split_texts(documents: List[Document]) -> List[Document]:
             Splits the extracted text and table content into smaller chunks using recursive character splitting.
-        chunk_pdf(url: str) -> List[Document]:
+        achunk_pdf(url: str) -> List[Document]:
             Main method to process a PDF from a URL, extracting and chunking its content.
             Returns a list of Document objects containing both text and tables.
+        chunk_pdf(url: str) -> List[Document]:
+            Synchronous wrapper around achunk_pdf.
     """
     
     
     def __init__(self, azOpenA_llm):
         self.azOpenA_llm = azOpenA_llm
         self.log = structlog.get_logger(self.__class__.__name__)
-        
-    def _jsonify_tables(self, tables: List[List[List[str | None]]]) -> list[str | dict]:
-        tables_json = []
-        
-        for idx, table in enumerate(tables):
-            rows = ""
-            
-            for row in table:
-                filtered_row = [col for col in row if col not in ('', None)]
-                final_row = " | ".join([x.strip().replace('\n', '') for x in filtered_row])
-                rows += final_row + "\n"
-            
-            chain = doc_analyse_prompt | self.azOpenA_llm
-            self.log.debug("Invoking LLM for table analysis", table_index=idx)
-            
-            response = chain.invoke({
-                "table_content": rows
-            })
-            
-            tables_json.append(response.content)
-        
-        return tables_json
+        self.max_concurrency = GetConfigs().get_configs()['ingestion']['table_cleaning']['max_concurrency']
+        self.table_cache = HashCache("table_json")
+        extraction_configs = GetConfigs().get_configs()['ingestion']['pdf_extraction']
+        self.max_workers = extraction_configs['max_workers'] or os.cpu_count() or 1
+        self.pages_per_task = extraction_configs['pages_per_task']
+
+    @staticmethod
+    def _normalize_table(table: List[List[str | None]]) -> str:
+        rows = ""
+
+        for row in table:
+            filtered_row = [col for col in row if col not in ('', None)]
+            final_row = " | ".join([x.strip().replace('\n', '') for x in filtered_row])
+            rows += final_row + "\n"
+
+        return rows
+
+    async def _ajsonify_tables(self, table_texts: List[str]) -> List[str]:
+        """
+        Cleans every table of the document into JSON with the LLM.
+        Identical tables (repeated headers and footers, re-ingested documents) are sent once,
+        and tables seen before are served from the persistent table-hash cache.
+        """
+        # Whitespace differences from the PDF layout don't change a table, so they don't change its key
+        hashes = [HashCache.hash_text(" ".join(text.split())) for text in table_texts]
+        results = self.table_cache.get_many(list(set(hashes)))
+
+        # One LLM call per distinct table that is not cached yet
+        missing = {table_hash: text for table_hash, text in zip(hashes, table_texts) if table_hash not in results}
+
+        self.log.info("Cleaning tables", tables=len(table_texts), unique=len(set(hashes)), llm_calls=len(missing))
+
+        if missing:
+            chain = table_cleaning_prompt | self.azOpenA_llm
+            responses = await chain.abatch(
+                [{"table_content": text} for text in missing.values()],
+                config={"max_concurrency": self.max_concurrency}
+            )
+
+            for table_hash, response in zip(missing.keys(), responses):
+                self.table_cache.set(table_hash, response.content)
+                results[table_hash] = response.content
+
+        return [results[table_hash] for table_hash in hashes]
     
     def _pretty_print_json(self, json_data: str) -> str:
         content = json_data
@@ -74,29 +124,29 @@ class ChunkPDF:
         except Exception:
             return content.strip()
         
-    def _extract_text_from_pdf(self, url: str) -> List[Document]:
-        response = requests.get(url)
-        response.raise_for_status()
-
-        with pdfplumber.open(BytesIO(response.content)) as pdf:
-            doucments = []
+    def _extract_text_from_pdf(self, url: str) -> List[tuple[int, str, List[str]]]:
+        # Stream the download to disk instead of holding the whole PDF in memory
+        with open_local_path(url) as file_path:
+            with fitz.open(file_path) as doc:
+                page_count = doc.page_count
 
-            for page in pdf.pages:
-                text = page.extract_text()
-                tables = page.extract_tables()
+            page_ranges = [(start, min(start + self.pages_per_task, page_count)) for start in range(0, page_count, self.pages_per_task)]
 
-                # JSONify the tables. This will convert the tables into a JSON format that can be processed
-                j_tables = self._jsonify_tables(tables)
+            self.log.info("Extracting PDF pages", page_count=page_count, tasks=len(page_ranges), max_workers=self.max_workers)
 
-                # Pretty print the JSON tables. This will format the JSON tables for better readability
-                pretty_tables = [self._pretty_print_json(tbl) for tbl in j_tables] if j_tables else []
+            if len(page_ranges) <= 1:
+                return [page for start, end in page_ranges for page in _extract_page_range(file_path, start, end)]
 
-                # Add text to the documents list
-                doucments.append(Document(page_content=text, metadata={"page": page.page_number}))
-                # Add the pretty printed tables to the documents list
-                [doucments.append(Document(page_content=pt, metadata={"page": page.page_number, "table": True})) for pt in pretty_tables if pt]
-                
-        return doucments
+            # pdfplumber's text and table extraction is CPU bound, so pages are fanned out to processes.
+            # map() returns results in submission order, which keeps the pages in order.
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(page_ranges))) as pool:
+                results = pool.map(
+                    _extract_page_range,
+                    [file_path] * len(page_ranges),
+                    [start for start, _ in page_ranges],
+                    [end for _, end in page_ranges],
+                )
+                return [page for page_batch in results for page in page_batch]
     
     def _split_texts(self, documents: List[Document]) -> List[Document]:
         table_lengths = [len(doc.page_content) for doc in documents if doc.metadata.get("table")]
@@ -130,7 +180,7 @@ class ChunkPDF:
 
         return splitted_docs
     
-    def chunk_pdf(self, url: str) -> List[Document]:
+    async def achunk_pdf(self, url: str) -> List[Document]:
         """
         Main method to chunk a PDF document from a given URL.
         
@@ -140,5 +190,28 @@ class ChunkPDF:
         Returns:
             List[Document]: A list of Document objects containing the text and tables from the PDF.
         """
-        documents = self._extract_text_from_pdf(url)
+        # Extraction blocks on I/O and worker processes, keep it off the event loop
+        pages = await asyncio.to_thread(self._extract_text_from_pdf, url)
+
+        # Tables of all pages are cleaned together so the LLM calls can run concurrently
+        j_tables = await self._ajsonify_tables([table for _, _, tables in pages for table in tables])
+        j_tables_iter = iter(j_tables)
+
+        documents = []
+
+        for page_number, text, tables in pages:
+            # Pretty print the JSON tables. This will format the JSON tables for better readability
+            pretty_tables = [self._pretty_print_json(next(j_tables_iter)) for _ in tables]
+
+            # Add text to the documents list
+            documents.append(Document(page_content=text, metadata={"page": page_number}))
+            # Add the pretty printed tables to the documents list
+            documents.extend(Document(page_content=pt, metadata={"page": page_number, "table": True}) for pt in pretty_tables if pt)
+
         return self._split_texts(documents)
+
+    def chunk_pdf(self, url: str) -> List[Document]:
+        """
+        Synchronous wrapper around achunk_pdf for callers without an event loop.
+        """
+        return asyncio.run(self.achunk_pdf(url))
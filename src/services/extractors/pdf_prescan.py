@@ -0,0 +1,120 @@
+import time
+import fitz # From PyMuPDF for PDF processing
+import structlog
+
+from dataclasses import dataclass
+from src.utils.get_configs import GetConfigs
+
+@dataclass(frozen=True)
+class IngestionProfile:
+    """
+    A Docling PDF pipeline configuration, from cheapest to most expensive.
+    """
+    name: str
+    rank: int
+    do_table_structure: bool
+    do_picture_description: bool
+    do_ocr: bool
+
+TEXT_ONLY = IngestionProfile("text_only", 0, do_table_structure=False, do_picture_description=False, do_ocr=False)
+TABLES = IngestionProfile("tables", 1, do_table_structure=True, do_picture_description=False, do_ocr=False)
+TABLES_IMAGES = IngestionProfile("tables_images", 2, do_table_structure=True, do_picture_description=True, do_ocr=False)
+# Used only for the page ranges without a text layer
+OCR = IngestionProfile("ocr", 3, do_table_structure=True, do_picture_description=False, do_ocr=True)
+
+@dataclass
+class PageScan:
+    page_no: int
+    text_chars: int
+    table_count: int
+    image_count: int
+    has_text_layer: bool
+
+@dataclass
+class PageRangePlan:
+    start: int
+    end: int
+    profile: IngestionProfile
+
+class PdfPrescanner:
+    """
+    Measures the text layer, tables and images of every page of a PDF with PyMuPDF,
+    then picks the cheapest Docling profile that still covers what each page contains.
+    """
+    def __init__(self):
+        self.log = structlog.get_logger(self.__class__.__name__)
+        configs = GetConfigs().get_configs()['ingestion']['pdf_prescan']
+        self.min_text_chars = configs['min_text_chars']
+        self.min_image_area_ratio = configs['min_image_area_ratio']
+
+    def scan(self, file_path: str) -> list[PageScan]:
+        """
+        Scans every page of a local PDF file.
+        Args:
+            file_path (str): Path to the PDF file.
+        Returns:
+            list[PageScan]: One entry per page, in page order.
+        """
+        start_time = time.time()
+        scans: list[PageScan] = []
+
+        with fitz.open(file_path) as doc:
+            for page in doc:
+                text_chars = len(page.get_text("text").strip())
+                page_area = abs(page.rect) or 1.0
+
+                # Icons and bullets are ignored, only images covering a meaningful part of the page count
+                image_count = sum(
+                    1 for info in page.get_image_info()
+                    if abs(fitz.Rect(info["bbox"])) / page_area >= self.min_image_area_ratio
+                )
+
+                has_text_layer = text_chars >= self.min_text_chars
+                # Table detection needs a text layer; scanned pages get their tables from the OCR profile
+                table_count = len(page.find_tables().tables) if has_text_layer else 0
+
+                scans.append(PageScan(
+                    page_no=page.number + 1,
+                    text_chars=text_chars,
+                    table_count=table_count,
+                    image_count=image_count,
+                    has_text_layer=has_text_layer,
+                ))
+
+        self.log.info("PDF pre-scan completed.", pages=len(scans), duration=f"{time.time() - start_time:.2f} seconds")
+
+        return scans
+
+    @staticmethod
+    def choose_page_profile(scan: PageScan) -> IngestionProfile:
+        if not scan.has_text_layer:
+            return OCR
+        if scan.image_count:
+            return TABLES_IMAGES
+        if scan.table_count:
+            return TABLES
+        return TEXT_ONLY
+
+    def plan(self, scans: list[PageScan]) -> list[PageRangePlan]:
+        """
+        Builds the conversion plan: pages with a text layer share one document-level profile
+        (the most demanding one they need), and OCR is limited to runs of pages without text.
+        """
+        if not scans:
+            return []
+
+        page_profiles = [self.choose_page_profile(scan) for scan in scans]
+        text_profiles = [profile for profile in page_profiles if profile is not OCR]
+        document_profile = max(text_profiles, key=lambda p: p.rank) if text_profiles else OCR
+
+        plans: list[PageRangePlan] = []
+
+        for scan, page_profile in zip(scans, page_profiles):
+            profile = OCR if page_profile is OCR else document_profile
+
+            if plans and plans[-1].profile is profile and plans[-1].end == scan.page_no - 1:
+                plans[-1].end = scan.page_no
+            else:
+                plans.append(PageRangePlan(start=scan.page_no, end=scan.page_no, profile=profile))
+
+        return plans
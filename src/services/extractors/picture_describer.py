@@ -0,0 +1,126 @@
+import io
+import base64
+import hashlib
+import requests
+import structlog
+
+from concurrent.futures import ThreadPoolExecutor
+from docling_core.types.doc import DoclingDocument, PictureItem
+from docling_core.types.doc.document import PictureDescriptionData
+from src.core.app_settings import get_settings
+from src.utils.get_configs import GetConfigs
+from src.utils.hash_cache import HashCache
+
+class PictureDescriber:
+    """
+    Describes the pictures of a converted Docling document with GPT-4o, as a stage of its own.
+    Pictures are hashed so duplicates (logos, icons repeated on every page) are described once,
+    descriptions are cached on disk by hash, and API calls run with bounded concurrency.
+    Pictures below the configured size or entropy are skipped.
+    """
+    def __init__(self):
+        self.log = structlog.get_logger(self.__class__.__name__)
+        self.app_settings = get_settings()
+        self.configs = GetConfigs().get_configs()['ingestion']['picture_description']
+        self.cache = HashCache("picture_descriptions")
+
+    @staticmethod
+    def _hash_image(image) -> str:
+        # Hash the decoded pixels so the same picture embedded with different encodings still matches
+        digest = hashlib.sha256(f"{image.mode}:{image.size}".encode("utf-8"))
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def _should_skip(self, image) -> bool:
+        width, height = image.size
+        if width < self.configs['min_size_px'] or height < self.configs['min_size_px']:
+            return True
+        # Flat images (blank areas, separators, solid logos) carry too little information to describe
+        return image.convert("L").entropy() < self.configs['min_entropy']
+
+    def _describe(self, image) -> str:
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        image_b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+        response = requests.post(
+            self.app_settings.AZURE_OPENAI_GPT_4O_FULL_ENDPOINT,
+            headers={"api-key": self.app_settings.AZURE_OPENAI_API_KEY},
+            json={
+                "model": self.app_settings.AZURE_OPENAI_GPT_4O_MODEL,
+                "max_tokens": 200,
+                "temperature": 0.5,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": self.configs['prompt']},
+                            {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_b64}"}},
+                        ],
+                    }
+                ],
+            },
+            timeout=self.configs['timeout'],
+        )
+        response.raise_for_status()
+
+        return response.json()["choices"][0]["message"]["content"].strip()
+
+    def describe_pictures(self, document: DoclingDocument) -> dict:
+        """
+        Adds a description annotation to every eligible picture of the document, in place.
+        Args:
+            document (DoclingDocument): A document converted with picture images generated.
+        Returns:
+            dict: Counts of pictures found, skipped, unique, served from cache and described through the API.
+        """
+        pictures_by_hash: dict[str, list[PictureItem]] = {}
+        images_by_hash = {}
+        skipped = 0
+
+        for picture in document.pictures:
+            image = picture.get_image(document)
+
+            if image is None or self._should_skip(image):
+                skipped += 1
+                continue
+
+            image_hash = self._hash_image(image)
+            pictures_by_hash.setdefault(image_hash, []).append(picture)
+            images_by_hash.setdefault(image_hash, image)
+
+        descriptions = self.cache.get_many(list(pictures_by_hash.keys()))
+        missing = [image_hash for image_hash in pictures_by_hash if image_hash not in descriptions]
+
+        def describe_one(image_hash: str) -> None:
+            try:
+                description = self._describe(images_by_hash[image_hash])
+            except Exception as e:
+                # A failed description only loses the annotation, not the document
+                self.log.error("Picture description failed.", error=str(e), image_hash=image_hash)
+                return
+            self.cache.set(image_hash, description)
+            descriptions[image_hash] = description
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(self.configs['max_concurrency'], 1)) as pool:
+                list(pool.map(describe_one, missing))
+
+        for image_hash, pictures in pictures_by_hash.items():
+            description = descriptions.get(image_hash)
+            if not description:
+                continue
+            for picture in pictures:
+                picture.annotations.append(PictureDescriptionData(text=description, provenance=self.app_settings.AZURE_OPENAI_GPT_4O_MODEL))
+
+        stats = {
+            "pictures": len(document.pictures),
+            "skipped": skipped,
+            "unique": len(pictures_by_hash),
+            "cache_hits": len(pictures_by_hash) - len(missing),
+            "described": sum(1 for image_hash in missing if image_hash in descriptions),
+        }
+
+        self.log.info("Picture description completed.", **stats)
+
+        return stats
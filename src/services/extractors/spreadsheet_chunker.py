@@ -0,0 +1,106 @@
+import csv
+import structlog
+
+from typing import Iterable, Iterator
+from openpyxl import load_workbook
+from src.models.view_models.documents_view_model import CustomDocument
+from src.services.extractors.native_file_extractor import open_binary_source, open_text_source, to_markdown_row, to_markdown_separator
+from src.utils.get_configs import GetConfigs
+from src.utils.token_counter import count_tokens
+
+class SpreadsheetChunker:
+    """
+    Streams XLSX and CSV rows and groups them into token-bounded markdown table chunks.
+    Every chunk repeats the header row, and its metadata records the sheet and row range.
+    Only the rows of the chunk being built are held in memory, whatever the size of the file.
+    """
+    def __init__(self, max_chunk_tokens: int | None = None):
+        self.log = structlog.get_logger(self.__class__.__name__)
+        configs = GetConfigs().get_configs()
+        self.max_chunk_tokens = max_chunk_tokens or configs['ingestion']['spreadsheet']['max_chunk_tokens']
+
+    @staticmethod
+    def _is_empty(row: Iterable) -> bool:
+        return all(cell is None or str(cell).strip() == "" for cell in row)
+
+    def _iter_row_groups(self, rows: Iterator[tuple[int, list]], metadata: dict) -> Iterator[CustomDocument]:
+        """
+        Groups (row_number, cells) pairs into chunks. The first non-empty row is used as the header.
+        """
+        header_md = None
+        header_tokens = 0
+        header_row = 0
+        chunk_rows: list[str] = []
+        chunk_tokens = 0
+        row_start = row_end = 0
+
+        def build_chunk() -> CustomDocument:
+            return CustomDocument(
+                page_content="\n".join([header_md] + chunk_rows),
+                metadata={**metadata, "row_start": row_start, "row_end": row_end, "token_count": header_tokens + chunk_tokens},
+            )
+
+        for row_number, cells in rows:
+            if self._is_empty(cells):
+                continue
+
+            if header_md is None:
+                header_md = to_markdown_row(cells) + "\n" + to_markdown_separator(len(cells))
+                header_tokens = count_tokens(header_md)
+                header_row = row_number
+                continue
+
+            row_md = to_markdown_row(cells)
+            row_tokens = count_tokens(row_md) + 1  # +1 for the joining newline
+
+            # Close the current chunk when this row would push it past the budget.
+            # A single row larger than the budget still becomes its own chunk.
+            if chunk_rows and header_tokens + chunk_tokens + row_tokens > self.max_chunk_tokens:
+                yield build_chunk()
+                chunk_rows, chunk_tokens = [], 0
+
+            if not chunk_rows:
+                row_start = row_number
+
+            chunk_rows.append(row_md)
+            chunk_tokens += row_tokens
+            row_end = row_number
+
+        if chunk_rows:
+            yield build_chunk()
+        elif header_md is not None:
+            # Header-only sheet: keep it so the column names remain searchable
+            yield CustomDocument(page_content=header_md, metadata={**metadata, "row_start": header_row, "row_end": header_row, "token_count": header_tokens})
+
+    def iter_xlsx(self, source: str) -> Iterator[CustomDocument]:
+        """
+        Streams every sheet of an XLSX workbook with openpyxl in read-only mode.
+        """
+        with open_binary_source(source) as f:
+            workbook = load_workbook(f, read_only=True, data_only=True)
+
+            try:
+                for sheet_index, sheet in enumerate(workbook.worksheets, start=1):
+                    rows = ((row_number, list(cells)) for row_number, cells in enumerate(sheet.iter_rows(values_only=True), start=1))
+                    yield from self._iter_row_groups(rows, {"page": sheet_index, "sheet": sheet.title})
+            finally:
+                # Read-only workbooks keep the archive open until closed
+                workbook.close()
+
+    def iter_csv(self, source: str) -> Iterator[CustomDocument]:
+        """
+        Streams a CSV file with the csv module.
+        """
+        with open_text_source(source) as lines:
+            rows = ((row_number, cells) for row_number, cells in enumerate(csv.reader(lines), start=1))
+            yield from self._iter_row_groups(rows, {"page": 1})
+
+    def chunk_xlsx(self, source: str) -> list[CustomDocument]:
+        documents = list(self.iter_xlsx(source))
+        self.log.info("XLSX file chunked.", source=source, document_count=len(documents))
+        return documents
+
+    def chunk_csv(self, source: str) -> list[CustomDocument]:
+        documents = list(self.iter_csv(source))
+        self.log.info("CSV file chunked.", source=source, document_count=len(documents))
+        return documents
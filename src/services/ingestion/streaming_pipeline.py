@@ -0,0 +1,298 @@
+import time
+import asyncio
+import structlog
+
+from dataclasses import dataclass
+from typing import Callable
+from langchain.schema import Document
+from langchain_community.vectorstores import FAISS
+from src.models.view_models.documents_view_model import DocumentChunkViewModel, BlobManifestEntry
+from src.services.azure.cosmos import CosmosService
+from src.services.extractors.docling_file_extractor import DoclingFileExtractor
+from src.services.vectorstores.faiss_store import FaissService
+from src.services.vectorstores.near_duplicate_filter import NearDuplicateFilter
+from src.services.vectorstores.context_builder import get_tiny_corpus_max_tokens
+from src.utils.get_configs import GetConfigs
+
+# Put on a queue by a stage once it has produced its last item
+_END = object()
+
+@dataclass
+class StageStats:
+    items: int = 0
+    busy_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "items_per_second": round(self.items / self.busy_seconds, 2) if self.busy_seconds else 0.0,
+        }
+
+class StreamingIngestionPipeline:
+    """
+    Ingests a product as stages connected by bounded queues:
+    extract (one file at a time) -> persist (Cosmos bulk upserts) -> embed (near-duplicate filter,
+    batched embedding calls) -> index (FAISS).
+    The chunks of the first file are embedded while later files are still converting, and a full
+    queue blocks the stage feeding it, so memory stays bounded however large the product is.
+    Chunks already persisted for the product are streamed from Cosmos into the embed stage alongside
+    the new ones; only those missing from the saved index are embedded.
+    """
+    def __init__(self, client_id: str, product_id: str, progress: Callable[[dict], None] | None = None):
+        self.log = structlog.get_logger(self.__class__.__name__)
+        configs = GetConfigs().get_configs()['ingestion']['pipeline']
+        self.queue_size = configs['queue_size']
+        self.embed_batch_size = configs['embed_batch_size']
+        self.progress_interval_seconds = configs['progress_interval_seconds']
+        self.tiny_corpus_max_tokens = get_tiny_corpus_max_tokens(GetConfigs().get_configs()['chat_context'])
+        self.client_id = client_id
+        self.product_id = product_id
+        self.progress = progress
+        self._progress_reported_at = float("-inf")
+        self._progress_in_flight = False
+        self.cosmos_service = CosmosService()
+        self.faiss_service = FaissService()
+        self.extractor = DoclingFileExtractor()
+        self.near_duplicate_filter = NearDuplicateFilter()
+        self.stats = {stage: StageStats() for stage in ("extract", "persist", "embed", "index")}
+        # Manifest entries of the files extracted by this run
+        self.manifest: list[BlobManifestEntry] = []
+        self.existing_store: FAISS | None = None
+        self.new_store: FAISS | None = None
+        self.indexed_ids: set[str] = set()
+        self.seen_ids: set[str] = set()
+        self.representative_metadata: dict[str, dict] = {}
+
+    async def _report_progress(self, stage: str) -> None:
+        # The callback may write to the job queue's SQLite file and wait on its lock, so it runs in a worker thread,
+        # at most once per interval and never twice at a time; skipped reports are covered by the next one
+        now = time.monotonic()
+        if not self.progress or self._progress_in_flight or now - self._progress_reported_at < self.progress_interval_seconds:
+            return
+
+        self._progress_in_flight = True
+        self._progress_reported_at = now
+        try:
+            await asyncio.to_thread(self.progress, {"stage": stage, "stages": {name: stats.to_dict() for name, stats in self.stats.items()}})
+        finally:
+            self._progress_in_flight = False
+
+    async def _extract(self, files: list[dict], out_queue: asyncio.Queue) -> None:
+        for blob in files:
+            batches = self.extractor.iter_file_batches(blob["url"], self.embed_batch_size)
+            ordinal = 0
+
+            while True:
+                start = time.perf_counter()
+                # Conversion is CPU-bound; a worker thread keeps the event loop free for the other stages.
+                # Streamed formats (text, markdown, spreadsheets) arrive in several batches, persisted while the rest is still read
+                chunks = await asyncio.to_thread(next, batches, None)
+                self.stats["extract"].busy_seconds += time.perf_counter() - start
+
+                if chunks is None:
+                    break
+
+                await out_queue.put((blob, chunks, ordinal))
+                ordinal += len(chunks)
+
+            self.stats["extract"].items += 1
+            # Marks the file as complete, so persist records it in the manifest
+            await out_queue.put((blob, None, ordinal))
+
+        await out_queue.put(_END)
+
+    async def _persist(self, in_queue: asyncio.Queue, out_queue: asyncio.Queue) -> None:
+        chunk_ids: dict[str, list[str]] = {}
+
+        while (item := await in_queue.get()) is not _END:
+            blob, chunks, first_ordinal = item
+
+            if chunks is None:
+                self.manifest.append(
+                    BlobManifestEntry(
+                        blob_name=blob["name"],
+                        etag=blob["etag"],
+                        last_modified=blob["last_modified"],
+                        chunk_ids=chunk_ids.pop(blob["name"], [])
+                    )
+                )
+                continue
+
+            start = time.perf_counter()
+
+            chunk_items = [
+                DocumentChunkViewModel(
+                    **chunk.model_dump(exclude={"id", "metadata"}),
+                    id=DocumentChunkViewModel.build_id(blob["name"], blob["etag"], ordinal),
+                    metadata={**chunk.metadata, "source": blob["name"]},
+                    client_id=self.client_id,
+                    product_id=self.product_id
+                ).model_dump()
+                for ordinal, chunk in enumerate(chunks, start=first_ordinal)
+            ]
+
+            await self.cosmos_service.bulk_upsert_items_async("document-chunks", chunk_items, partition_key=self.product_id)
+
+            chunk_ids.setdefault(blob["name"], []).extend(chunk["id"] for chunk in chunk_items)
+            self.stats["persist"].busy_seconds += time.perf_counter() - start
+            self.stats["persist"].items += len(chunk_items)
+            await self._report_progress("persist")
+
+            for i in range(0, len(chunk_items), self.embed_batch_size):
+                await out_queue.put([
+                    Document(id=chunk["id"], page_content=chunk["page_content"], metadata=chunk["metadata"])
+                    for chunk in chunk_items[i:i + self.embed_batch_size]
+                ])
+
+        await out_queue.put(_END)
+
+    async def _stream_persisted(self, skipped_sources: set[str], out_queue: asyncio.Queue) -> None:
+        # Chunks written by this run are skipped; they reach the embed stage through the persist stage
+        async for items, _ in self.cosmos_service.query_items_paged_async(
+            "document-chunks",
+            "SELECT c.id, c.page_content, c.metadata FROM c WHERE c.client_id = @client_id AND c.product_id = @product_id",
+            [
+                {"name": "@client_id", "value": self.client_id},
+                {"name": "@product_id", "value": self.product_id}
+            ],
+            partition_key=self.product_id,
+            page_size=self.embed_batch_size
+        ):
+            documents = [
+                Document(id=item["id"], page_content=item["page_content"], metadata=item["metadata"])
+                for item in items if item["metadata"].get("source") not in skipped_sources
+            ]
+            if documents:
+                await out_queue.put(documents)
+
+        await out_queue.put(_END)
+
+    def _select_for_embedding(self, documents: list[Document]) -> list[Document]:
+        # Called under the embed stage's filter lock, so the queues' consumers take turns on the shared filter state
+        documents_to_embed = []
+
+        for doc in documents:
+            if doc.id in self.seen_ids:
+                continue
+            self.seen_ids.add(doc.id)
+
+            # Indexed chunks keep representing their clusters, whichever queue delivers first
+            if self.near_duplicate_filter.add(doc, preferred=doc.id in self.indexed_ids) is not None:
+                continue
+
+            self.representative_metadata[doc.id] = doc.metadata
+            if doc.id not in self.indexed_ids:
+                documents_to_embed.append(doc)
+
+        return documents_to_embed
+
+    async def _embed(self, in_queues: list[asyncio.Queue], out_queue: asyncio.Queue) -> None:
+        # One consumer per queue: new chunks are embedded while persisted ones are still streaming from Cosmos
+        filter_lock = asyncio.Lock()
+
+        async def consume(in_queue: asyncio.Queue) -> None:
+            while (documents := await in_queue.get()) is not _END:
+                async with filter_lock:
+                    documents_to_embed = self._select_for_embedding(documents)
+
+                if not documents_to_embed:
+                    continue
+
+                start = time.perf_counter()
+                embeddings = await self.faiss_service.aembed_documents(documents_to_embed)
+                self.stats["embed"].busy_seconds += time.perf_counter() - start
+                self.stats["embed"].items += len(documents_to_embed)
+
+                await out_queue.put((documents_to_embed, embeddings))
+
+        await asyncio.gather(*(consume(in_queue) for in_queue in in_queues))
+        await out_queue.put(_END)
+
+    async def _index(self, in_queue: asyncio.Queue) -> None:
+        while (item := await in_queue.get()) is not _END:
+            documents, embeddings = item
+            start = time.perf_counter()
+
+            self.new_store = self.faiss_service.add_embeddings(self.new_store, documents, embeddings)
+
+            self.stats["index"].busy_seconds += time.perf_counter() - start
+            self.stats["index"].items += len(documents)
+            await self._report_progress("index")
+
+    def _save_index(self) -> dict:
+        if not self.representative_metadata:
+            self.log.error("No chunks found to vectorize", client_id=self.client_id, product_id=self.product_id)
+            raise LookupError("No chunks found for the client and product.")
+
+        # New chunks that lost their cluster to an indexed chunk arriving later are dropped, even if already embedded
+        replaced_ids = list(self.near_duplicate_filter.replaced)
+        for doc_id in replaced_ids:
+            self.representative_metadata.pop(doc_id, None)
+        if self.new_store is not None:
+            new_ids = self.faiss_service.get_indexed_ids(self.new_store)
+            self.faiss_service.delete_documents(self.new_store, [doc_id for doc_id in replaced_ids if doc_id in new_ids])
+
+        # Indexes built before chunk IDs were used as docstore IDs share none of them; everything was embedded anew
+        if self.existing_store and self.indexed_ids & self.representative_metadata.keys():
+            ids_to_remove = list(self.indexed_ids - self.representative_metadata.keys())
+            self.faiss_service.delete_documents(self.existing_store, ids_to_remove)
+            vector_store = self.faiss_service.merge_vector_stores(self.existing_store, self.new_store)
+        else:
+            ids_to_remove = []
+            vector_store = self.new_store
+
+        # Duplicates found after a representative was embedded are attached to its metadata without re-embedding
+        for doc_id, metadata in self.representative_metadata.items():
+            metadata["duplicate_sources"] = self.near_duplicate_filter.duplicate_sources.get(doc_id, [])
+        refreshed = self.faiss_service.refresh_metadata(vector_store, self.representative_metadata)
+
+        self.faiss_service.save_vector_store(vector_store, self.client_id, self.product_id)
+        corpus_tokens = self.faiss_service.save_corpus_summary(vector_store, self.client_id, self.product_id, self.tiny_corpus_max_tokens)
+
+        return {"removed_from_index": len(ids_to_remove), "metadata_refreshed": refreshed, "corpus_tokens": corpus_tokens}
+
+    async def run(self, files: list[dict]) -> dict:
+        """
+        Runs the pipeline for a product.
+        Args:
+            files (list[dict]): Blobs to extract (name, url, etag, last_modified); empty to only vectorize persisted chunks.
+        Returns:
+            dict: Per-stage throughput, near-duplicate statistics, index changes and the corpus token count.
+        """
+        start = time.perf_counter()
+
+        if self.faiss_service.vector_store_exists(self.client_id, self.product_id):
+            self.existing_store = self.faiss_service.load_vector_store(self.client_id, self.product_id)
+            self.indexed_ids = self.faiss_service.get_indexed_ids(self.existing_store)
+
+        extracted, new_chunks, persisted_chunks, embedded = (asyncio.Queue(maxsize=self.queue_size) for _ in range(4))
+
+        tasks = [
+            asyncio.create_task(self._extract(files, extracted)),
+            asyncio.create_task(self._persist(extracted, new_chunks)),
+            asyncio.create_task(self._stream_persisted({blob["name"] for blob in files}, persisted_chunks)),
+            asyncio.create_task(self._embed([persisted_chunks, new_chunks], embedded)),
+            asyncio.create_task(self._index(embedded)),
+        ]
+
+        # A failing stage would leave the others waiting on its queue forever, so they are cancelled with it
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            task.result()
+
+        index_changes = await asyncio.to_thread(self._save_index)
+
+        result = {
+            "elapsed_seconds": round(time.perf_counter() - start, 3),
+            "stages": {name: stats.to_dict() for name, stats in self.stats.items()},
+            "near_duplicates": self.near_duplicate_filter.get_stats(),
+            **index_changes,
+        }
+
+        self.log.info("Streaming ingestion completed", client_id=self.client_id, product_id=self.product_id, **result)
+
+        return result
@@ -0,0 +1,28 @@
+from typing import Awaitable, Callable
+
+# A handler receives the job payload and a progress callback, and returns the job result
+JobHandler = Callable[[dict, Callable[[dict], None]], Awaitable[dict]]
+
+async def run_sync_job(payload: dict, progress: Callable[[dict], None]) -> dict:
+    from src.repositories.doc_extractor_repository import DocExtractorRepository
+
+    return await DocExtractorRepository().sync_documents(payload["client_id"], payload["product_id"], progress=progress)
+
+async def run_ingest_job(payload: dict, progress: Callable[[dict], None]) -> dict:
+    from src.repositories.doc_extractor_repository import DocExtractorRepository
+
+    return await DocExtractorRepository().ingest_documents(payload["client_id"], payload["product_id"], progress=progress)
+
+async def run_vectorize_job(payload: dict, progress: Callable[[dict], None]) -> dict:
+    from src.repositories.doc_chat_repository import DocChatRepository
+
+    dedup_stats = await DocChatRepository().vectorize_document(payload["client_id"], payload["product_id"], progress=progress)
+
+    return {"near_duplicates": dedup_stats}
+
+# Repositories are imported lazily so only worker processes load the extraction and embedding stacks
+JOB_HANDLERS: dict[str, JobHandler] = {
+    "sync": run_sync_job,
+    "ingest": run_ingest_job,
+    "vectorize": run_vectorize_job,
+}
@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import sqlite3
+import structlog
+
+from datetime import datetime, timezone
+from typing import Optional
+from src.models.view_models.job_view_model import JobViewModel, JobStatus
+from src.utils.get_configs import GetConfigs
+
+class JobCancelledError(Exception):
+    """Raised inside a running job when its cancellation has been requested."""
+
+class JobQueue:
+    """
+    A durable job queue backed by SQLite, shared by the API (which enqueues and reads jobs)
+    and the ingestion worker processes (which claim and run them).
+    Each process opens its own connection; claims take a write lock so a job is handed out once,
+    and a tenant never has more running jobs than the configured limit.
+    """
+    def __init__(self, db_path: Optional[str] = None):
+        self.log = structlog.get_logger(self.__class__.__name__)
+        self.configs = GetConfigs().get_configs()['jobs']
+
+        db_path = db_path or self.configs['db_path'] or os.path.join(os.getcwd(), "job_queue", "jobs.sqlite")
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        # Autocommit mode; transactions are opened explicitly where atomicity matters
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                tenant_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL,
+                max_attempts INTEGER NOT NULL,
+                cancel_requested INTEGER NOT NULL,
+                available_at REAL NOT NULL,
+                heartbeat_at REAL,
+                worker_id TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_available ON jobs (status, available_at)")
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> JobViewModel:
+        return JobViewModel(
+            id=row["id"],
+            kind=row["kind"],
+            tenant_id=row["tenant_id"],
+            payload=json.loads(row["payload"]),
+            status=JobStatus(row["status"]),
+            progress=json.loads(row["progress"]),
+            result=json.loads(row["result"]) if row["result"] else None,
+            error=row["error"],
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            cancel_requested=bool(row["cancel_requested"]),
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    def enqueue(self, kind: str, tenant_id: str, payload: dict) -> JobViewModel:
+        """Adds a job to the queue and returns it."""
+        job = JobViewModel(kind=kind, tenant_id=tenant_id, payload=payload, max_attempts=self.configs['max_attempts'])
+
+        self._conn.execute(
+            """
+            INSERT INTO jobs (id, kind, tenant_id, payload, status, progress, attempts, max_attempts,
+                              cancel_requested, available_at, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, 0, ?, 0, ?, ?, ?)
+            """,
+            (job.id, kind, tenant_id, json.dumps(payload), job.status.value, "{}", job.max_attempts, time.time(), job.created_at, job.updated_at)
+        )
+
+        self.log.info("Job enqueued", job_id=job.id, kind=kind, tenant_id=tenant_id)
+
+        return job
+
+    def get(self, job_id: str) -> Optional[JobViewModel]:
+        row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def request_cancel(self, job_id: str) -> Optional[JobViewModel]:
+        """
+        Cancels a queued job right away; a running job is flagged and stops at its next progress report.
+        Returns None when the job does not exist.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                self._conn.execute("ROLLBACK")
+                return None
+
+            status = JobStatus(row["status"])
+            if status == JobStatus.QUEUED:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, cancel_requested = 1, updated_at = ? WHERE id = ?",
+                    (JobStatus.CANCELLED.value, self._now(), job_id)
+                )
+            elif status == JobStatus.RUNNING:
+                self._conn.execute("UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ?", (self._now(), job_id))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        self.log.info("Job cancellation requested", job_id=job_id, status=status.value)
+
+        return self.get(job_id)
+
+    def claim(self, worker_id: str) -> Optional[JobViewModel]:
+        """
+        Hands the oldest runnable job to a worker, skipping tenants already at their concurrency limit.
+        Returns None when there is nothing to run.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                """
+                SELECT * FROM jobs AS queued
+                WHERE queued.status = ? AND queued.available_at <= ?
+                  AND (SELECT COUNT(*) FROM jobs AS running
+                       WHERE running.status = ? AND running.tenant_id = queued.tenant_id) < ?
+                ORDER BY queued.available_at, queued.created_at
+                LIMIT 1
+                """,
+                (JobStatus.QUEUED.value, time.time(), JobStatus.RUNNING.value, self.configs['max_running_jobs_per_tenant'])
+            ).fetchone()
+
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+
+            self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, attempts = attempts + 1, worker_id = ?, heartbeat_at = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (JobStatus.RUNNING.value, worker_id, time.time(), self._now(), row["id"])
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        return self.get(row["id"])
+
+    def report_progress(self, job_id: str, progress: dict) -> None:
+        """
+        Stores the latest progress of a running job and refreshes its heartbeat.
+        Raises JobCancelledError when cancellation has been requested, so the job stops where it is.
+        """
+        self._conn.execute(
+            "UPDATE jobs SET progress = ?, heartbeat_at = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(progress), time.time(), self._now(), job_id)
+        )
+
+        row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row and row["cancel_requested"]:
+            raise JobCancelledError(f"Job {job_id} was cancelled.")
+
+    def heartbeat(self, job_id: str) -> None:
+        self._conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        """
+        Marks a job as succeeded. Only the worker holding the job can complete it; returns False when it no
+        longer does, e.g. because the job was requeued as stale and handed to another worker.
+        """
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, worker_id = NULL, updated_at = ? WHERE id = ? AND worker_id = ? AND status = ?",
+            (JobStatus.SUCCEEDED.value, json.dumps(result), self._now(), job_id, worker_id, JobStatus.RUNNING.value)
+        )
+        if not cursor.rowcount:
+            self.log.warning("Job no longer held by this worker, result dropped", job_id=job_id, worker_id=worker_id)
+        return bool(cursor.rowcount)
+
+    def cancel(self, job_id: str, worker_id: str) -> bool:
+        cursor = self._conn.execute(
+            "UPDATE jobs SET status = ?, worker_id = NULL, updated_at = ? WHERE id = ? AND worker_id = ? AND status = ?",
+            (JobStatus.CANCELLED.value, self._now(), job_id, worker_id, JobStatus.RUNNING.value)
+        )
+        return bool(cursor.rowcount)
+
+    def fail(self, job_id: str, worker_id: str, error: str, retryable: bool = True) -> Optional[JobStatus]:
+        """
+        Records a failed attempt. The job goes back to the queue with exponential backoff
+        while attempts remain, otherwise it is marked as failed. Returns the new status,
+        or None when the worker no longer holds the job.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts, cancel_requested FROM jobs WHERE id = ? AND worker_id = ? AND status = ?",
+                (job_id, worker_id, JobStatus.RUNNING.value)
+            ).fetchone()
+
+            if row is None:
+                self._conn.execute("ROLLBACK")
+                self.log.warning("Job no longer held by this worker, failure dropped", job_id=job_id, worker_id=worker_id, error=error)
+                return None
+
+            attempts, cancel_requested = row["attempts"], bool(row["cancel_requested"])
+
+            if retryable and attempts < row["max_attempts"] and not cancel_requested:
+                status = JobStatus.QUEUED
+                delay = self.configs['retry_backoff_seconds'] * 2 ** (attempts - 1)
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, worker_id = NULL, available_at = ?, updated_at = ? WHERE id = ?",
+                    (status.value, error, time.time() + delay, self._now(), job_id)
+                )
+            else:
+                status = JobStatus.CANCELLED if cancel_requested else JobStatus.FAILED
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, worker_id = NULL, updated_at = ? WHERE id = ?",
+                    (status.value, error, self._now(), job_id)
+                )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        if status == JobStatus.QUEUED:
+            self.log.warning("Job attempt failed, retrying", job_id=job_id, attempts=attempts, retry_in_seconds=delay, error=error)
+        else:
+            self.log.error("Job failed", job_id=job_id, attempts=attempts, error=error)
+
+        return status
+
+    def requeue_stale(self) -> int:
+        """
+        Puts running jobs whose worker stopped sending heartbeats (crashed or killed) back in the queue.
+        Jobs out of attempts are marked as failed instead. Returns the number of jobs recovered.
+        """
+        stale_before = time.time() - self.configs['stale_after_seconds']
+        rows = self._conn.execute(
+            "SELECT id, worker_id FROM jobs WHERE status = ? AND heartbeat_at < ?",
+            (JobStatus.RUNNING.value, stale_before)
+        ).fetchall()
+
+        # Failed on behalf of the worker that held the job; a job it finished meanwhile is left alone
+        return sum(
+            self.fail(row["id"], row["worker_id"], "Worker stopped responding.") is not None
+            for row in rows
+        )
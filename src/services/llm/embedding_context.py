@@ -0,0 +1,30 @@
+import asyncio
+
+from langchain_core.embeddings import Embeddings
+
+class EmbeddingContext:
+    """
+    Embeddings of one chat turn. Texts passed to embed_many together go out in a single embeddings
+    request, and every vector is memoized, so no text is embedded twice within the turn.
+    Create one per request; it is not meant to be shared across requests.
+    """
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self.requests = 0
+        self._vectors: dict[str, list[float]] = {}
+        self._lock = asyncio.Lock()
+
+    async def embed_many(self, texts: list[str]) -> list[list[float]]:
+        # Serialized so concurrent callers asking for the same text wait for the first request instead of repeating it
+        async with self._lock:
+            missing = list(dict.fromkeys(text for text in texts if text not in self._vectors))
+
+            if missing:
+                vectors = await self.embeddings.aembed_documents(missing)
+                self._vectors.update(zip(missing, vectors))
+                self.requests += 1
+
+        return [self._vectors[text] for text in texts]
+
+    async def embed(self, text: str) -> list[float]:
+        return (await self.embed_many([text]))[0]
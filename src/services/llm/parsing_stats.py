@@ -0,0 +1,35 @@
+import threading
+
+from collections import Counter
+
+class ParsingStats:
+    """
+    Counts how LLM responses were turned into structured data, by output mode and outcome:
+    "parsed" on the first try, "fallback" when the OutputFixingParser had to make another LLM call,
+    and "failed" when even that did not produce valid JSON.
+    Counters live in memory and are per process.
+    """
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, mode: str, outcome: str) -> None:
+        with self._lock:
+            self._counts[(mode, outcome)] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+
+        stats: dict[str, dict[str, int]] = {}
+        for (mode, outcome), count in sorted(counts.items()):
+            stats.setdefault(mode, {"parsed": 0, "fallback": 0, "failed": 0})[outcome] = count
+
+        for mode_stats in stats.values():
+            total = mode_stats["parsed"] + mode_stats["fallback"]
+            mode_stats["fallback_rate"] = round(mode_stats["fallback"] / total, 4) if total else 0.0
+
+        return stats
+
+# Shared by every DocAnalyserRepository in the process
+analyser_parsing_stats = ParsingStats()
@@ -0,0 +1,158 @@
+import asyncio
+import structlog
+
+from dataclasses import dataclass
+from typing import List
+from langchain_core.output_parsers import JsonOutputParser
+from src.services.llm.providers import LLMService
+from src.services.memory.user_memory import MemoryIndex, UserMemory
+from src.services.prompts.prompting import memory_extraction_prompt
+from src.models.user_memory_model import ExtractedMemories
+from src.utils.get_configs import GetConfigs
+
+@dataclass
+class ChatTurn:
+    user_id: str
+    user_message: str
+    assistant_message: str
+
+class MemoryExtractionWorker:
+    """
+    Extracts durable facts about users from their chat turns, off the response path.
+
+    Chat submits every finished turn without waiting; a background task started with the application
+    collects turns for batch_window_seconds, then per user makes one LLM call over the batch, drops facts
+    that are near-duplicates of stored memories by embedding similarity, and upserts the rest.
+    Turns still queued at shutdown are dropped.
+    """
+    def __init__(self):
+        self.log = structlog.get_logger(self.__class__.__name__)
+        self.configs = GetConfigs().get_configs()['memory_extraction']
+        self._queue: asyncio.Queue[ChatTurn] | None = None
+        self._task: asyncio.Task | None = None
+        self._llm = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if not self.configs['enabled'] or self.is_running:
+            return
+
+        self._llm = LLMService().getAzOpenAIllm()
+        self._queue = asyncio.Queue(maxsize=self.configs['queue_size'])
+        self._task = asyncio.create_task(self._run())
+
+        self.log.info("Memory extraction worker started")
+
+    async def stop(self) -> None:
+        if not self.is_running:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        self.log.info("Memory extraction worker stopped", dropped_turns=self._queue.qsize())
+
+    def submit(self, user_id: str, user_message: str, assistant_message: str) -> None:
+        """Queues a finished chat turn for extraction; never waits, so chat latency is unaffected."""
+        if not user_id or not self.is_running:
+            return
+
+        try:
+            self._queue.put_nowait(ChatTurn(user_id, user_message, assistant_message))
+        except asyncio.QueueFull:
+            self.log.warning("Memory extraction queue is full, dropping chat turn", user_id=user_id)
+
+    async def _next_batch(self) -> List[ChatTurn]:
+        # Wait for a first turn, then collect whatever arrives within the batch window
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.configs['batch_window_seconds']
+
+        while len(batch) < self.configs['max_batch_turns']:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+
+            turns_by_user: dict[str, List[ChatTurn]] = {}
+            for turn in batch:
+                turns_by_user.setdefault(turn.user_id, []).append(turn)
+
+            results = await asyncio.gather(
+                *(self.extract_memories(user_id, turns) for user_id, turns in turns_by_user.items()),
+                return_exceptions=True
+            )
+
+            for user_id, result in zip(turns_by_user, results):
+                if isinstance(result, Exception):
+                    self.log.error("Memory extraction failed", user_id=user_id, error=str(result))
+
+    async def extract_memories(self, user_id: str, turns: List[ChatTurn]) -> List[str]:
+        """
+        Extracts new facts about a user from their chat turns and stores them.
+        Returns the texts of the stored memories.
+        """
+        memory = UserMemory(user_id)
+        index = await memory.get_index()
+
+        max_chars = self.configs['max_assistant_chars']
+        conversation = "\n".join(
+            f"User: {turn.user_message}\nAssistant: {turn.assistant_message[:max_chars]}"
+            for turn in turns
+        )
+
+        parser = JsonOutputParser(pydantic_object=ExtractedMemories)
+        chain = memory_extraction_prompt | self._llm | parser
+
+        response = await chain.ainvoke({
+            "format_instructions": parser.get_format_instructions(),
+            "existing_memories": "\n".join(index.texts) or "None",
+            "conversation": conversation
+        })
+
+        facts = list(dict.fromkeys(fact.strip() for fact in response.get("facts", []) if fact and fact.strip()))
+        if not facts:
+            return []
+
+        embeddings = await memory.embeddings.aembed_documents(facts)
+        texts, new_embeddings = self._deduplicate(index, facts, embeddings)
+
+        await memory.add_memories(texts, source="extracted", embeddings=new_embeddings)
+
+        self.log.info("User memories extracted", user_id=user_id, turns=len(turns), facts=len(facts), stored=len(texts))
+
+        return texts
+
+    def _deduplicate(self, index: MemoryIndex, facts: List[str], embeddings: List[List[float]]) -> tuple[List[str], List[List[float]]]:
+        # Drop facts too similar to a stored memory, or to a fact kept earlier in the same batch
+        threshold = self.configs['similarity_threshold']
+        similarities = index.max_similarities(embeddings)
+        normalized = MemoryIndex.normalize(embeddings)
+
+        kept: List[int] = []
+        for i in range(len(facts)):
+            if similarities[i] >= threshold:
+                continue
+            if kept and (normalized[kept] @ normalized[i]).max() >= threshold:
+                continue
+            kept.append(i)
+
+        return [facts[i] for i in kept], [embeddings[i] for i in kept]
+
+# Started and stopped by the application lifespan
+memory_extraction_worker = MemoryExtractionWorker()
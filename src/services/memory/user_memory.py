@@ -1,12 +1,17 @@
-import uuid
+import time
+import threading
 import structlog
+import numpy as np
 
-from typing import List, Optional
-from langgraph.store.memory import InMemoryStore
-from langchain.embeddings import init_embeddings
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List
+from src.services.azure.cosmos import CosmosService
+from src.services.llm.providers import LLMService
+from src.models.view_models.user_memory_view_model import UserMemoryViewModel
 from src.utils.get_configs import GetConfigs
-from src.core.app_settings import get_settings
 
+# Seed memories, written to the user-memories container the first time a user without stored memories chats
 user_memory = [
     {
         "user_id": "ffcfb843-e07c-4c27-878a-007c7d79b2b9",
@@ -18,27 +23,110 @@ user_memory = [
     }
 ]
 
+@dataclass
+class MemoryIndex:
+    """The memories of one user with their unit-normalized embeddings, one row per memory."""
+    ids: List[str]
+    texts: List[str]
+    embeddings: np.ndarray
+    loaded_at: float
+
+    @classmethod
+    def build(cls, items: List[dict]) -> "MemoryIndex":
+        return cls(
+            ids=[item["id"] for item in items],
+            texts=[item["text"] for item in items],
+            embeddings=cls.normalize([item["embedding"] for item in items]),
+            loaded_at=time.monotonic(),
+        )
+
+    @staticmethod
+    def normalize(embeddings: List[List[float]]) -> np.ndarray:
+        if not len(embeddings):
+            return np.zeros((0, 0), dtype=np.float32)
+
+        matrix = np.array(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def max_similarities(self, embeddings: List[List[float]]) -> np.ndarray:
+        """Highest cosine similarity of every given embedding to any stored memory; 0 when there are none."""
+        if not self.texts or not embeddings:
+            return np.zeros(len(embeddings), dtype=np.float32)
+        return (self.normalize(embeddings) @ self.embeddings.T).max(axis=1)
+
+    def search(self, query_embedding: List[float], top_k: int) -> List[str]:
+        if not self.texts:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+
+        # Cosine similarity against every memory; per-user indexes are small enough for a full scan
+        scores = self.embeddings @ query
+        top = np.argsort(-scores)[:top_k]
+        return [self.texts[i] for i in top]
+
+class MemoryIndexCache:
+    """
+    Per-process LRU cache of loaded memory indexes, by user ID.
+    Entries expire after a TTL so memories written by other processes are picked up.
+    """
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._indexes: "OrderedDict[str, MemoryIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> MemoryIndex | None:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                return None
+
+            if time.monotonic() - index.loaded_at > self.ttl_seconds:
+                del self._indexes[user_id]
+                return None
+
+            self._indexes.move_to_end(user_id)
+            return index
+
+    def put(self, user_id: str, index: MemoryIndex) -> None:
+        with self._lock:
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+
+            while len(self._indexes) > self.max_size:
+                self._indexes.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+_memory_configs = GetConfigs().get_configs()['user_memory']
+_index_cache = MemoryIndexCache(_memory_configs['cache_size'], _memory_configs['cache_ttl_seconds'])
+
 class UserMemory:
     """
-    Handles user memory storage and retrieval using LangGraph and embeddings.
+    Handles user memory storage and retrieval.
+    Memories are stored in Cosmos DB with their embeddings, computed once at write time; loaded memory
+    indexes are cached in the process, so a retrieval costs one query embedding and a local search.
     """
     def __init__(self, user_id: str) -> None:
         """
-        Initialize LangGraphMemory for a user.
+        Initialize UserMemory for a user.
         Args:
             user_id (str): Unique user identifier.
         """
         self.log = structlog.get_logger(self.__class__.__name__)
-        self.configs = GetConfigs().get_configs()
-        self.settings = get_settings()
+        self.configs = _memory_configs
         self.user_id = user_id
-        self.namespace = (user_id, "memories")
-        self.store: Optional[InMemoryStore] = None
-        self._store_in_memory()
+        self.cosmos_service = CosmosService()
+        self.embeddings = LLMService().getAzOpenAIEmbeddings()
 
-    def _get_user_memories(self, user_id: str) -> List[str]:
+    def _get_seed_memories(self, user_id: str) -> List[str]:
         """
-        Retrieve list of memories for a user.
+        Retrieve list of seed memories for a user.
         Args:
             user_id (str): Unique user identifier.
         Returns:
@@ -47,54 +135,88 @@ class UserMemory:
         user = next((u for u in user_memory if u["user_id"] == user_id), None)
         return user["memories"] if user else []
 
-    def _store_in_memory(self) -> None:
+    async def _load_memories(self) -> List[dict]:
         """
-        Store user memories in the in-memory vector store.
+        Reads the stored memories of the user, with their embeddings, from Cosmos DB.
         """
-        try:
-            model_name = self.configs['az_open_ai_embeddings']['model_name']
-            
-            embeddings = init_embeddings(
-                f"azure_openai:{model_name}",
-                openai_api_key=self.settings.AZURE_OPENAI_API_KEY,
-                azure_endpoint=self.settings.AZURE_OPENAI_ENDPOINT
-            )
-            
-            store = InMemoryStore(
-                index={
-                    "embed": embeddings,
-                    "dims": 1536,
-                }
-            )
-            
-            user_memories = self._get_user_memories(self.user_id)
-            
-            for memory in user_memories:
-                store.put(self.namespace, str(uuid.uuid4()), {"text": memory})
-                
-            self.store = store
-            
-        except Exception as e:
-            self.log.error(f"Error initializing memory store: {e}")
-            self.store = None
+        query = "SELECT c.id, c.text, c.embedding FROM c WHERE c.user_id = @user_id"
+        parameters = [{"name": "@user_id", "value": self.user_id}]
+
+        items = []
+        async for page, _ in self.cosmos_service.query_items_paged_async(self.configs['container'], query, parameters, partition_key=self.user_id):
+            items.extend(page)
 
-    def retrieve_memories(self, query: str, top_k: int = 5) -> str:
+        return items
+
+    async def get_index(self) -> MemoryIndex:
+        """
+        Returns the memory index of the user, from the process cache when it holds a fresh one.
+        Users without stored memories get their seed memories written first.
+        """
+        index = _index_cache.get(self.user_id)
+        if index is not None:
+            return index
+
+        items = await self._load_memories()
+
+        if not items:
+            seed_memories = self._get_seed_memories(self.user_id)
+            if seed_memories:
+                self.log.info("Seeding user memories", user_id=self.user_id, memories=len(seed_memories))
+                items = await self.add_memories(seed_memories, source="seed")
+
+        index = MemoryIndex.build(items)
+        _index_cache.put(self.user_id, index)
+
+        self.log.info("User memory index loaded", user_id=self.user_id, memories=len(index.texts))
+
+        return index
+
+    async def add_memories(self, texts: List[str], source: str = "seed", embeddings: List[List[float]] | None = None) -> List[dict]:
+        """
+        Embeds and stores new memories of the user; the cached index is dropped so the next read reloads it.
+        Args:
+            texts (List[str]): The facts to remember.
+            source (str): Where the memories came from.
+            embeddings (List[List[float]] | None): Embeddings of the texts, when the caller has computed them already.
+        Returns:
+            List[dict]: The stored memory items.
+        """
+        if not texts:
+            return []
+
+        embeddings = embeddings or await self.embeddings.aembed_documents(texts)
+
+        items = [
+            UserMemoryViewModel(user_id=self.user_id, text=text, embedding=embedding, source=source).model_dump()
+            for text, embedding in zip(texts, embeddings)
+        ]
+
+        await self.cosmos_service.bulk_upsert_items_async(self.configs['container'], items, self.user_id)
+        _index_cache.invalidate(self.user_id)
+
+        return items
+
+    async def retrieve_memories_async(self, query: str, top_k: int | None = None, query_embedding: List[float] | None = None) -> str:
         """
         Retrieve top_k memories matching the query.
         Args:
             query (str): Search query.
-            top_k (int): Number of top results to return.
+            top_k (int | None): Number of top results to return; defaults to the configured top_k.
+            query_embedding (List[float] | None): Embedding of the query, when the caller has computed it already.
         Returns:
             str: Concatenated memory strings.
         """
-        if not self.store:
-            self.log.warning("Memory store not initialized.")
-            return ""
-        
         try:
-            memories = self.store.search(self.namespace, query=query, limit=top_k)
-            return "\n".join(memory.value['text'] for memory in memories)
-        
+            index = await self.get_index()
+            if not index.texts:
+                return ""
+
+            query_embedding = query_embedding or await self.embeddings.aembed_query(query)
+            memories = index.search(query_embedding, top_k or self.configs['top_k'])
+
+            return "\n".join(memories)
+
         except Exception as e:
             self.log.error(f"Error retrieving memories: {e}")
-            return ""
\ No newline at end of file
+            return ""
@@ -12,7 +12,40 @@ doc_analyse_prompt = ChatPromptTemplate.from_template(
     """
 )
 
-doc_analyse_prompt = ChatPromptTemplate.from_template(
+doc_analyse_map_prompt = ChatPromptTemplate.from_template(
+    """
+    You are a highly capable assistant trained to analyze and summarize documents.
+    You are given excerpt {part} of {total_parts} of a longer document.
+    Extract only what this excerpt shows and use null for anything it does not mention.
+    The summary lists the key points of this excerpt only.
+    Return ONLY valid JSON matching the exact schema below.
+
+    {format_instructions}
+
+    Analyze this excerpt:
+    {document_text}
+    """
+)
+
+doc_analyse_reduce_prompt = ChatPromptTemplate.from_template(
+    """
+    You are a highly capable assistant trained to analyze and summarize documents.
+    Below is the metadata extracted separately from each excerpt of one document of {page_count} pages, in document order.
+    Merge it into the metadata of the whole document:
+    - Title, author, publisher, dates and language: ignore nulls and prefer values from the first excerpts when they conflict.
+    - Page count: {page_count}.
+    - Summary: combine the excerpt summaries into a concise summary of the whole document, without repeating points.
+    - Sentiment tone: the overall tone of the document.
+    Return ONLY valid JSON matching the exact schema below.
+
+    {format_instructions}
+
+    Excerpt metadata:
+    {partial_results}
+    """
+)
+
+table_cleaning_prompt = ChatPromptTemplate.from_template(
     """
     **You are a data-cleaning assistant.**
 
@@ -48,6 +81,25 @@ doc_analyse_prompt = ChatPromptTemplate.from_template(
     """
 )
 
+memory_extraction_prompt = ChatPromptTemplate.from_template(
+    """
+    You maintain long-term memory about a user of a document assistant.
+    From the conversation below, extract durable facts about the user: who they are, their role,
+    preferences, goals and recurring needs. Ignore the content of the documents, one-off questions
+    and anything already in the known memories. Write every fact as one short sentence about the user,
+    e.g. "User prefers answers in bullet points". Return an empty list when there is nothing new.
+    Return ONLY valid JSON matching the exact schema below.
+
+    {format_instructions}
+
+    Known memories:
+    {existing_memories}
+
+    Conversation:
+    {conversation}
+    """
+)
+
 contextualize_question_prompt = ChatPromptTemplate.from_messages([
     ("system",
      "Task: Rewrite the user's latest message into a standalone question ONLY if it relies on prior context.\n"
@@ -0,0 +1,118 @@
+from langchain.schema import Document
+from src.utils.get_configs import GetConfigs
+from src.utils.token_counter import count_tokens
+
+def get_tiny_corpus_max_tokens(configs: dict) -> int:
+    # A tiny corpus is sent whole as the context, so it is held to the same token budget as retrieved context
+    return min(configs['tiny_corpus_max_tokens'], configs['max_context_tokens'])
+
+class ContextBuilder:
+    """
+    Turns scored search hits into the context of the answer prompt:
+    hits below the absolute score or below a fraction of the best score are dropped, text shared by
+    two chunks of the same source is kept once, and the best remaining chunks are packed into the
+    token budget using the token counts stored at ingest.
+    """
+    def __init__(self, max_context_tokens: int | None = None):
+        configs = GetConfigs().get_configs()['chat_context']
+        self.fetch_k = configs['fetch_k']
+        self.min_score = configs['min_score']
+        self.relative_score = configs['relative_score']
+        self.max_context_tokens = max_context_tokens or configs['max_context_tokens']
+        self.min_overlap_chars = configs['min_overlap_chars']
+
+    @staticmethod
+    def _token_count(doc: Document) -> int:
+        return doc.metadata.get("token_count") or count_tokens(doc.page_content)
+
+    def _overlap(self, head_source: str, tail_source: str) -> int:
+        """Length of the longest end of head_source that tail_source starts with, if at least min_overlap_chars."""
+        probe = tail_source[:self.min_overlap_chars]
+        if len(probe) < self.min_overlap_chars:
+            return 0
+
+        start = max(len(head_source) - len(tail_source), 0)
+        while (position := head_source.find(probe, start)) != -1:
+            if tail_source.startswith(head_source[position:]):
+                return len(head_source) - position
+            start = position + 1
+
+        return 0
+
+    def _remove_overlaps(self, hits: list[tuple[Document, float]]) -> tuple[list[tuple[Document, float]], int]:
+        """
+        Removes text a chunk shares with a better-scoring chunk of the same source: a chunk contained in a
+        better one is dropped, and text overlapping the start or end of a better one is cut off.
+        """
+        kept: list[tuple[Document, float]] = []
+        trimmed = 0
+
+        for doc, score in hits:
+            text = doc.page_content
+            source = doc.metadata.get("source")
+
+            for better, _ in kept:
+                if better.metadata.get("source") != source:
+                    continue
+
+                if text in better.page_content:
+                    text = ""
+                    break
+
+                if overlap := self._overlap(better.page_content, text):
+                    text = text[overlap:]
+                elif overlap := self._overlap(text, better.page_content):
+                    text = text[:-overlap]
+
+            if not text.strip():
+                trimmed += 1
+                continue
+
+            if text != doc.page_content:
+                trimmed += 1
+                doc = Document(page_content=text, metadata={**doc.metadata, "token_count": count_tokens(text)}, id=doc.id)
+
+            kept.append((doc, score))
+
+        return kept, trimmed
+
+    def build(self, hits: list[tuple[Document, float]]) -> tuple[list[Document], dict]:
+        """
+        Args:
+            hits (list[tuple[Document, float]]): Search hits with their similarity, higher is more similar.
+        Returns:
+            tuple[list[Document], dict]: The chunks of the context, best first, and statistics about the selection.
+        """
+        hits = sorted(hits, key=lambda hit: hit[1], reverse=True)
+        best_score = hits[0][1] if hits else 0.0
+
+        relevant = [
+            (doc, score) for doc, score in hits
+            if score >= self.min_score and score >= best_score * self.relative_score
+        ]
+
+        above_threshold = len(relevant)
+        relevant, trimmed = self._remove_overlaps(relevant)
+
+        context: list[Document] = []
+        context_tokens = 0
+
+        # Smaller chunks further down can still fill the budget a large one didn't fit in
+        for doc, _ in relevant:
+            tokens = self._token_count(doc)
+            if context_tokens + tokens > self.max_context_tokens:
+                continue
+            context.append(doc)
+            context_tokens += tokens
+
+        stats = {
+            "hits": len(hits),
+            "best_score": round(best_score, 4),
+            "above_threshold": above_threshold,
+            "overlaps_removed": trimmed,
+            "packed": len(context),
+            "hit_tokens": sum(self._token_count(doc) for doc, _ in hits),
+            "context_tokens": context_tokens,
+        }
+
+        return context, stats
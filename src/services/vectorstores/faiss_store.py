@@ -1,35 +1,147 @@
 import os
+import json
 
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from src.services.llm.providers import LLMService
 from langchain.schema import Document
+from src.utils.token_counter import count_tokens
 
 class FaissService:
     def __init__(self):
         self.llm_service = LLMService()
         self.azOpenAIEmbeddings = self.llm_service.getAzOpenAIEmbeddings()
 
-    def create_vector_store(self, client_id: str, product_id: str, documents: list[Document]) -> FAISS:
-        """Create a FAISS vector store from the provided documents."""
-        vector_store = FAISS.from_documents(documents, self.azOpenAIEmbeddings)
-        
-        # Save the vector store to the current working directory
-        save_path = os.getcwd()
-        
-        # create a directory with name faiss_vector_store and add client_id and product_id directories inside it
-        vector_store_dir = os.path.join(save_path, "faiss_vector_store", client_id, product_id)
-        
+    @staticmethod
+    def _get_vector_store_dir(client_id: str, product_id: str) -> str:
+        # faiss_vector_store/<client_id>/<product_id> inside the current working directory
+        return os.path.join(os.getcwd(), "faiss_vector_store", client_id, product_id)
+
+    def vector_store_exists(self, client_id: str, product_id: str) -> bool:
+        """Check whether a FAISS vector store has already been saved for the product."""
+        return os.path.exists(os.path.join(self._get_vector_store_dir(client_id, product_id), "index.faiss"))
+
+    async def aembed_documents(self, documents: list[Document]) -> list[list[float]]:
+        """Embed the page content of documents without adding them to a store."""
+        return await self.azOpenAIEmbeddings.aembed_documents([doc.page_content for doc in documents])
+
+    def add_embeddings(self, vector_store: FAISS | None, documents: list[Document], embeddings: list[list[float]]) -> FAISS:
+        """Add documents with precomputed embeddings, creating the vector store when there is none yet."""
+        # Use the chunk IDs as docstore IDs so later syncs can add and remove individual chunks
+        text_embeddings = [(doc.page_content, embedding) for doc, embedding in zip(documents, embeddings)]
+        metadatas = [doc.metadata for doc in documents]
+        ids = [doc.id for doc in documents]
+
+        if vector_store is None:
+            return FAISS.from_embeddings(text_embeddings, self.azOpenAIEmbeddings, metadatas=metadatas, ids=ids)
+
+        vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+
+        return vector_store
+
+    @staticmethod
+    def merge_vector_stores(vector_store: FAISS, other: FAISS | None) -> FAISS:
+        """Merge the vectors and documents of another store into the vector store, without re-embedding."""
+        if other is not None:
+            vector_store.merge_from(other)
+        return vector_store
+
+    @staticmethod
+    def delete_documents(vector_store: FAISS, ids: list[str]) -> None:
+        """Remove documents and their vectors from the vector store."""
+        if ids:
+            vector_store.delete(ids=ids)
+
+    @staticmethod
+    def refresh_metadata(vector_store: FAISS, metadata_by_id: dict[str, dict]) -> int:
+        """
+        Replace the metadata of stored documents while keeping their vectors.
+        Returns the number of documents whose metadata actually changed.
+        """
+        refreshed = [
+            Document(id=doc_id, page_content=stored.page_content, metadata=metadata)
+            for doc_id, metadata in metadata_by_id.items()
+            if (stored := vector_store.docstore.search(doc_id)) and isinstance(stored, Document) and stored.metadata != metadata
+        ]
+
+        if refreshed:
+            vector_store.docstore.delete([doc.id for doc in refreshed])
+            vector_store.docstore.add({doc.id: doc for doc in refreshed})
+
+        return len(refreshed)
+
+    def save_vector_store(self, vector_store: FAISS, client_id: str, product_id: str) -> None:
+        """Save the vector store under the product's directory."""
+        vector_store_dir = self._get_vector_store_dir(client_id, product_id)
+
         # create directory if it does not exist
         os.makedirs(vector_store_dir, exist_ok=True)
 
         vector_store.save_local(vector_store_dir)
-        
-        return vector_store
+
+    @staticmethod
+    def search_with_scores(vector_store: FAISS, embedding: list[float], k: int) -> list[tuple[Document, float]]:
+        """
+        Return the k nearest documents with their cosine similarity to the embedding, higher is more similar.
+        The Azure OpenAI embeddings are unit length, so the squared L2 distance of the default index is 2 - 2 x cosine.
+        """
+        hits = vector_store.similarity_search_with_score_by_vector(embedding, k=k)
+
+        if vector_store.distance_strategy == DistanceStrategy.EUCLIDEAN_DISTANCE:
+            return [(doc, 1.0 - float(distance) / 2) for doc, distance in hits]
+
+        return [(doc, float(score)) for doc, score in hits]
+
+    def save_corpus_summary(self, vector_store: FAISS, client_id: str, product_id: str, tiny_corpus_max_tokens: int) -> int:
+        """
+        Record the token count of the indexed corpus next to the vector store. Corpora of at most
+        tiny_corpus_max_tokens also get their chunks written, so chat can put the whole corpus in the
+        prompt without loading the index or embedding the question.
+        Returns the corpus token count.
+        """
+        documents = [vector_store.docstore.search(doc_id) for doc_id in vector_store.index_to_docstore_id.values()]
+        documents = [doc for doc in documents if isinstance(doc, Document)]
+
+        corpus_tokens = sum(doc.metadata.get("token_count") or count_tokens(doc.page_content) for doc in documents)
+
+        # Keep the chunks of one source together and in their original order
+        documents.sort(key=lambda doc: str(doc.metadata.get("source", "")))
+
+        summary = {
+            "corpus_tokens": corpus_tokens,
+            "chunk_count": len(documents),
+            "chunks": [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents]
+            if corpus_tokens <= tiny_corpus_max_tokens else None,
+        }
+
+        with open(os.path.join(self._get_vector_store_dir(client_id, product_id), "corpus.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, default=str)
+
+        return corpus_tokens
+
+    def load_tiny_corpus(self, client_id: str, product_id: str, max_tokens: int) -> list[Document] | None:
+        """Return every chunk of the product when its whole corpus fits in max_tokens, otherwise None."""
+        path = os.path.join(self._get_vector_store_dir(client_id, product_id), "corpus.json")
+        if not os.path.exists(path):
+            return None
+
+        with open(path, encoding="utf-8") as f:
+            summary = json.load(f)
+
+        if summary.get("chunks") is None or summary["corpus_tokens"] > max_tokens:
+            return None
+
+        return [Document(page_content=chunk["page_content"], metadata=chunk["metadata"]) for chunk in summary["chunks"]]
+
+    @staticmethod
+    def get_indexed_ids(vector_store: FAISS) -> set[str]:
+        """Return the docstore IDs of every document currently in the vector store."""
+        return set(vector_store.index_to_docstore_id.values())
 
     def load_vector_store(self, client_id: str, product_id: str) -> FAISS:
         """Load a FAISS vector store from a file."""
         vector_store_dir = os.path.join("faiss_vector_store", client_id, product_id)
-        
+
         vector_store = FAISS.load_local(vector_store_dir, self.azOpenAIEmbeddings, allow_dangerous_deserialization=True)
-        
-        return vector_store
\ No newline at end of file
+
+        return vector_store
@@ -0,0 +1,118 @@
+import re
+import structlog
+
+from datasketch import MinHash, MinHashLSH
+from langchain.schema import Document
+from src.utils.get_configs import GetConfigs
+
+class NearDuplicateFilter:
+    """
+    Finds near-duplicate chunks with MinHash signatures and LSH before they are embedded.
+    The first chunk of a cluster is kept as its representative; the sources of the others
+    are recorded so they can be stored in the representative's metadata. A preferred chunk (one
+    already in the index) takes a cluster over from a representative that isn't, so arrival order
+    never decides between them.
+    Only signatures and source references are kept, never chunk text.
+    """
+    def __init__(self, threshold: float | None = None):
+        self.log = structlog.get_logger(self.__class__.__name__)
+        configs = GetConfigs().get_configs()['vectorize']['near_duplicates']
+        self.threshold = threshold or configs['threshold']
+        self.num_perm = configs['num_perm']
+        self.shingle_size = configs['shingle_size']
+        self.lsh = MinHashLSH(threshold=self.threshold, num_perm=self.num_perm)
+        self.signatures: dict[str, MinHash] = {}
+        self.references: dict[str, dict] = {}
+        self.duplicate_sources: dict[str, list[dict]] = {}
+        self.preferred_ids: set[str] = set()
+        # Former representatives, by the id of the preferred chunk that took their cluster over
+        self.replaced: dict[str, str] = {}
+        self.chunks_seen = 0
+        self.duplicates_found = 0
+
+    def _signature(self, text: str) -> MinHash:
+        words = re.sub(r"\s+", " ", text.lower()).strip().split(" ")
+        shingles = {" ".join(words[i:i + self.shingle_size]) for i in range(max(len(words) - self.shingle_size + 1, 1))}
+
+        signature = MinHash(num_perm=self.num_perm)
+        for shingle in shingles:
+            signature.update(shingle.encode("utf-8"))
+
+        return signature
+
+    @staticmethod
+    def _reference(document: Document) -> dict:
+        return {
+            "id": document.id,
+            "source": document.metadata.get("source"),
+            "page": document.metadata.get("page"),
+        }
+
+    def _take_over(self, representative_id: str, document: Document, signature: MinHash) -> None:
+        # The former representative and its duplicates become duplicates of the preferred chunk
+        self.lsh.remove(representative_id)
+        del self.signatures[representative_id]
+
+        self.duplicate_sources[document.id] = [self.references.pop(representative_id)] + self.duplicate_sources.pop(representative_id, [])
+        self.replaced[representative_id] = document.id
+        self.duplicates_found += 1
+
+    def add(self, document: Document, preferred: bool = False) -> str | None:
+        """
+        Registers a chunk.
+        Args:
+            document (Document): The chunk; its id identifies it.
+            preferred (bool): Whether the chunk should represent its cluster even if another chunk came first.
+        Returns:
+            str | None: The representative's id when the chunk is a near-duplicate, otherwise None
+            (the chunk becomes a representative itself, possibly replacing one, see replaced).
+        """
+        self.chunks_seen += 1
+        signature = self._signature(document.page_content)
+
+        # LSH returns candidates; confirm them against the estimated Jaccard similarity
+        candidates = [
+            candidate for candidate in self.lsh.query(signature)
+            if self.signatures[candidate].jaccard(signature) >= self.threshold
+        ]
+
+        if candidates:
+            representative_id = max(candidates, key=lambda candidate: self.signatures[candidate].jaccard(signature))
+
+            if not preferred or representative_id in self.preferred_ids:
+                self.duplicate_sources.setdefault(representative_id, []).append(self._reference(document))
+                self.duplicates_found += 1
+                return representative_id
+
+            self._take_over(representative_id, document, signature)
+
+        self.lsh.insert(document.id, signature)
+        self.signatures[document.id] = signature
+        self.references[document.id] = self._reference(document)
+        if preferred:
+            self.preferred_ids.add(document.id)
+
+        return None
+
+    def deduplicate(self, documents: list[Document]) -> list[Document]:
+        """
+        Returns the representatives among the documents, with the sources of their
+        near-duplicates in metadata["duplicate_sources"].
+        """
+        representatives = [document for document in documents if self.add(document) is None]
+
+        for document in representatives:
+            document.metadata["duplicate_sources"] = self.duplicate_sources.get(document.id, [])
+
+        return representatives
+
+    def get_stats(self) -> dict:
+        return {
+            "threshold": self.threshold,
+            "chunks": self.chunks_seen,
+            "representatives": self.chunks_seen - self.duplicates_found,
+            "duplicates_removed": self.duplicates_found,
+            "clusters_with_duplicates": len(self.duplicate_sources),
+            "representatives_replaced": len(self.replaced),
+            "duplicate_ratio": round(self.duplicates_found / self.chunks_seen, 4) if self.chunks_seen else 0.0,
+        }
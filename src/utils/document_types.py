@@ -0,0 +1,46 @@
+import os
+
+# Document formats accepted for chat, by file extension
+ALLOWED_DOCUMENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ".md": "text/markdown",
+    ".txt": "text/plain",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".csv": "text/csv",
+}
+
+ALLOWED_CONTENT_TYPES = set(ALLOWED_DOCUMENT_TYPES.values())
+
+ALLOWED_TYPES_MESSAGE = "Only files of type PDF, DOCX, PPTX, MD, TXT, XLSX, or CSV are allowed."
+
+# Leading bytes of the binary formats; OOXML files are ZIP archives.
+# Checked on uploads that bypass the API, where the declared content type can't be trusted.
+CONTENT_SIGNATURES = {
+    ".pdf": b"%PDF-",
+    ".docx": b"PK\x03\x04",
+    ".pptx": b"PK\x03\x04",
+    ".xlsx": b"PK\x03\x04",
+}
+
+def get_extension(filename: str) -> str:
+    _, ext = os.path.splitext(filename or "")
+    return ext.lower()
+
+def validate_document_type(filename: str, content_type: str | None) -> str:
+    """
+    Checks that a file's extension and content type describe the same allowed format.
+    Returns the extension; raises ValueError otherwise.
+    """
+    ext = get_extension(filename)
+
+    if content_type not in ALLOWED_CONTENT_TYPES or ALLOWED_DOCUMENT_TYPES.get(ext) != content_type:
+        raise ValueError(ALLOWED_TYPES_MESSAGE)
+
+    return ext
+
+def matches_signature(ext: str, head: bytes) -> bool:
+    """Checks the first bytes of a file against the signature of its format, if it has one."""
+    signature = CONTENT_SIGNATURES.get(ext)
+    return signature is None or head.startswith(signature)
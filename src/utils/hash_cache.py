@@ -0,0 +1,52 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+
+from typing import Any, Optional
+
+class HashCache:
+    """
+    A small persistent key-value cache backed by SQLite, keyed by content hashes.
+    One file per cache name under ./hash_cache in the current working directory.
+    Safe to share across threads of one process; SQLite handles concurrent processes.
+    """
+    def __init__(self, name: str, cache_dir: Optional[str] = None):
+        cache_dir = cache_dir or os.path.join(os.getcwd(), "hash_cache")
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(cache_dir, f"{name}.sqlite"), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, keys: list[str]) -> dict[str, Any]:
+        results: dict[str, Any] = {}
+        # Stay below SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            placeholders = ",".join("?" for _ in batch)
+            with self._lock:
+                rows = self._conn.execute(f"SELECT key, value FROM cache WHERE key IN ({placeholders})", batch).fetchall()
+            results.update({key: json.loads(value) for key, value in rows})
+        return results
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+            self._conn.commit()
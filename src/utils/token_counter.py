@@ -0,0 +1,27 @@
+import tiktoken
+
+from functools import lru_cache
+
+# cl100k_base is the tokenizer of text-embedding-ada-002 and a close estimate for the chat deployments
+DEFAULT_ENCODING = "cl100k_base"
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str = DEFAULT_ENCODING) -> tiktoken.Encoding:
+    # Loading an encoding reads its BPE ranks from disk, so it is done once per process
+    return tiktoken.get_encoding(encoding_name)
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """
+    Returns the number of tokens in the text for the given encoding.
+    """
+    if not text:
+        return 0
+    return len(get_encoding(encoding_name).encode(text, disallowed_special=()))
+
+def split_by_tokens(text: str, max_tokens: int, encoding_name: str = DEFAULT_ENCODING) -> list[str]:
+    """
+    Splits the text into consecutive pieces of at most max_tokens tokens each.
+    """
+    encoding = get_encoding(encoding_name)
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
@@ -0,0 +1,160 @@
+"""
+Runs the background ingestion jobs (document sync, vectorization) queued by the API.
+
+Start it next to the API, from the project root:
+
+    python -m src.workers.ingestion_worker
+
+A supervisor keeps `jobs.workers` worker processes alive; each one claims a job at a time from
+the SQLite job queue, so the processes serving chat traffic do no ingestion work at all.
+"""
+import os
+import sys
+import time
+import uuid
+import signal
+import asyncio
+import threading
+import structlog
+import multiprocessing
+
+from src.services.azure.blob import BlobService
+from src.services.jobs.job_queue import JobQueue, JobCancelledError
+from src.services.jobs.job_handlers import JOB_HANDLERS
+from src.models.view_models.job_view_model import JobViewModel
+from src.utils.az_logger import az_logging
+from src.utils.custom_exception import CustomException
+from src.utils.get_configs import GetConfigs
+
+class IngestionWorker:
+    def __init__(self, worker_id: str):
+        self.log = structlog.get_logger(self.__class__.__name__)
+        self.configs = GetConfigs().get_configs()['jobs']
+        self.worker_id = worker_id
+        self.queue = JobQueue()
+        self.stopping = False
+
+    def _keep_alive(self, job_id: str, done: threading.Event) -> None:
+        # Long steps (a large PDF conversion) report no progress for a while; the heartbeat keeps the job from looking stale
+        queue = JobQueue()
+        while not done.wait(self.configs['heartbeat_interval_seconds']):
+            queue.heartbeat(job_id)
+
+    @staticmethod
+    async def _run_handler(handler, payload: dict, progress) -> dict:
+        try:
+            return await handler(payload, progress)
+        finally:
+            # Every job runs in a fresh event loop; the blob clients created on it are closed before it ends
+            await BlobService.close_shared_clients()
+
+    def run_job(self, job: JobViewModel) -> None:
+        structlog.contextvars.bind_contextvars(job_id=job.id, job_kind=job.kind, tenant_id=job.tenant_id)
+        self.log.info("Job started", attempt=job.attempts)
+
+        handler = JOB_HANDLERS.get(job.kind)
+        if handler is None:
+            self.log.error("Unknown job kind")
+            self.queue.fail(job.id, self.worker_id, f"Unknown job kind '{job.kind}'.", retryable=False)
+            structlog.contextvars.clear_contextvars()
+            return
+
+        done = threading.Event()
+        threading.Thread(target=self._keep_alive, args=(job.id, done), daemon=True).start()
+
+        try:
+            result = asyncio.run(self._run_handler(handler, job.payload, lambda progress: self.queue.report_progress(job.id, progress)))
+            self.queue.complete(job.id, self.worker_id, result)
+            self.log.info("Job succeeded")
+
+        except JobCancelledError:
+            self.queue.cancel(job.id, self.worker_id)
+            self.log.info("Job cancelled")
+
+        except ValueError as e:
+            # Invalid input fails the same way on every attempt
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Job failed", error_msg=error_msg)
+            self.queue.fail(job.id, self.worker_id, str(e), retryable=False)
+
+        except Exception as e:
+            error_msg = CustomException(str(e), sys).__str__()
+            self.log.error("Job attempt failed", error_msg=error_msg)
+            self.queue.fail(job.id, self.worker_id, str(e))
+
+        finally:
+            done.set()
+            structlog.contextvars.clear_contextvars()
+
+    def run(self) -> None:
+        self.log.info("Ingestion worker started", worker_id=self.worker_id, pid=os.getpid())
+
+        while not self.stopping:
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                time.sleep(self.configs['poll_interval_seconds'])
+                continue
+            self.run_job(job)
+
+        self.log.info("Ingestion worker stopped", worker_id=self.worker_id)
+
+def _worker_main(worker_id: str) -> None:
+    az_logging()
+    worker = IngestionWorker(worker_id)
+
+    def stop(*_):
+        # Finish the current job, then exit
+        worker.stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    worker.run()
+
+def main() -> None:
+    az_logging()
+    log = structlog.get_logger("IngestionSupervisor")
+    configs = GetConfigs().get_configs()['jobs']
+    queue = JobQueue()
+
+    # Spawned processes start clean instead of inheriting the supervisor's SQLite connection
+    context = multiprocessing.get_context("spawn")
+    processes: dict[str, multiprocessing.Process] = {}
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    log.info("Ingestion supervisor started", workers=configs['workers'])
+
+    while not stopping:
+        recovered = queue.requeue_stale()
+        if recovered:
+            log.warning("Recovered jobs from unresponsive workers", jobs=recovered)
+
+        # Start missing workers and replace the ones that died
+        for worker_id, process in list(processes.items()):
+            if not process.is_alive():
+                log.warning("Ingestion worker exited, replacing it", worker_id=worker_id, exitcode=process.exitcode)
+                del processes[worker_id]
+
+        while len(processes) < configs['workers']:
+            worker_id = f"worker-{uuid.uuid4().hex[:8]}"
+            process = context.Process(target=_worker_main, args=(worker_id,), name=worker_id)
+            process.start()
+            processes[worker_id] = process
+
+        time.sleep(configs['poll_interval_seconds'])
+
+    log.info("Ingestion supervisor stopping, waiting for running jobs", workers=len(processes))
+
+    for process in processes.values():
+        process.terminate()
+    for process in processes.values():
+        process.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+#!/bin/bash
+# Starts the API and the ingestion worker supervisor in one container.
+# Both run from /app, so they share the job queue at ./job_queue/jobs.sqlite (or jobs.db_path when set).
+
+python -m src.workers.ingestion_worker &
+worker_pid=$!
+
+uvicorn src.main:app --host 0.0.0.0 --port 8080 &
+api_pid=$!
+
+# Forward shutdown signals; the supervisor lets running jobs finish before it exits
+trap 'kill -TERM $api_pid $worker_pid 2>/dev/null' TERM INT
+
+# If either process dies, stop the other too so the container restarts as a whole
+wait -n $api_pid $worker_pid
+status=$?
+kill -TERM $api_pid $worker_pid 2>/dev/null
+wait
+exit $status
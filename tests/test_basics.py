@@ -19,4 +19,10 @@ def test_refresh_config(client: TestClient):
     
 def test_nonexistent_endpoint(client: TestClient):
     response = client.get("/does-not-exist")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_doc_analyser_metrics(client: TestClient):
+    response = client.get("/doc-analyser/metrics")
+    assert response.status_code == 200
+    assert "output_mode" in response.json()
+    assert "parsing" in response.json()
@@ -0,0 +1,97 @@
+import pytest
+
+from langchain.schema import Document
+from src.services.vectorstores.context_builder import ContextBuilder
+
+def _doc(text: str, source: str = "manual.pdf", token_count: int = 10) -> Document:
+    return Document(page_content=text, metadata={"source": source, "token_count": token_count})
+
+@pytest.fixture
+def builder() -> ContextBuilder:
+    builder = ContextBuilder()
+    builder.min_score = 0.75
+    builder.relative_score = 0.9
+    builder.max_context_tokens = 100
+    builder.min_overlap_chars = 10
+    return builder
+
+def test_absolute_threshold(builder: ContextBuilder):
+    hits = [(_doc("relevant"), 0.80), (_doc("unrelated"), 0.74)]
+
+    documents, stats = builder.build(hits)
+
+    assert [doc.page_content for doc in documents] == ["relevant"]
+    assert stats["above_threshold"] == 1
+
+def test_relative_threshold(builder: ContextBuilder):
+    # 0.85 clears the absolute threshold but is below 90% of the best score
+    hits = [(_doc("close"), 0.90), (_doc("best"), 0.98), (_doc("weaker"), 0.85)]
+
+    documents, stats = builder.build(hits)
+
+    assert [doc.page_content for doc in documents] == ["best", "close"]
+    assert stats["best_score"] == 0.98
+
+def test_no_hits(builder: ContextBuilder):
+    documents, stats = builder.build([])
+
+    assert documents == []
+    assert stats["packed"] == 0
+
+def test_suffix_overlap_is_trimmed(builder: ContextBuilder):
+    better = _doc("The warranty covers parts. Labour is covered for one year.")
+    # Starts with the end of the better chunk
+    worse = _doc("Labour is covered for one year. Batteries are excluded.")
+
+    documents, stats = builder.build([(better, 0.95), (worse, 0.90)])
+
+    assert [doc.page_content for doc in documents] == [better.page_content, " Batteries are excluded."]
+    assert stats["overlaps_removed"] == 1
+
+def test_prefix_overlap_is_trimmed(builder: ContextBuilder):
+    better = _doc("Labour is covered for one year. Batteries are excluded.")
+    # Ends with the start of the better chunk
+    worse = _doc("The warranty covers parts. Labour is covered for one year.")
+
+    documents, _ = builder.build([(better, 0.95), (worse, 0.90)])
+
+    assert documents[1].page_content == "The warranty covers parts. "
+
+def test_contained_chunk_is_dropped(builder: ContextBuilder):
+    better = _doc("Reset the device by holding the power button for ten seconds.")
+    worse = _doc("holding the power button")
+
+    documents, stats = builder.build([(better, 0.95), (worse, 0.90)])
+
+    assert [doc.page_content for doc in documents] == [better.page_content]
+    assert stats["overlaps_removed"] == 1
+
+def test_overlap_only_within_the_same_source(builder: ContextBuilder):
+    better = _doc("Reset the device by holding the power button for ten seconds.", source="a.pdf")
+    worse = _doc("holding the power button", source="b.pdf")
+
+    documents, _ = builder.build([(better, 0.95), (worse, 0.90)])
+
+    assert len(documents) == 2
+
+def test_short_overlap_is_kept(builder: ContextBuilder):
+    better = _doc("First part ends here.")
+    worse = _doc("here. Second part.")
+
+    documents, _ = builder.build([(better, 0.95), (worse, 0.90)])
+
+    assert documents[1].page_content == "here. Second part."
+
+def test_token_budget(builder: ContextBuilder):
+    hits = [
+        (_doc("first", source="a", token_count=60), 0.99),
+        (_doc("too large", source="b", token_count=50), 0.98),
+        (_doc("fits", source="c", token_count=40), 0.97),
+    ]
+
+    documents, stats = builder.build(hits)
+
+    # The chunk that doesn't fit is skipped, a smaller one further down still fills the budget
+    assert [doc.page_content for doc in documents] == ["first", "fits"]
+    assert stats["context_tokens"] == 100
+    assert stats["hit_tokens"] == 150
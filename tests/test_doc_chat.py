@@ -1,4 +1,7 @@
+import hashlib
+
 from fastapi.testclient import TestClient
+from src.repositories.doc_chat_repository import DocChatRepository
 
 def test_upload_document_missing_document(client: TestClient):
     # No document file is passed in the request, but valid client_id and product_id
@@ -35,15 +38,23 @@ def test_upload_document_no_data(client: TestClient):
     assert response.status_code == 422
       
 def test_vectorize_invalid_client_and_product_id(client: TestClient):
+    # Vectorization is queued; invalid IDs only surface when the worker runs the job
     response = client.post(
         "/doc-chat/vectorize?client_id=invalid_client_id&product_id=invalid_product_id",
         headers={"accept": "application/json"},
         data=""
     )
-    assert response.status_code == 500
-    assert response.json() == {
-        "detail": "Unexpected error during document vectorization."
-    }
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    response = client.get(f"/jobs/{job_id}", headers={"accept": "application/json"})
+    assert response.status_code == 200
+    assert response.json()["kind"] == "vectorize"
+    assert response.json()["status"] in ("queued", "running", "failed")
+
+def test_get_unknown_job(client: TestClient):
+    response = client.get("/jobs/unknown_job_id", headers={"accept": "application/json"})
+    assert response.status_code == 404
     
 def test_chat_invalid_chat_id(client: TestClient):
     payload = {
@@ -96,4 +107,22 @@ def test_chat_missing_query_field(client: TestClient):
         json=payload
     )
     assert response.status_code == 422
-    assert any("Field required" in error["msg"] for error in response.json()["detail"])
\ No newline at end of file
+    assert any("Field required" in error["msg"] for error in response.json()["detail"])
+def test_upload_url_invalid_content_type(client: TestClient):
+    response = client.post(
+        "/doc-chat/upload-url?client_id=someid&product_id=someprod&filename=report.pdf&content_type=image/png",
+        headers={"accept": "application/json"}
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        "detail": "Only files of type PDF, DOCX, PPTX, MD, TXT, XLSX, or CSV are allowed."
+    }
+
+def test_block_id_round_trip():
+    chunk_hash = hashlib.sha256(b"chunk").digest()
+    block_id = DocChatRepository._encode_block_id(42, chunk_hash)
+
+    assert DocChatRepository._decode_block_id(block_id) == (42, chunk_hash)
+    # Azure requires block IDs of a blob to be at most 64 bytes and all of the same length
+    assert len(block_id) <= 64
+    assert len(DocChatRepository._encode_block_id(999999, chunk_hash)) == len(block_id)
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from src.models.view_models.job_view_model import JobStatus
+from src.services.jobs.job_queue import JobQueue
+
+@pytest.fixture
+def queue(tmp_path) -> JobQueue:
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    queue.configs = {**queue.configs, "max_attempts": 3, "max_running_jobs_per_tenant": 1, "retry_backoff_seconds": 10, "stale_after_seconds": 60}
+    return queue
+
+def _available_at(queue: JobQueue, job_id: str) -> float:
+    return queue._conn.execute("SELECT available_at FROM jobs WHERE id = ?", (job_id,)).fetchone()["available_at"]
+
+def test_claim_hands_out_oldest_job_once(queue: JobQueue):
+    first = queue.enqueue("sync", "tenant-a", {"n": 1})
+    queue.enqueue("sync", "tenant-b", {"n": 2})
+
+    job = queue.claim("worker-1")
+    assert job.id == first.id
+    assert job.status == JobStatus.RUNNING
+    assert job.attempts == 1
+
+    assert queue.claim("worker-2").tenant_id == "tenant-b"
+    assert queue.claim("worker-3") is None
+
+def test_claim_respects_tenant_limit(queue: JobQueue):
+    queue.enqueue("sync", "tenant-a", {})
+    second = queue.enqueue("sync", "tenant-a", {})
+    other = queue.enqueue("sync", "tenant-b", {})
+
+    running = queue.claim("worker-1")
+    # tenant-a is at its limit, so its second job waits behind tenant-b's
+    assert queue.claim("worker-2").id == other.id
+    assert queue.claim("worker-3") is None
+
+    assert queue.complete(running.id, "worker-1", {"ok": True})
+    assert queue.claim("worker-3").id == second.id
+
+def test_fail_retries_with_backoff_then_fails(queue: JobQueue):
+    job = queue.enqueue("sync", "tenant-a", {})
+
+    queue.claim("worker-1")
+    before = time.time()
+    assert queue.fail(job.id, "worker-1", "boom") == JobStatus.QUEUED
+    assert _available_at(queue, job.id) >= before + 10
+
+    # Backoff doubles on every further attempt
+    for attempt, backoff in [(2, 20), (3, None)]:
+        queue._conn.execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job.id,))
+        assert queue.claim("worker-1").attempts == attempt
+        before = time.time()
+        status = queue.fail(job.id, "worker-1", "boom")
+        if backoff:
+            assert status == JobStatus.QUEUED
+            assert _available_at(queue, job.id) >= before + backoff
+
+    assert status == JobStatus.FAILED
+    assert queue.get(job.id).error == "boom"
+
+def test_fail_not_retryable(queue: JobQueue):
+    job = queue.enqueue("sync", "tenant-a", {})
+    queue.claim("worker-1")
+
+    assert queue.fail(job.id, "worker-1", "bad input", retryable=False) == JobStatus.FAILED
+
+def test_cancel_queued_and_running_jobs(queue: JobQueue):
+    running = queue.enqueue("sync", "tenant-a", {})
+    queued = queue.enqueue("sync", "tenant-b", {})
+    queue.claim("worker-1")
+
+    assert queue.request_cancel(queued.id).status == JobStatus.CANCELLED
+
+    flagged = queue.request_cancel(running.id)
+    assert flagged.status == JobStatus.RUNNING
+    assert flagged.cancel_requested
+
+    # A cancelled job is not retried
+    assert queue.fail(running.id, "worker-1", "stopped") == JobStatus.CANCELLED
+    assert queue.request_cancel("missing") is None
+
+def test_requeue_stale_and_ignore_late_results(queue: JobQueue):
+    job = queue.enqueue("sync", "tenant-a", {})
+    queue.claim("worker-1")
+    queue._conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (time.time() - 120, job.id))
+
+    assert queue.requeue_stale() == 1
+    assert queue.get(job.id).status == JobStatus.QUEUED
+
+    # The worker that lost the job can no longer complete or fail it
+    assert not queue.complete(job.id, "worker-1", {"ok": True})
+    assert queue.fail(job.id, "worker-1", "late") is None
+
+    queue._conn.execute("UPDATE jobs SET available_at = 0 WHERE id = ?", (job.id,))
+    assert queue.claim("worker-2").attempts == 2
+    assert queue.requeue_stale() == 0
+    assert queue.complete(job.id, "worker-2", {"ok": True})
+    assert queue.get(job.id).status == JobStatus.SUCCEEDED
@@ -0,0 +1,60 @@
+from langchain.schema import Document
+from src.services.vectorstores.near_duplicate_filter import NearDuplicateFilter
+
+TEXT = (
+    "To reset the router, hold the reset button on the back for ten seconds until the status light "
+    "blinks orange, then wait for the light to turn solid green before reconnecting your devices."
+)
+
+def _doc(doc_id: str, text: str, source: str) -> Document:
+    return Document(id=doc_id, page_content=text, metadata={"source": source, "page": 1})
+
+def test_near_duplicate_is_attached_to_the_first_chunk():
+    near_duplicate_filter = NearDuplicateFilter(threshold=0.8)
+
+    assert near_duplicate_filter.add(_doc("a", TEXT, "manual.pdf")) is None
+    # Same text with different whitespace and case
+    assert near_duplicate_filter.add(_doc("b", "  " + TEXT.upper().replace(" ", "\n "), "faq.pdf")) == "a"
+
+    assert near_duplicate_filter.duplicate_sources == {"a": [{"id": "b", "source": "faq.pdf", "page": 1}]}
+
+def test_distinct_chunks_are_kept():
+    near_duplicate_filter = NearDuplicateFilter(threshold=0.8)
+    other = "The warranty covers manufacturing defects for two years from the date of purchase, excluding batteries and cables."
+
+    representatives = near_duplicate_filter.deduplicate([
+        _doc("a", TEXT, "manual.pdf"),
+        _doc("b", other, "warranty.pdf"),
+        _doc("c", TEXT, "copy.pdf"),
+    ])
+
+    assert [doc.id for doc in representatives] == ["a", "b"]
+    assert representatives[0].metadata["duplicate_sources"] == [{"id": "c", "source": "copy.pdf", "page": 1}]
+    assert representatives[1].metadata["duplicate_sources"] == []
+
+    stats = near_duplicate_filter.get_stats()
+    assert stats["chunks"] == 3
+    assert stats["duplicates_removed"] == 1
+    assert stats["representatives"] == 2
+
+def test_indexed_chunk_represents_its_cluster_in_any_order():
+    new = _doc("new", TEXT, "manual-v2.pdf")
+    indexed = _doc("indexed", TEXT, "manual.pdf")
+
+    # Indexed chunk first: the new chunk is its duplicate
+    indexed_first = NearDuplicateFilter(threshold=0.8)
+    assert indexed_first.add(indexed, preferred=True) is None
+    assert indexed_first.add(new) == "indexed"
+
+    # New chunk first: the indexed chunk takes the cluster over
+    new_first = NearDuplicateFilter(threshold=0.8)
+    assert new_first.add(new) is None
+    assert new_first.add(indexed, preferred=True) is None
+    assert new_first.replaced == {"new": "indexed"}
+
+    # A later near-duplicate joins the indexed chunk's cluster
+    assert new_first.add(_doc("copy", TEXT, "copy.pdf")) == "indexed"
+
+    for near_duplicate_filter in (indexed_first, new_first):
+        assert near_duplicate_filter.duplicate_sources["indexed"][0] == {"id": "new", "source": "manual-v2.pdf", "page": 1}
+        assert near_duplicate_filter.get_stats()["representatives"] == 1
@@ -14,13 +14,18 @@ packages = [
     "langgraph",
     "pypdf",
     "faiss-cpu",
+    "datasketch",
     "structlog",
     "PyMuPDF",
+    "python-pptx",
+    "openpyxl",
+    "tiktoken",
     "pdfplumber",
     "FastAPI",
     "uvicorn",
     "python-multipart",
     "azure-storage-blob",
+    "aiohttp",
     "opencensus-ext-azure",
     "azure-cosmos",
     "azure-identity",